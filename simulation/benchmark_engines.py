@@ -0,0 +1,137 @@
+"""
+A script to compare the event throughput of the schedulers the simulation can
+run on (see the "--engine" option of "simulation_main.py"). Every engine first
+processes a chain of empty timers, which measures the overhead of the kernel
+itself. Then the same simulation, with logging disabled, is run on every
+engine. The events processed per second are reported, and the recordings of
+all engines are checked to be identical.
+
+Example:
+	$ python3 benchmark_engines.py --nr_ASes 500 --repetitions 3
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import random
+import logging
+import argparse
+import tempfile
+import time
+import numpy as np
+
+from simulation_main import __engines__, setup_env, run_simulation
+from src.classes.network import Internet
+from src.graph_generation import generate_directed_AS_graph
+
+
+def quiet_logger(name, path=None):
+	"""
+	Creates a logger that does not let any message pass.
+
+	:param name: the name of the logger
+	:param path: ignored, for compatibility with "create_logger"
+
+	:type name: str
+	:type path: str
+
+	:returns: the logger
+	:rtype: logging.Logger
+	"""
+	logger = logging.getLogger(f"BENCHMARK-{name}")
+	logger.setLevel(logging.CRITICAL + 1)
+	logger.propagate = False
+	return logger
+
+
+def kernel_benchmark(engine, nr_events):
+	"""
+	Processes the given number of empty timers, each one scheduled by the
+	previous one of its chain, on the given engine.
+
+	:param engine: the name of the engine
+	:param nr_events: the number of timers
+
+	:type engine: str
+	:type nr_events: int
+
+	:returns: the runtime in seconds
+	:rtype: float
+	"""
+	env = __engines__[engine]()
+	nr_chains = 100
+
+	def callback(remaining):
+		if remaining:
+			env.call_later(1, callback, remaining - 1)
+
+	for chain in range(nr_chains):
+		env.call_later(chain % 7, callback, nr_events // nr_chains - 1)
+
+	start = time.perf_counter()
+	env.run()
+	return time.perf_counter() - start
+
+
+def benchmark(engine, args, directory):
+	"""
+	Runs one simulation on the given engine.
+
+	:param engine: the name of the engine
+	:param args: the parsed command line arguments
+	:param directory: directory for the figures and logs of the simulation
+
+	:type engine: str
+	:type args: argparse.Namespace
+	:type directory: str
+
+	:returns: the runtime in seconds, the number of processed events and the
+		attack traffic received by the victim
+	:rtype: tuple[float, int, list[tuple[float, float]]]
+	"""
+	random.seed(args.seed)
+	np.random.seed(args.seed)
+
+	simulation_logger = quiet_logger("[SIM]")
+	env = setup_env(simulation_logger, engine)
+	graph, victim, adversary, allies = generate_directed_AS_graph(args.nr_ASes, args.nr_allies, 1000)
+	net = Internet(env, graph, victim, adversary, allies, 1, 3,
+				   quiet_logger("[NETWORK]"), quiet_logger, directory, directory,
+				   traffic_model=args.traffic_model)
+
+	start = time.perf_counter()
+	run_simulation(env, net, args.simulation_length, simulation_logger)
+	return time.perf_counter() - start, env.nr_events, net.victim.received_attacks
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--seed", type=int, default=1, help="random seed; in [0, 2**32-1]")
+	parser.add_argument("--nr_ASes", type=int, default=200, help="number of ASes in simulations")
+	parser.add_argument("--nr_allies", type=int, default=2, help="number of allies")
+	parser.add_argument("--simulation_length", type=int, default=650, help="number of steps the simulation runs")
+	parser.add_argument("--traffic_model", type=str, default="packet", choices=["packet", "fluid"], help="how attack traffic is simulated")
+	parser.add_argument("--repetitions", type=int, default=3, help="number of runs per engine; the fastest one is reported")
+	parser.add_argument("--kernel_events", type=int, default=200000, help="number of empty timers processed by every engine")
+	args = parser.parse_args()
+
+	print(f"{'engine':>8} {'timers':>10} {'seconds':>10} {'events/s':>12}")
+	for engine in __engines__:
+		runtime = min(kernel_benchmark(engine, args.kernel_events) for _ in range(args.repetitions))
+		print(f"{engine:>8} {args.kernel_events:>10} {runtime:>10.3f} {args.kernel_events / runtime:>12.0f}")
+	print()
+
+	recordings = {}
+	print(f"{'engine':>8} {'events':>10} {'seconds':>10} {'events/s':>12}")
+	with tempfile.TemporaryDirectory() as directory:
+		for engine in __engines__:
+			runs = [benchmark(engine, args, directory) for _ in range(args.repetitions)]
+			runtime, nr_events, recordings[engine] = min(runs, key=lambda run: run[0])
+			print(f"{engine:>8} {nr_events:>10} {runtime:>10.3f} {nr_events / runtime:>12.0f}")
+
+	if len(set(map(tuple, recordings.values()))) != 1:
+		raise Exception("The engines produced different simulations!")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,106 @@
+"""
+A script to track the startup time of the simulation, i.e., the time it takes
+to import a module (by default "simulation_main") before the first event is
+processed. Every repetition imports the module in a fresh interpreter with
+"-X importtime"; the median cumulative import time, and the packages that
+take longest to import, are reported. The script fails if the import takes
+longer than "--max_seconds", or if it loads one of the "--forbidden" packages,
+which are only needed for figures or other optional features and have to be
+imported lazily.
+
+Example:
+	$ python3 benchmark_imports.py --repetitions 5 --max_seconds 1.5
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import sys
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+
+# packages that the simulation must not import at startup
+FORBIDDEN_PACKAGES = ["matplotlib", "pandas", "pyvis", "scipy"]
+
+
+def measure_import(module):
+	"""
+	Imports the given module in a fresh interpreter, and collects the import
+	time of every module it loads.
+
+	:param module: the name of the module
+	:type module: str
+
+	:returns: the cumulative import time of the module in seconds, and the
+		import time of every loaded module (excluding its own imports) in
+		seconds
+	:rtype: tuple[float, dict[str, float]]
+	"""
+	result = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		cwd=Path(__file__).resolve().parent,
+		capture_output=True,
+		text=True
+	)
+	if result.returncode != 0:
+		raise Exception(f"Importing \"{module}\" failed:\n{result.stderr}")
+
+	# every line has the form "import time: <self us> | <cumulative us> | <name>",
+	# where the name is indented by the depth of the import
+	total = None
+	self_times = {}
+	for line in result.stderr.splitlines():
+		if not line.startswith("import time:") or "[us]" in line:
+			continue
+		self_us, cumulative_us, name = line[len("import time:"):].split("|")
+		self_times[name.strip()] = int(self_us) / 1e6
+		if name.strip() == module:
+			total = int(cumulative_us) / 1e6
+	return total, self_times
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Import time benchmark of the simulation.")
+	parser.add_argument("--module", type=str, default="simulation_main", help="module to import")
+	parser.add_argument("--repetitions", type=int, default=5, help="number of fresh interpreters the module is imported in")
+	parser.add_argument("--top", type=int, default=10, help="number of packages with the longest import time to report")
+	parser.add_argument("--max_seconds", type=float, default=None, help="fail if the median import time is longer")
+	parser.add_argument("--forbidden", type=str, nargs="*", default=FORBIDDEN_PACKAGES, help="packages that must not be imported")
+	args = parser.parse_args()
+
+	totals = []
+	package_times = defaultdict(list)
+	for _ in range(args.repetitions):
+		total, self_times = measure_import(args.module)
+		totals.append(total)
+
+		# sum up the modules of every top-level package
+		packages = defaultdict(float)
+		for name, self_time in self_times.items():
+			packages[name.split(".")[0]] += self_time
+		for package, package_time in packages.items():
+			package_times[package].append(package_time)
+
+	median = statistics.median(totals)
+	print(f"[*] Importing \"{args.module}\": {median * 1000:.1f} ms (median of {args.repetitions}, min {min(totals) * 1000:.1f} ms)")
+	heaviest = sorted(package_times.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+	for package, times in heaviest[:args.top]:
+		print(f"\t{package:<24} {statistics.median(times) * 1000:8.1f} ms")
+
+	failed = False
+	loaded = [package for package in args.forbidden if package in package_times]
+	if loaded:
+		print(f"[!] Forbidden packages are imported: {', '.join(loaded)}")
+		failed = True
+	if args.max_seconds is not None and median > args.max_seconds:
+		print(f"[!] The import time exceeds {args.max_seconds * 1000:.1f} ms")
+		failed = True
+	sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -6,39 +6,64 @@ Author:
 """
 
 import random
+import logging
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 import argparse
-import simpy
+import json
 import numpy as np
 
 
 from src.classes.network import Internet
+from src.classes.scheduler import SimpyScheduler, HeapScheduler
 from src.graph_generation import generate_directed_AS_graph
-from src.auxiliary_functions import create_logger
-
-
-
-
-def setup_env(simulation_logger):
+from src.topology_cache import generate_cached_AS_graph
+from src.as_relationships import load_directed_AS_graph
+from src.auxiliary_functions import BatchedLogSink, remove_handlers
+from src.event_trace import EventTrace
+from src.pdes import run_partitioned
+from src.checkpoint import save_checkpoint, load_checkpoint, change_parameters
+from src.plotting import FigureRenderer
+
+
+# the logging level used for every verbosity setting; with "off", no log
+# message passes the level check, so nothing is formatted at all
+__verbosity_levels__ = {
+	"off": logging.CRITICAL + 1,
+	"info": logging.INFO,
+	"debug": logging.DEBUG
+}
+
+# the schedulers the simulation can run on; both produce the same results
+__engines__ = {
+	"simpy": SimpyScheduler,
+	"fast": HeapScheduler
+}
+
+
+def setup_env(simulation_logger, engine="simpy"):
 	"""
-	Initializes the simpy.Environment.
+	Initializes the scheduler the simulation runs on.
 
 	:param simulation_logger: the logger responsible for environment events
+	:param engine: the name of the scheduler, one of "__engines__"
 
 	:type simulation_logger: logging.RootLogger
+	:type engine: str
 
-	:returns: the simpy environment
-	:rytpe: simpy.Environment
+	:returns: the scheduler
+	:rytpe: scheduler.SimpyScheduler | scheduler.HeapScheduler
 	"""
 
-	env = simpy.Environment()
+	env = __engines__[engine]()
 	simulation_logger.info("[*] Simulation is setup.")
 
 	return env
 
 
-def run_simulation(env, net, simulation_length, simulation_logger):
+def run_simulation(env, net, simulation_length, simulation_logger, nr_partitions=1,
+				   resume=False, checkpoint_at=None, checkpoint_path=None):
 	"""
 	Function to actually run the environment. Will start all processes involved,
 	and the run the simulation.
@@ -47,32 +72,66 @@ def run_simulation(env, net, simulation_length, simulation_logger):
 	:param net: the network
 	:param simulation_length: maximum step number of the simulation
 	:param simulation_logger: the logger responsible for environment events
-
-	:type env: simpy.Environment
+	:param nr_partitions: the number of processes the ASes are partitioned
+		over, see "pdes.py"
+	:param resume: whether the network was restored from a checkpoint, i.e.,
+		its cycles are already running
+	:param checkpoint_at: if given, the step at which a checkpoint is saved
+	:param checkpoint_path: the path to save the checkpoint to
+
+	:type env: scheduler.SimpyScheduler | scheduler.HeapScheduler
 	:type net: Internet
 	:type simulation_length: int
 	:type simulation_logger: logging.RootLogger
+	:type nr_partitions: int
+	:type resume: bool
+	:type checkpoint_at: float
+	:type checkpoint_path: str
 	"""
 
-	# start the attacking cycles of the source node
-	env.process(net.source.attack_cycle())
-
-	# run the simulation
 	simulation_logger.info("[*] Simulation is started.")
-	env.run(until=simulation_length)
+	if nr_partitions > 1:
+		if resume or checkpoint_at is not None:
+			raise Exception("A partitioned simulation can not be checkpointed!")
+
+		# every process starts the cycles of its own ASes
+		run_partitioned(net, nr_partitions, simulation_length)
+	else:
+		if not resume:
+			# start the attacking cycles of the source node
+			net.source.attack_cycle()
+
+			# with the fluid traffic model, the attack traffic is propagated by
+			# one cycle for the whole network
+			if net.fluid_flow is not None:
+				net.fluid_flow.propagation_cycle()
+
+		# run the simulation, and save its state in between
+		if checkpoint_at is not None:
+			if not env.now <= checkpoint_at <= simulation_length:
+				raise Exception(f"The checkpoint at step {checkpoint_at} is not part of the simulation!")
+			env.run(until=checkpoint_at)
+			save_checkpoint(checkpoint_path, net)
+			simulation_logger.info("[*] Checkpoint at step %s saved to \"%s\".", checkpoint_at, checkpoint_path)
+		env.run(until=simulation_length)
+	net.close_recordings()
 	simulation_logger.info("[*] Simulation has ended.")
+	simulation_logger.info("[*] Events processed: %s", env.nr_events)
+	simulation_logger.info("[*] Routing table cache: %s", net.routing_cache_statistics())
+	simulation_logger.info("[*] RAT messages: %s", net.rat_statistics())
+	if net.ensemble is not None:
+		summary = {key if key == "sent" else f"AS{net.public_asn(key)}": value for key, value in net.ensemble.summary().items()}
+		simulation_logger.info("[*] Totals over %s replicas sharing the control decisions of the first, as (mean, 95%% traffic noise interval half width): %s", net.ensemble.nr_replicas, summary)
 
 
-def main():
-	"""
-	The main function that is responsible for initializing, running and
-	finally plottingthe results of the simulation.
+def create_parser():
 	"""
+	Creates the parser for the command line arguments of a simulation; its
+	defaults are the default configuration of a simulation.
 
-	# current date and time, used to name this simulation
-	time_date_str = datetime.now().strftime("%d:%m:%Y_%H:%M:%S")
-
-	# argument parser
+	:returns: the argument parser
+	:rtype: argparse.ArgumentParser
+	"""
 	parser = argparse.ArgumentParser()
 	parser.add_argument("--seed", type=int, default=random.randint(0, 2**32 - 1), help="random seed; in [0, 2**32-1]")
 	parser.add_argument("--nr_ASes", type=int, default=200, help="number of ASes in simulations")
@@ -81,13 +140,336 @@ def main():
 	parser.add_argument("--propagation_delay", type=float, default=3, help="number of steps in the simulation it takes for a packet to be transmitted")
 	parser.add_argument("--full_attack_volume", type=float, default=1000, help="the attack volume Mbps")
 	parser.add_argument("--attack_frequency", type=float, default=1, help="number of steps in the simulation between attack packets sent")
+	parser.add_argument("--engine", type=str, default="simpy", choices=__engines__.keys(), help="the event kernel; \"fast\" uses a plain heap instead of simpy")
+	parser.add_argument("--traffic_model", type=str, default="packet", choices=["packet", "fluid"], help="relay every attack packet individually, or propagate the attack traffic as a fluid through a sparse split matrix")
+	parser.add_argument("--replicas", type=int, default=1, help="number of replicas, differing only in the noise of the attack volume, simulated together under the help, support and routing decisions of the first; their intervals cover the traffic noise only; requires the fluid traffic model")
+	parser.add_argument("--partitions", type=int, default=1, help="number of processes the ASes are partitioned over, for a parallel simulation with the same results; requires the packet traffic model")
+	parser.add_argument("--checkpoint_at", type=float, default=None, help="step at which the state of the simulation is saved, to be continued with --restore")
+	parser.add_argument("--checkpoint_path", type=str, default=None, help="file to save the checkpoint to; defaults to checkpoint.pkl.gz in the log directory")
+	parser.add_argument("--restore", type=str, default=None, help="checkpoint file to continue from; the topology and state are taken from it, while the simulation length, propagation delay, attack frequency and volume, and RAT TTL are taken from the command line")
+	parser.add_argument("--as_relationships", type=str, default=None, help="AS-relationship file in the format of CAIDA (optionally .gz or .bz2 compressed), whose largest connected component is simulated instead of a random topology; --nr_ASes and --topology_cache are then ignored")
+	parser.add_argument("--topology_cache", type=str, default=None, help="directory to cache generated topologies in, by number of ASes, number of allies, attack volume and seed; simulations with the same ones load the topology from there")
+	parser.add_argument("--rat_ttl", type=float, default=100, help="number of steps an AS remembers a seen route advertisement")
 	parser.add_argument("--log_path", type=str, default="./logs", help="path to save logs")
 	parser.add_argument("--figure_path", type=str, default="./figures", help="path to save figures")
-	args = parser.parse_args()
+	parser.add_argument("--topology_format", type=str, default="json", choices=["json", "edgelist"], help="format of the changed edges and the attack subgraph saved at the end (topology_diff.json/.txt)")
+	parser.add_argument("--pyvis", action="store_true", help="also render the initial and the changed topology as interactive PyVis html figures, which is slow for large networks")
+	parser.add_argument("--no_plot", action="store_true", help="create no figures at all, e.g., for batch jobs; the plotting libraries are then never imported")
+	parser.add_argument("--headless", action="store_true", help="do not show the figures, but render them in a background process")
+	parser.add_argument("--figure_formats", type=str, nargs="+", default=["png", "svg"], help="file formats to save the figures in")
+	parser.add_argument("--figure_dpi", type=int, default=400, help="resolution of the saved figures")
+	parser.add_argument("--max_plot_points", type=int, default=10000, help="maximal number of points plotted per series, longer series are reduced to the minima and maxima of their sections; 0 plots all points")
+	parser.add_argument("--log_files", type=int, default=4, help="number of files the logs of all ASes are distributed over")
+	parser.add_argument("--compress_logs", action="store_true", help="gzip the log files")
+	parser.add_argument("--recording_chunk_size", type=int, default=1 << 16, help="number of records every recording (e.g., the received attacks of an AS) keeps in memory, before it is written to the recordings directory in the log directory; 0 keeps all records in memory")
+	parser.add_argument("--event_trace", action="store_true", help="record all sent and received packets in a binary trace (event_trace.npy), see trace_query.py")
+	parser.add_argument("--verbosity", type=str, default="debug", choices=__verbosity_levels__.keys(), help="which log messages to write")
+	return parser
+
+
+def create_network(args, simulation_logger, network_logger, create_logger_func,
+				   log_path, figure_path, event_trace=None, recording_chunk_size=None):
+	"""
+	Generates a random AS graph, loads it from the topology cache (see
+	"--topology_cache"), or reads it from an AS-relationship file (see
+	"--as_relationships"), and creates the network of a simulation on it, on a
+	new scheduler. The random number generators have to be seeded with the
+	seed of the configuration beforehand.
+
+	:param args: the configuration of the simulation, see "create_parser"
+	:param simulation_logger: the logger responsible for environment events
+	:param network_logger: the logger of the network
+	:param create_logger_func: the function to create the loggers of the
+		ASes with
+	:param log_path: the directory to save the logs in
+	:param figure_path: the directory to save the figures in
+	:param event_trace: if given, all sent and received packets are recorded
+		in it
+	:param recording_chunk_size: if given, the number of records every
+		recording keeps in memory, see "Internet"
+
+	:type args: argparse.Namespace
+	:type simulation_logger: logging.RootLogger
+	:type network_logger: logging.RootLogger
+	:type create_logger_func: callable
+	:type log_path: str
+	:type figure_path: str
+	:type event_trace: event_trace.EventTrace
+	:type recording_chunk_size: int
+
+	:returns: the network
+	:rtype: Internet
+	"""
+
+	# setup the scheduler
+	env = setup_env(simulation_logger, args.engine)
+
+	# create an initial AS graph
+	if args.as_relationships is not None:
+		ignored = [
+			f"--{option}" for option in ["nr_ASes", "topology_cache"]
+			if getattr(args, option) != create_parser().get_default(option)
+		]
+		if ignored:
+			simulation_logger.warning("[!] %s ignored, since the topology is read from %s", " and ".join(ignored), args.as_relationships)
+		graph, victim, adversary, allies = load_directed_AS_graph(
+			args.as_relationships,
+			args.nr_allies,
+			args.full_attack_volume
+		)
+	elif args.topology_cache is None:
+		graph, victim, adversary, allies = generate_directed_AS_graph(
+			args.nr_ASes,
+			args.nr_allies,
+			args.full_attack_volume
+		)
+	else:
+		graph, victim, adversary, allies = generate_cached_AS_graph(
+			args.topology_cache,
+			args.seed,
+			args.nr_ASes,
+			args.nr_allies,
+			args.full_attack_volume
+		)
+
+	# initialize the Internet network
+	return Internet(env, graph, victim, adversary, allies,
+					args.attack_frequency, args.propagation_delay,
+					network_logger, create_logger_func, log_path,
+					figure_path, args.rat_ttl, event_trace,
+					args.traffic_model, args.replicas, args.seed,
+					recording_chunk_size)
+
+
+def create_config(**parameters):
+	"""
+	Creates the configuration of a simulation, for running it from Python
+	(see "run_experiment"): the defaults of "create_parser", with the given
+	parameters changed.
+
+	Example:
+		config = create_config(seed=3, nr_ASes=100, engine="fast")
+
+	:param parameters: the parameters that differ from the defaults, by
+		the name of their command line option
+
+	:type parameters: dict
+
+	:returns: the configuration
+	:rtype: argparse.Namespace
+	"""
+	config = create_parser().parse_args([])
+	for name, value in parameters.items():
+		if not hasattr(config, name):
+			raise Exception(f"Unknown simulation parameter \"{name}\"!")
+		setattr(config, name, value)
+	return config
+
+
+def create_quiet_logger(name, path=None):
+	"""
+	Creates a logger that does not let any message pass, and writes nowhere.
+
+	:param name: the name of the logger
+	:param path: ignored, for compatibility with "BatchedLogSink.create_logger"
+
+	:type name: str
+	:type path: str
+
+	:returns: the logger
+	:rtype: logging.Logger
+	"""
+	logger = logging.getLogger(name)
+	remove_handlers(logger)
+	logger.setLevel(logging.CRITICAL + 1)
+	logger.propagate = False
+	return logger
+
+
+def run_experiment(config, net=None, output_path=None):
+	"""
+	Runs a simulation in this process, and returns its results in memory.
+	Nothing is written to disk, unless an output path is given, in which
+	case the logs, the recordings that do not fit into memory (see
+	"--recording_chunk_size") and the key performance indicators are saved
+	there; figures are never created.
+
+	A network of an earlier experiment can be given, which is then reset
+	(see "Internet.reset") instead of created again, such that several
+	attack scenarios are simulated on the same topology. The topology
+	parameters of the configuration ("nr_ASes", "nr_allies", "engine",
+	"traffic_model", "replicas") are then ignored, while the ones that can
+	change between simulations (see "checkpoint.change_parameters") are
+	applied. The random number generators are seeded with the seed of the
+	configuration before the topology is generated; a reset network
+	continues with the random numbers it had right after it was created
+	(so the seed of the configuration is ignored as well). Hence, an
+	experiment on a reset network has the same results as one on a newly
+	created network with the same configuration.
+
+	Example:
+		config = create_config(seed=3, nr_ASes=100, verbosity="off")
+		first = run_experiment(config)
+		config.full_attack_volume = 2000
+		second = run_experiment(config, net=first["network"])
+
+	:param config: the configuration of the simulation, see "create_config"
+	:param net: if given, a network to reset and simulate again
+	:param output_path: if given, the directory to save the logs, the
+		recordings and the indicators in
+
+	:type config: argparse.Namespace
+	:type net: Internet
+	:type output_path: str
+
+	:returns: the network ("network"), its key performance indicators
+		("kpis"), copies of all its recordings by name ("recordings"), and
+		the number of processed events ("events")
+	:rtype: dict
+	"""
+	if output_path is not None:
+		Path(output_path).mkdir(parents=True, exist_ok=True)
+		log_sink = BatchedLogSink(output_path, config.log_files, config.compress_logs, multiprocess=config.partitions > 1)
+		create_logger_func = partial(log_sink.create_logger, level=__verbosity_levels__[config.verbosity])
+	else:
+		log_sink = None
+		create_logger_func = create_quiet_logger
+	network_logger = create_logger_func("[NETWORK]", f"{output_path}/network_logs.txt")
+	simulation_logger = create_logger_func("[SIM]", f"{output_path}/simulation_logs.txt")
+	recording_chunk_size = (config.recording_chunk_size or None) if output_path is not None else None
+
+	try:
+		if net is None:
+			random.seed(config.seed)
+			np.random.seed(config.seed)
+			net = create_network(
+				config, simulation_logger, network_logger, create_logger_func,
+				output_path, output_path, recording_chunk_size=recording_chunk_size
+			)
+		else:
+			net.redirect_output(network_logger, create_logger_func, output_path, output_path)
+			net.recording_chunk_size = recording_chunk_size
+			net.reset()
+			change_parameters(net, config)
+
+		run_simulation(net.env, net, config.simulation_length, simulation_logger, config.partitions)
+
+		kpis = net.kpi_summary()
+		if output_path is not None:
+			with open(f"{output_path}/kpis.json", "w") as file:
+				json.dump(kpis, file, indent="\t")
+	finally:
+		if log_sink is not None:
+			log_sink.close()
+
+	return {
+		"network": net,
+		"kpis": kpis,
+		"recordings": {name: np.array(recorder.array()) for name, recorder in net.recorders().items()},
+		"events": net.env.nr_events
+	}
+
+
+def simulate(args, log_path, figure_path, plot=True, renderer=None):
+	"""
+	Sets up and runs a single simulation, as configured by the given
+	arguments. The random number generators have to be seeded beforehand.
+
+	:param args: the configuration of the simulation, see "create_parser"
+	:param log_path: the directory to save the logs in
+	:param figure_path: the directory to save the figures in
+	:param plot: whether to create the figures after the simulation
+	:param renderer: if given, renders the figure of the attack traffic in
+		the background, such that this function returns before it is saved
+
+	:type args: argparse.Namespace
+	:type log_path: str
+	:type figure_path: str
+	:type plot: bool
+	:type renderer: plotting.FigureRenderer
+
+	:returns: the network, after the simulation ran
+	:rtype: Internet
+	"""
+
+	# create separate loggers, all with the same verbosity, that write
+	# into one sink; the log of a single logger can be extracted again
+	# through "auxiliary_functions.extract_log"
+	log_sink = BatchedLogSink(log_path, args.log_files, args.compress_logs, multiprocess=args.partitions > 1)
+	create_logger_func = partial(log_sink.create_logger, level=__verbosity_levels__[args.verbosity])
+	network_logger = create_logger_func("[NETWORK]", f"{log_path}/network_logs.txt")
+	simulation_logger = create_logger_func("[SIM]", f"{log_path}/simulation_logs.txt")
+
+	event_trace = EventTrace(f"{log_path}/event_trace.npy") if args.event_trace else None
+
+	try:
+		if args.restore is None:
+			net = create_network(
+				args, simulation_logger, network_logger, create_logger_func,
+				log_path, figure_path, event_trace, args.recording_chunk_size or None
+			)
+			env = net.env
+		else:
+			# continue a saved simulation, with its own scheduler and random
+			# numbers, but with the logs and figures of this one
+			net = load_checkpoint(args.restore)
+			net.redirect_output(network_logger, create_logger_func, log_path, figure_path, event_trace)
+			change_parameters(net, args)
+			env = net.env
+			simulation_logger.info("[*] Simulation is restored from \"%s\" at step %s.", args.restore, env.now)
+
+		# run the simulation
+		run_simulation(
+			env, net, args.simulation_length, simulation_logger, args.partitions,
+			resume=args.restore is not None,
+			checkpoint_at=args.checkpoint_at,
+			checkpoint_path=args.checkpoint_path or f"{log_path}/checkpoint.pkl.gz"
+		)
+
+		# save the key performance indicators of this simulation
+		with open(f"{log_path}/kpis.json", "w") as file:
+			json.dump(net.kpi_summary(), file, indent="\t")
+
+		# save the changes of the topology, also without figures
+		extension = "json" if args.topology_format == "json" else "txt"
+		net.export_topology_diff(f"{figure_path}/topology_diff.{extension}", args.topology_format)
+
+		if plot:
+			# create plots about this simulation
+			net.plot(
+				show=not args.headless,
+				formats=args.figure_formats,
+				dpi=args.figure_dpi,
+				max_points=args.max_plot_points or None,
+				renderer=renderer
+			)
+
+			# render the initial and the changed topology only if requested
+			if args.pyvis:
+				Internet.save_graph(net.init_graph, f"{figure_path}/init_graph.html")
+				net.generate_networkx_graph()
+
+	finally:
+		log_sink.close()
+		if event_trace is not None:
+			event_trace.close()
+
+	return net
+
+
+def main():
+	"""
+	The main function that is responsible for initializing, running and
+	finally plottingthe results of the simulation.
+	"""
+
+	# current date and time, used to name this simulation
+	time_date_str = datetime.now().strftime("%d:%m:%Y_%H:%M:%S")
+
+	# argument parser
+	args = create_parser().parse_args()
 
 	# set the seed
-	
-	args.seed = 1 # TODO remove
 	random.seed(args.seed)
 	np.random.seed(args.seed)
 
@@ -103,35 +485,19 @@ def main():
 	print(f"[*] Logs will be saved in: {log_path}/")
 	print(f"[*] Figures will be saved in: {figure_path}/")
 
-
-	# create separate loggers
-	network_logger = create_logger("[NETWORK]", f"{log_path}/network_logs.txt")
-	simulation_logger = create_logger("[SIM]", f"{log_path}/simulation_logs.txt")
-
-	# setup the simpy environment
-	env = setup_env(simulation_logger)
-
-	# create an initial AS graph
-	graph, victim, adversary, allies = generate_directed_AS_graph(
-		args.nr_ASes,
-		args.nr_allies,
-		args.full_attack_volume
-	)
-
-	# initialize the Internet network
-	net = Internet(env, graph, victim, adversary, allies,
-				   args.attack_frequency, args.propagation_delay,
-				   network_logger, create_logger, log_path,
-				   figure_path)
-
-	# run the simulation
-	run_simulation(env, net, args.simulation_length, simulation_logger)
-
-	# create plots about this simulation
-	net.plot()
-
-	# also create a plot of the current topology
-	net.generate_networkx_graph()
+	# without a display, the figures are rendered in the background, while
+	# the results are reported
+	renderer = FigureRenderer() if args.headless and not args.no_plot else None
+	try:
+		net = simulate(args, log_path, figure_path, plot=not args.no_plot, renderer=renderer)
+
+		if net.ensemble is not None:
+			print(f"[*] Totals over {net.ensemble.nr_replicas} replicas, mean +- 95% interval of the traffic noise only (the replicas share the control decisions of the first):")
+			for key, (mean, half_width) in net.ensemble.summary().items():
+				print(f"\t{key if key == 'sent' else f'AS-{net.public_asn(key)}'}: {mean:.1f} +- {half_width:.1f}")
+	finally:
+		if renderer is not None:
+			renderer.close()
 
 if __name__ == "__main__":
 	main()
@@ -0,0 +1,282 @@
+"""
+Contains the ASRelationships class, a compact representation of a real AS-level
+topology, and the functions to read it from an AS-relationship file in the
+format of CAIDA, and to turn it into the topology of a simulation.
+
+Every line of such a file is either a comment, starting with "#", or a link
+"<AS1>|<AS2>|<relationship>[|<source>]", where the relationship is -1 if AS1
+is a provider of AS2, and 0 if they are peers.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import bz2
+import gzip
+import itertools
+from collections import deque
+import networkx as nx
+import numpy as np
+
+from .graph_generation import direct_AS_graph
+
+
+# the relationship of an AS to one of its neighbors, as stored in
+# "ASRelationships.relationships"
+PROVIDER = -1
+PEER = 0
+CUSTOMER = 1
+
+
+def open_text(path):
+	"""
+	:param path: the path of a text file, which may be compressed by gzip
+		(".gz") or bzip2 (".bz2")
+	:type path: str
+
+	:returns: the file, opened for reading text
+	:rtype: io.TextIOBase
+	"""
+	if path.endswith(".gz"):
+		return gzip.open(path, "rt")
+	if path.endswith(".bz2"):
+		return bz2.open(path, "rt")
+	return open(path)
+
+
+class ASRelationships(object):
+	"""
+	The links between ASes, as a compressed sparse row (CSR) adjacency over
+	the ASes, which are numbered 0, ..., nr_ASes-1 by increasing ASN: the
+	neighbors of the AS with index i are
+	"neighbors[indptr[i]:indptr[i + 1]]", and "relationships" contains what
+	every neighbor is to this AS (PROVIDER, PEER or CUSTOMER), in the same
+	order. Every link is thus stored twice, once for each of its ASes.
+
+	:param asns: the ASN of every AS, by index
+	:param indptr: where the neighbors of every AS start, by index, followed
+		by the total number of neighbors
+	:param neighbors: the indices of the neighbors of all ASes
+	:param relationships: the relationship to every neighbor
+
+	:type asns: np.ndarray
+	:type indptr: np.ndarray
+	:type neighbors: np.ndarray
+	:type relationships: np.ndarray
+	"""
+
+
+	def __init__(self, asns, indptr, neighbors, relationships):
+		self.asns = asns
+		self.indptr = indptr
+		self.neighbors = neighbors
+		self.relationships = relationships
+
+
+	@property
+	def nr_ASes(self):
+		return len(self.asns)
+
+
+	@property
+	def nr_links(self):
+		return len(self.neighbors) // 2
+
+
+	@staticmethod
+	def from_links(first, second, link_types):
+		"""
+		Builds the adjacency from a list of links, in which duplicate links
+		(in either direction) only count once, with the type of their first
+		occurrence.
+
+		:param first: the ASN of the first AS of every link
+		:param second: the ASN of the second AS of every link
+		:param link_types: the type of every link, -1 if the first AS is a
+			provider of the second one, 0 if they are peers
+
+		:type first: np.ndarray
+		:type second: np.ndarray
+		:type link_types: np.ndarray
+
+		:returns: the adjacency
+		:rtype: ASRelationships
+		"""
+		asns, indices = np.unique(np.concatenate([first, second]), return_inverse=True)
+		first, second = indices[:len(first)], indices[len(first):]
+
+		# drop self loops and duplicates, keeping the first occurrence
+		keys = np.minimum(first, second) * len(asns) + np.maximum(first, second)
+		_, kept = np.unique(keys, return_index=True)
+		kept = np.sort(kept[first[kept] != second[kept]])
+		first, second, link_types = first[kept], second[kept], link_types[kept]
+
+		# store every link for both of its ASes; for the first AS of a transit
+		# link, the second one is a customer, and vice versa
+		sources = np.concatenate([first, second])
+		targets = np.concatenate([second, first])
+		relationships = np.concatenate([
+			np.where(link_types == -1, CUSTOMER, PEER),
+			np.where(link_types == -1, PROVIDER, PEER)
+		]).astype(np.int8)
+
+		order = np.argsort(sources, kind="stable")
+		indptr = np.zeros(len(asns) + 1, dtype=np.int64)
+		np.cumsum(np.bincount(sources, minlength=len(asns)), out=indptr[1:])
+		return ASRelationships(asns, indptr, targets[order].astype(np.int64), relationships[order])
+
+
+	def as_types(self):
+		"""
+		Derives the type of every AS, as used by "nx.random_internet_as_graph"
+		and "graph_generation": ASes without providers are tier-1 ASes ("T"),
+		ASes without customers are content providers ("CP"), if they have
+		peers, but no providers, and customers ("C") otherwise, and all other
+		ASes are mid-level ASes ("M").
+
+		:returns: the type of every AS, by index
+		:rtype: list[str]
+		"""
+		owners = np.repeat(np.arange(self.nr_ASes), np.diff(self.indptr))
+		counts = {
+			relationship: np.bincount(owners[self.relationships == relationship], minlength=self.nr_ASes)
+			for relationship in [PROVIDER, PEER, CUSTOMER]
+		}
+
+		as_types = []
+		for nr_providers, nr_peers, nr_customers in zip(*(counts[relationship].tolist() for relationship in [PROVIDER, PEER, CUSTOMER])):
+			if nr_customers == 0:
+				as_types.append("CP" if nr_providers == 0 and nr_peers > 0 else "C")
+			elif nr_providers == 0:
+				as_types.append("T")
+			else:
+				as_types.append("M")
+		return as_types
+
+
+	def largest_component(self):
+		"""
+		:returns: the indices of the ASes of the largest connected component,
+			in increasing order
+		:rtype: np.ndarray
+		"""
+		indptr = self.indptr.tolist()
+		neighbors = self.neighbors.tolist()
+		component = [-1]*self.nr_ASes
+		sizes = []
+		for start in range(self.nr_ASes):
+			if component[start] != -1:
+				continue
+			component[start] = len(sizes)
+			size = 1
+			Q = deque([start])
+			while Q:
+				current = Q.popleft()
+				for neighbor in neighbors[indptr[current]:indptr[current + 1]]:
+					if component[neighbor] == -1:
+						component[neighbor] = len(sizes)
+						size += 1
+						Q.append(neighbor)
+			sizes.append(size)
+
+		if not sizes:
+			return np.zeros(0, dtype=np.int64)
+		return np.flatnonzero(np.array(component) == int(np.argmax(sizes)))
+
+
+	def to_networkx(self, nodes=None):
+		"""
+		Creates the undirected graph of the given ASes, in the form of
+		"nx.random_internet_as_graph": the ASes are numbered 0, ..., n-1 in
+		the given order, and have a "type" (see "as_types") and their "asn";
+		the links have a "type" ("transit" or "peer") and, for transit links,
+		the "customer" (as a string, "none" for peer links).
+
+		:param nodes: the indices of the ASes, all ASes if not given; links to
+			other ASes are left out
+		:type nodes: np.ndarray
+
+		:returns: the graph
+		:rtype: nx.classes.graph.Graph
+		"""
+		nodes = np.arange(self.nr_ASes) if nodes is None else np.asarray(nodes)
+		labels = np.full(self.nr_ASes, -1, dtype=np.int64)
+		labels[nodes] = np.arange(len(nodes))
+		as_types = self.as_types()
+
+		graph = nx.Graph()
+		graph.add_nodes_from(
+			(label, {"type": as_types[node], "asn": asn})
+			for label, (node, asn) in enumerate(zip(nodes.tolist(), self.asns[nodes].tolist()))
+		)
+
+		# every link once, from the AS with the lower index
+		owners = np.repeat(np.arange(self.nr_ASes), np.diff(self.indptr))
+		once = (owners < self.neighbors) & (labels[owners] >= 0) & (labels[self.neighbors] >= 0)
+		for u, v, relationship in zip(labels[owners[once]].tolist(), labels[self.neighbors[once]].tolist(), self.relationships[once].tolist()):
+			if relationship == PEER:
+				graph.add_edge(u, v, type="peer", customer="none")
+			else:
+				graph.add_edge(u, v, type="transit", customer=str(v if relationship == CUSTOMER else u))
+		return graph
+
+
+def read_as_relationships(path, chunk_size=1 << 16):
+	"""
+	Reads an AS-relationship file in chunks of lines, each parsed at once
+	into arrays of the links, from which the adjacency is built. Only one
+	chunk of lines is in memory at a time, so full-size files (around 75k
+	ASes and 500k links) are read in seconds, and the memory used is bounded
+	by the arrays of the links.
+
+	:param path: the path of the file, which may be compressed (see
+		"open_text")
+	:param chunk_size: the number of lines parsed at once
+
+	:type path: str
+	:type chunk_size: int
+
+	:returns: the adjacency
+	:rtype: ASRelationships
+	"""
+	chunks = []
+	with open_text(path) as file:
+		while True:
+			lines = list(itertools.islice(file, chunk_size))
+			if not lines:
+				break
+			try:
+				links = np.loadtxt(lines, delimiter="|", usecols=(0, 1, 2), dtype=np.int64, comments="#", ndmin=2)
+			except ValueError as error:
+				raise Exception(f"\"{path}\" contains a line that is not an AS relationship: {error}!")
+			chunks.append(links)
+
+	links = np.concatenate(chunks) if chunks else np.zeros((0, 3), dtype=np.int64)
+	if not np.isin(links[:, 2], [-1, 0]).all():
+		raise Exception(f"\"{path}\" contains relationships other than -1 and 0!")
+	return ASRelationships.from_links(links[:, 0], links[:, 1], links[:, 2])
+
+
+def load_directed_AS_graph(path, nr_allies, full_attack_vol):
+	"""
+	Creates the topology of a simulation from an AS-relationship file, like
+	"graph_generation.generate_directed_AS_graph" does from a random one: its
+	largest connected component is directed towards a victim, selected among
+	its customers and content providers. The random number generators have to
+	be seeded beforehand.
+
+	:param path: the path of the file
+	:param nr_allies: number of allies willing to help scrubbing DDoS traffic
+	:param full_attack_vol: the attack volume of the DDoS attack in Mbps
+
+	:type path: str
+	:type nr_allies: int
+	:type full_attack_vol: float
+
+	:returns: the graph, whose nodes keep their "asn", the victim node, the
+		adversary node and the ally nodes
+	:rtype: tuple
+	"""
+	relationships = read_as_relationships(path)
+	graph = relationships.to_networkx(relationships.largest_component())
+	return direct_AS_graph(graph, nr_allies, full_attack_vol)
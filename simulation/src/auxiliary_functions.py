@@ -8,9 +8,14 @@ Author:
 
 
 import pickle
-from pyvis.network import Network
-import networkx as nx
 import logging
+import logging.handlers
+import queue
+import threading
+import multiprocessing
+import gzip
+import zlib
+from pathlib import Path
 
 ''' Currently not used
 def save_as_pickle(object_to_pickle, path_to_pickle, verbose=False):
@@ -69,6 +74,7 @@ def gen_pyvis_network(Graph):
 	:return: the PyVis Network
 	:rtype: pyvis.network.Network
 	"""
+	from pyvis.network import Network
 
 	net = Network(notebook=True, directed=True, height='1000px',
 				  width="100%")
@@ -155,11 +161,253 @@ def create_logger(name, log_file_location, level=logging.DEBUG):
 	"""
 	formatter = logging.Formatter("%(name)s ==> %(levelname)s: %(message)s")
 
-	handler = logging.FileHandler(log_file_location)
+	# the file is only opened once the first message is written, so no
+	# files are created if the level filters out all messages
+	handler = logging.FileHandler(log_file_location, delay=True)
 	handler.setFormatter(formatter)
 
 	logger = logging.getLogger(name)
 	logger.setLevel(level)
+	remove_handlers(logger)
 	logger.addHandler(handler)
 
 	return logger
+
+
+def remove_handlers(logger):
+	"""
+	Removes and closes all handlers of a logger, such that loggers that are
+	created again (e.g., for several simulations in one process) do not
+	write every message multiple times.
+
+	:param logger: the logger
+	:type logger: logging.Logger
+	"""
+	for handler in list(logger.handlers):
+		logger.removeHandler(handler)
+		handler.close()
+
+
+class TagFilter(logging.Filter):
+	"""
+	Attaches the tag of a logger of a "BatchedLogSink" to all of its records,
+	such that the writer thread finds it also for records of loggers created
+	in forked processes, which it does not know about.
+
+	:param tag: the tag
+	:type tag: str
+	"""
+
+
+	def __init__(self, tag):
+		super().__init__()
+		self.tag = tag
+
+
+	def filter(self, record):
+		record.tag = self.tag
+		return True
+
+
+class BatchedLogSink(object):
+	"""
+	A single sink for the log messages of all loggers of a simulation.
+
+	Instead of one file per logger, the messages of all loggers are put into
+	a queue, from which a background thread takes them in batches and writes
+	them to a few large, buffered and optionally gzip compressed files
+	("log_sink_<i>_of_<nr_files>.txt[.gz]", only created once something is
+	written to them). Every line is prefixed by the tag of its
+	logger, i.e., the name of the log file it would have been written to
+	otherwise (e.g., "log_node_12" for AS 12), and all messages of one tag
+	end up in the same file, so that the view of a single logger can be
+	extracted again using "extract_log".
+
+	If the loggers are also used by processes forked from the one that
+	created the sink (see "pdes.py"), their messages are passed through a
+	process-safe queue, and are written by the same thread.
+
+	:param log_path: the directory to write the log files to
+	:param nr_files: the number of files to distribute the messages over
+	:param compress: whether to gzip the files
+	:param batch_size: maximum number of messages written at once
+	:param multiprocess: whether the loggers are used by forked processes
+	:param queue: the queue between the loggers and the writer thread
+	:param loggers: the loggers created by this sink in this process
+
+	:type log_path: str
+	:type nr_files: int
+	:type compress: bool
+	:type batch_size: int
+	:type multiprocess: bool
+	:type queue: queue.SimpleQueue | multiprocessing.Queue
+	:type loggers: set[logging.Logger]
+	"""
+
+	__buffer_size__ = 1 << 20
+
+
+	def __init__(self, log_path, nr_files=4, compress=False, batch_size=4096,
+				 multiprocess=False):
+		self.log_path = log_path
+		self.nr_files = nr_files
+		self.compress = compress
+		self.batch_size = batch_size
+		self.queue = multiprocessing.get_context("fork").Queue() if multiprocess else queue.SimpleQueue()
+		self.handler = logging.handlers.QueueHandler(self.queue)
+		self.loggers = set()
+
+		self.files = [None] * nr_files
+		self.writer = threading.Thread(target=self._write, daemon=True)
+		self.writer.start()
+
+
+	@staticmethod
+	def file_path(log_path, indx, nr_files, compress):
+		"""
+		Returns the path of one of the files a sink writes to.
+
+		:param log_path: the directory of the log files
+		:param indx: the index of the file
+		:param nr_files: the number of files
+		:param compress: whether the files are gzipped
+
+		:type log_path: str
+		:type indx: int
+		:type nr_files: int
+		:type compress: bool
+
+		:returns: the path
+		:rtype: str
+		"""
+		return f"{log_path}/log_sink_{indx}_of_{nr_files}.txt{'.gz' if compress else ''}"
+
+
+	@staticmethod
+	def file_index(tag, nr_files):
+		"""
+		Returns the index of the file all messages of a tag are written to.
+
+		:param tag: the tag
+		:param nr_files: the number of files
+
+		:type tag: str
+		:type nr_files: int
+
+		:returns: the file index
+		:rtype: int
+		"""
+		return zlib.crc32(tag.encode()) % nr_files
+
+
+	def create_logger(self, name, log_file_location, level=logging.DEBUG):
+		"""
+		Initializes a logger, that writes into this sink; has the same
+		signature as "create_logger".
+
+		:param name: the name represnting this logger, appearing in the logs
+		:param log_file_location: where the log would be saved, its name
+			(without suffix) is used as tag, attached to every record (see
+			"TagFilter")
+		:param level: logging level
+
+		:type name: str
+		:type log_file_location: str
+		:type level: str
+
+		:returns: the logger instances
+		:rtype: logging.RootLogger
+		"""
+		logger = logging.getLogger(name)
+		logger.setLevel(level)
+		remove_handlers(logger)
+		for tag_filter in [f for f in logger.filters if isinstance(f, TagFilter)]:
+			logger.removeFilter(tag_filter)
+		logger.addFilter(TagFilter(Path(log_file_location).stem))
+		logger.addHandler(self.handler)
+		self.loggers.add(logger)
+
+		return logger
+
+
+	def _write(self):
+		"""
+		The loop of the writer thread: waits for messages, and then writes
+		all messages that are available (up to "batch_size") at once. Stops
+		once it takes None from the queue.
+		"""
+		running = True
+		while running:
+			batch = [self.queue.get()]
+			while len(batch) < self.batch_size:
+				try:
+					batch.append(self.queue.get_nowait())
+				except queue.Empty:
+					break
+
+			lines = [[] for _ in self.files]
+			for record in batch:
+				if record is None:
+					running = False
+					continue
+				tag = getattr(record, "tag", record.name)
+				message = f"{record.name} ==> {record.levelname}: {record.getMessage()}"
+				lines[self.file_index(tag, self.nr_files)].extend(
+					f"{tag}\t{line}\n" for line in message.split("\n")
+				)
+			for indx, file_lines in enumerate(lines):
+				if file_lines:
+					if self.files[indx] is None:
+						path = self.file_path(self.log_path, indx, self.nr_files, self.compress)
+						self.files[indx] = gzip.open(path, "wt") if self.compress else open(path, "w", buffering=self.__buffer_size__)
+					self.files[indx].write("".join(file_lines))
+
+
+	def close(self):
+		"""
+		Writes all remaining messages, stops the writer thread and closes the
+		files. The loggers created by this sink are detached from it, such
+		that messages logged afterwards do not pile up in its queue.
+		"""
+		for logger in self.loggers:
+			logger.removeHandler(self.handler)
+		self.queue.put(None)
+		self.writer.join()
+		for file in self.files:
+			if file is not None:
+				file.close()
+
+
+def extract_log(log_path, tag, output_path=None):
+	"""
+	Extracts the messages of a single logger (e.g., "log_node_12" for AS 12)
+	from the files written by a "BatchedLogSink".
+
+	:param log_path: the directory of the log files
+	:param tag: the tag of the logger
+	:param output_path: if given, the messages are also written to this file
+
+	:type log_path: str
+	:type tag: str
+	:type output_path: str
+
+	:returns: the lines logged by the logger
+	:rtype: list[str]
+	"""
+	lines = []
+	paths = list(Path(log_path).glob("log_sink_*_of_*.txt*"))
+	if paths:
+		nr_files = int(paths[0].name.split("_")[4].split(".")[0])
+		compress = paths[0].suffix == ".gz"
+		path = Path(BatchedLogSink.file_path(log_path, BatchedLogSink.file_index(tag, nr_files), nr_files, compress))
+
+		prefix = f"{tag}\t"
+		if path.exists():
+			with (gzip.open(path, "rt") if compress else open(path)) as file:
+				lines = [line[len(prefix):] for line in file if line.startswith(prefix)]
+
+	if output_path is not None:
+		with open(output_path, "w") as file:
+			file.writelines(lines)
+
+	return lines
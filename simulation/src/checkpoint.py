@@ -0,0 +1,89 @@
+"""
+Contains the functions to save the full state of a running simulation into a
+checkpoint file, and to restore it, such that several simulations can continue
+from the same point (e.g., after the warm-up before the attack and the
+convergence of the help and support RATs), with different parameters.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import gzip
+import pickle
+import random
+import numpy as np
+
+
+# increased whenever the content of a checkpoint changes
+CHECKPOINT_VERSION = 8
+
+
+def save_checkpoint(path, net):
+	"""
+	Saves the state of a running simulation as a gzip compressed pickle: the
+	network with all ASes (including their routing tables and the attack
+	volume approximation of the victim), the scheduler with all pending
+	timers (and thereby all packets on their way), and the states of the
+	random number generators. Loggers and the event trace are not saved, see
+	"Internet.redirect_output".
+
+	:param path: the path of the checkpoint file
+	:param net: the network
+
+	:type path: str
+	:type net: network.Internet
+	"""
+	checkpoint = {
+		"version": CHECKPOINT_VERSION,
+		"random_state": random.getstate(),
+		"numpy_random_state": np.random.get_state(),
+		"net": net
+	}
+	with gzip.open(path, "wb", compresslevel=6) as file:
+		pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_checkpoint(path):
+	"""
+	Restores a simulation saved by "save_checkpoint", and the states of the
+	random number generators, such that the simulation continues exactly as
+	it would have without the checkpoint.
+
+	:param path: the path of the checkpoint file
+	:type path: str
+
+	:returns: the network, with its scheduler
+	:rtype: network.Internet
+	"""
+	with gzip.open(path, "rb") as file:
+		checkpoint = pickle.load(file)
+	if checkpoint["version"] != CHECKPOINT_VERSION:
+		raise Exception(f"The checkpoint \"{path}\" was saved by another version of the simulation!")
+
+	random.setstate(checkpoint["random_state"])
+	np.random.set_state(checkpoint["numpy_random_state"])
+	return checkpoint["net"]
+
+
+def change_parameters(net, args):
+	"""
+	Applies the parameters that can change while a simulation runs to a
+	restored network; the topology and everything else stay the ones of the
+	checkpoint.
+
+	:param net: the restored network
+	:param args: the configuration of the continued simulation, see
+		"simulation_main.create_parser"
+
+	:type net: network.Internet
+	:type args: argparse.Namespace
+	"""
+	if net.fluid_flow is not None and (args.propagation_delay != net.propagation_delay or args.attack_frequency != net.source.attack_freq):
+		raise Exception("The propagation delay and attack frequency of a fluid simulation can not be changed!")
+	if args.simulation_length < net.env.now:
+		raise Exception(f"The checkpoint is already at step {net.env.now}!")
+
+	net.propagation_delay = args.propagation_delay
+	net.rat_ttl = args.rat_ttl
+	net.source.attack_freq = args.attack_frequency
+	net.source.full_attack_vol = args.full_attack_volume
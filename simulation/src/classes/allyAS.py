@@ -7,6 +7,8 @@ Author:
 
 
 from .autonomous_system import AutonomousSystem
+from .packet import Packet
+from .kpis import LoadKPIs
 
 
 class AllyAS(AutonomousSystem):
@@ -16,9 +18,12 @@ class AllyAS(AutonomousSystem):
 
 	:param scrubbing_capability: the scrubbing capability of this ally
 	:param as_path_to_victim: the as path from this victim to the ally
+	:param load_kpis: the indicators of the attack traffic this ally
+		receives
 
 	:type scrubbing_capability: float
 	:type as_path_to_victim: list[int]
+	:type load_kpis: kpis.LoadKPIs
 	"""
 
 	__doc__ += AutonomousSystem.__doc__
@@ -32,29 +37,42 @@ class AllyAS(AutonomousSystem):
 		# the path to the victim
 		self.as_path_to_victim = args[-1]["as_path_to_victim"]
 
+		self.load_kpis = LoadKPIs(self.scrubbing_capability)
+
+	def attack_reaction(self, pkt):
+		"""
+		This method implements the response to receiving an attack packet,
+		which is recorded, and counted in the load indicators of this ally.
+
+		:param pkt: the incoming packets
+
+		:type pkt: packet.Packet
+		"""
+		super().attack_reaction(pkt)
+		self.load_kpis.record(self.env.now, pkt.attack_volume)
+
 	def send_support(self, victim):
 
-		self.logger.info(f"[{self.env.now}] Sending Support.")
+		self.logger.info("[%s] Sending Support.", self.env.now)
 
 		# add the address of the victim node to the set of addresses this AS is ready to
 		# accept packets for
 		self.advertised_asns.append(victim)
 
 		# send out the support message
-		pkt = {"identifier": f"support_from_{self.asn}_{float(self.env.now):6.2}",
-			   "type": "RAT",
-			   "src": self.asn,
-			   "dst": None,
-			   "last_hop": self.asn,
-			   "content": {"relay_type": "original_next_hop", 
-						   "scrubbing_capability": self.scrubbing_capability, 
-						   "protocol": "support", 
-						   "ally": self.asn, 
-						   "victim": victim, 
-						   "as_path_to_victim": self.as_path_to_victim, 
-						   "hc": 0
-				}
-		}
+		pkt = Packet(f"support_from_{self.asn}_{float(self.env.now):6.2}",
+					 "RAT",
+					 self.asn,
+					 None,
+					 self.asn,
+					 {"relay_type": "original_next_hop", 
+					  "scrubbing_capability": self.scrubbing_capability, 
+					  "protocol": "support", 
+					  "ally": self.asn, 
+					  "victim": victim, 
+					  "as_path_to_victim": tuple(self.as_path_to_victim)
+					 }
+		)
 		self.send_packet(pkt, self.router_table.determine_highest_original())
 
 
@@ -66,17 +84,17 @@ class AllyAS(AutonomousSystem):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
 
-		if not pkt["src"] in self.helping_nodes:
-			self.helping_nodes.append(pkt["src"])
+		if not pkt.src in self.helping_nodes:
+			self.helping_nodes.append(pkt.src)
 
 			# firstly denote the current amount of attack volume on the victim
-			self.router_table.update_victim_info(pkt["content"]["scrubbing_capability"], pkt["content"]["attack_volume"])
-			self.logger.info(f"[{self.env.now}] Help registered.")
-			self.attack_vol_on_victim = pkt["content"]["attack_volume"]
-			self.send_support(pkt["src"])
+			self.router_table.update_victim_info(pkt.content["scrubbing_capability"], pkt.attack_volume)
+			self.logger.info("[%s] Help registered.", self.env.now)
+			self.attack_vol_on_victim = pkt.attack_volume
+			self.send_support(pkt.src)
 
 	def __str__(self):
 		return f"AS-{self.asn} (Ally) [{self.scrubbing_capability}]"
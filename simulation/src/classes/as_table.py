@@ -0,0 +1,201 @@
+"""
+Contains the ASTable class.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+from array import array
+
+
+# the number of characters of the random identifier of an initial route
+IDENTIFIER_LENGTH = 4
+
+
+class ASTable(object):
+	"""
+	This class holds the autonomous systems of a network, of which only the
+	ones that are needed are created as objects ("materialized"), i.e., once
+	a packet first reaches them. Until then, an AS is just a row of shared
+	arrays: its neighbors, and its initial routes towards the victim, whose
+	random identifiers and selected route are drawn when the row is added, in
+	the same order as if the AS was created right away. Most ASes of a large
+	network never carry attack traffic or change a route, so setting up a
+	network takes time and memory in the number of ASes that are reached,
+	instead of all ASes.
+
+	The table can be used like the list of ASes it replaces: indexing and
+	iterating materialize the ASes, while "materialized" only returns the
+	existing ones, and "next_hops" answers for the other ones from their
+	rows.
+
+	:param network: the network the ASes belong to, which creates their
+		objects (see "Internet.create_AS")
+	:param destination: the ASN all initial routes lead to, i.e., the victim
+	:param indptr: where the neighbors of every AS start in "neighbors",
+		followed by the total number of neighbors
+	:param neighbors: the ASNs of the neighbors of all ASes, first the ones
+		pointing towards the AS, then the ones the AS points to
+	:param nr_incoming: the number of neighbors pointing towards every AS
+	:param identifiers: the identifiers of the initial routes, in
+		"IDENTIFIER_LENGTH" ASCII characters at the position of the neighbor
+		every route leads to; the positions of the other neighbors are unused
+	:param selected_routes: the index of the initial route every AS selected,
+		i.e., gave priority 2, -1 if it has no routes
+	:param objects: the materialized ASes, by ASN
+
+	:type network: network.Internet
+	:type destination: int
+	:type indptr: array.array
+	:type neighbors: array.array
+	:type nr_incoming: array.array
+	:type identifiers: bytearray
+	:type selected_routes: array.array
+	:type objects: dict[int, autonomous_system.AutonomousSystem]
+	"""
+
+
+	def __init__(self, network, destination):
+		self.network = network
+		self.destination = destination
+		self.indptr = array("q", [0])
+		self.neighbors = array("q")
+		self.nr_incoming = array("q")
+		self.identifiers = bytearray()
+		self.selected_routes = array("q")
+		self.objects = {}
+
+
+	def __len__(self):
+		return len(self.nr_incoming)
+
+
+	def __getitem__(self, asn):
+		AS = self.objects.get(asn)
+		if AS is None:
+			if not 0 <= asn < len(self):
+				raise IndexError(f"There is no AS {asn}!")
+			AS = self.objects[asn] = self.network.create_AS(asn)
+		return AS
+
+
+	def __iter__(self):
+		return (self[asn] for asn in range(len(self)))
+
+
+	def __eq__(self, other):
+		return list(self) == list(other)
+
+
+	def append(self, incoming, outgoing, identifiers, selected_route):
+		"""
+		Adds the row of the next AS.
+
+		:param incoming: the neighbors pointing towards the AS
+		:param outgoing: the neighbors the AS points to, i.e., the next hops
+			of its initial routes
+		:param identifiers: the identifiers of the initial routes, joined
+		:param selected_route: the index of the selected initial route, -1 if
+			there are none
+
+		:type incoming: list[int]
+		:type outgoing: list[int]
+		:type identifiers: str
+		:type selected_route: int
+		"""
+		self.neighbors.extend(incoming)
+		self.neighbors.extend(outgoing)
+		self.indptr.append(len(self.neighbors))
+		self.nr_incoming.append(len(incoming))
+		self.identifiers.extend(b"\0" * (IDENTIFIER_LENGTH * len(incoming)))
+		self.identifiers.extend(identifiers.encode("ascii"))
+		self.selected_routes.append(selected_route)
+
+
+	def add(self, AS):
+		"""
+		Adds an AS that was materialized right away.
+
+		:param AS: the AS, whose row was already added
+		:type AS: autonomous_system.AutonomousSystem
+		"""
+		self.objects[AS.asn] = AS
+
+
+	def is_materialized(self, asn):
+		"""
+		:param asn: the ASN of an AS
+		:type asn: int
+
+		:returns: whether the AS was created as an object
+		:rtype: bool
+		"""
+		return asn in self.objects
+
+
+	def materialized(self):
+		"""
+		:returns: the ASes created as objects so far, by ASN
+		:rtype: list[autonomous_system.AutonomousSystem]
+		"""
+		return [self.objects[asn] for asn in sorted(self.objects)]
+
+
+	def ebgp_AS_peers(self, asn):
+		"""
+		:param asn: the ASN of an AS
+		:type asn: int
+
+		:returns: the neighbors of the AS, first the ones pointing towards it
+		:rtype: list[int]
+		"""
+		return self.neighbors[self.indptr[asn]:self.indptr[asn + 1]].tolist()
+
+
+	def initial_routes(self, asn):
+		"""
+		:param asn: the ASN of an AS
+		:type asn: int
+
+		:returns: the initial routing table entries of the AS, one towards
+			the destination over every neighbor it points to
+		:rtype: list[dict]
+		"""
+		start = self.indptr[asn] + self.nr_incoming[asn]
+		return [{
+			"identifier": self.identifiers[IDENTIFIER_LENGTH * position:IDENTIFIER_LENGTH * (position + 1)].decode("ascii"),
+			"next_hop": self.neighbors[position],
+			"destination": self.destination,
+			"priority": 2 if position - start == self.selected_routes[asn] else 1,
+			"split_percentage": 0,
+			"scrubbing_capabilities": 0,
+			"as_path": [],
+			"origin": "original",
+			"recvd_from": asn,
+			"time_added": 0
+		} for position in range(start, self.indptr[asn + 1])]
+
+
+	def next_hops(self, asn):
+		"""
+		Returns the next hops of the traffic towards the destination, like
+		"RoutingTable.determine_next_hops" does: from the routing table of the
+		AS if it is materialized, and from its initial routes otherwise,
+		without materializing it.
+
+		:param asn: the ASN of an AS
+		:type asn: int
+
+		:returns: the next hops, by increasing ASN, with their percentages
+		:rtype: list[tuple[int, float]]
+		"""
+		AS = self.objects.get(asn)
+		if AS is not None:
+			return AS.router_table.determine_next_hops(self.destination)
+
+		start = self.indptr[asn] + self.nr_incoming[asn]
+		selected = self.neighbors[start + self.selected_routes[asn]] if self.selected_routes[asn] >= 0 else None
+		return [
+			(next_hop, 1.0 if next_hop == selected else 0.0)
+			for next_hop in sorted(self.neighbors[start:self.indptr[asn + 1]])
+		]
@@ -5,8 +5,8 @@ Author:
 	Devrim Celik 08.06.2022
 """
 
-
-import copy
+import logging
+from collections import Counter, deque
 
 
 class AutonomousSystem(object):
@@ -14,7 +14,7 @@ class AutonomousSystem(object):
 	This class is the representing a standard autonomous system in our
 	simulations.
 
-	:param env: the simpy environment this AS will be running in
+	:param env: the scheduler this AS will be running on
 	:param network: the network this AS is integrated in
 	:param asn: a value representing its autonomous systen number, basically
 		an identifer
@@ -22,8 +22,13 @@ class AutonomousSystem(object):
 		a routing table
 	:param ebgp_AS_peers: a list of all the ASes it is connected
 		through EBGP sessions
-	:param seen_rats: a list of all seen route advertisements, in order to
-		recognize novel ones
+	:param seen_rats: the identifiers of all route advertisements seen within
+		the last "network.rat_ttl" steps, in order to recognize novel ones
+	:param seen_rats_expiry: the identifiers of "seen_rats" together with the
+		time they were seen, oldest first, used to evict them again
+	:param forwarded_rats: number of sent RAT messages, by protocol
+	:param suppressed_rats: number of RAT messages that were not broadcasted,
+		since the RAT was already seen, by protocol
 	:param advertised_asns: the list of ASNs (in real life it would IP blocks) this
 		 AS is advertising routes for and ready to receive packets for
 	:param received_attacks: to collected data on received attacks
@@ -32,14 +37,17 @@ class AutonomousSystem(object):
 		denote the ASN of the predecessor
 	:param helping_node: collects all nodes that this list is helping
 
-	:type env: simpy.Environment
+	:type env: scheduler.SimpyScheduler | scheduler.HeapScheduler
 	:type network: network.Internet
 	:type asn: int
 	:type router_table: router_table.RouterTable
 	:type ebgp_AS_peers: list[int]
-	:type seen_rats: list[str]
+	:type seen_rats: set[str]
+	:type seen_rats_expiry: collections.deque[tuple[float, str]]
+	:type forwarded_rats: collections.Counter
+	:type suppressed_rats: collections.Counter
 	:type advertised_asns: list[int]
-	:type received_attacks: list[tuple]
+	:type received_attacks: recorder.Recorder
 	:type on_attack_path: bool
 	:type attack_path_predecessor: int
 	:type helping_node: list
@@ -55,9 +63,12 @@ class AutonomousSystem(object):
 		self.asn = asn
 		self.router_table = router_table
 		self.ebgp_AS_peers = ebgp_AS_peers
-		self.seen_rats = []
+		self.seen_rats = set()
+		self.seen_rats_expiry = deque()
+		self.forwarded_rats = Counter()
+		self.suppressed_rats = Counter()
 		self.advertised_asns = [self.asn]
-		self.received_attacks = []
+		self.received_attacks = network.create_recorder(f"AS{asn}_received_attacks")
 		self.on_attack_path = False
 		self.attack_path_predecessors = []
 		self.helping_nodes = []
@@ -81,38 +92,64 @@ class AutonomousSystem(object):
 			transmitted to (RAT)/a list of destination with probabilites this
 			 packet is going to be distributed to (STD)
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		:type next_hops: list[int] for RAT packets
 			/ list[tuple[int, float]] for standard packets
 		"""
 		if next_hops == []:
 			return
 
-		self.logger.debug(f"""[{self.env.now}] Sending Packet with Next Hops {next_hops}:
-			=====================================================================
-			Identifier: 	{pkt['identifier']}
-			Type: 			{pkt['type']}
-			Source: 		{pkt['src']}
-			Destination:	{pkt['dst']}
-			Content:		{"".join([f'{self.new_line}{self.tab*4}{key} = {value}' for key, value in pkt['content'].items()])}
-			=====================================================================
-		""")
+		self.log_packet(pkt, "Sending Packet with Next Hops %s", next_hops)
+		if self.network.event_trace is not None:
+			self.network.event_trace.record(self.env.now, "send", pkt, self.asn)
 
 		# call the corresponding send function
-		if pkt["type"] == "STD":
+		if pkt.type == "STD":
 			# check that all targets are connected to this AS
-			if set([t[0] for t in next_hops]).issubset(set(self.ebgp_AS_peers)):
-				self.env.process(self.network.relay_std_packet(pkt, next_hops))
-			else:
+			if not set([t[0] for t in next_hops]).issubset(set(self.ebgp_AS_peers)):
 				raise Exception("Trying to send to an AS, that is not a peer!")
-		elif pkt["type"] == "RAT":
+			elif self.network.fluid_flow is not None:
+				self.network.fluid_flow.inject(pkt, next_hops)
+			else:
+				self.network.relay_std_packet(pkt, next_hops)
+		elif pkt.type == "RAT":
 			# check that all targets are connected to this AS
 			if set(next_hops).issubset(set(self.ebgp_AS_peers)):
-				self.env.process(self.network.relay_rat(pkt, next_hops))
+				self.forwarded_rats[pkt.content["protocol"]] += len(next_hops)
+				self.network.relay_rat(pkt, next_hops)
 			else:
 				raise Exception("Trying to send to an AS, that is not a peer!")
 
 
+	def log_packet(self, pkt, heading, *args):
+		"""
+		Logs a packet with all its fields on the debug level. Nothing is
+		formatted, unless debug logs are enabled.
+
+		:param pkt: the packet
+		:param heading: the first line of the log message, a %-format string
+		:param args: the arguments for the heading
+
+		:type pkt: packet.Packet
+		:type heading: str
+		:type args: tuple
+		"""
+		if not self.logger.isEnabledFor(logging.DEBUG):
+			return
+
+		self.logger.debug(f"""[{self.env.now}] {heading % args}:
+			=====================================================================
+			Identifier: 	{pkt.identifier}
+			Type: 			{pkt.type}
+			Source: 		{pkt.src}
+			Destination:	{pkt.dst}
+			Hop Count:		{pkt.hc}
+			Attack Volume:	{pkt.attack_volume}
+			Content:		{"".join([f'{self.new_line}{self.tab*4}{key} = {value}' for key, value in pkt.content.items()])}
+			=====================================================================
+		""")
+
+
 	def process_pkt(self, pkt): 
 		"""
 		This method is responsible for handling incoming packets. Generally, we
@@ -131,66 +168,78 @@ class AutonomousSystem(object):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
-		self.logger.debug(f"""[{self.env.now}] Received Packet from {pkt['last_hop']}:
-			=====================================================================
-			Identifier: 	{pkt['identifier']}
-			Type: 			{pkt['type']}
-			Source: 		{pkt['src']}
-			Destination:	{pkt['dst']}
-			Content:		{"".join([f'{self.new_line}{self.tab*4}{key} = {value}' for key, value in pkt['content'].items()])}
-			=====================================================================
-		""")
+		self.log_packet(pkt, "Received Packet from %s", pkt.last_hop)
+		if self.network.event_trace is not None:
+			self.network.event_trace.record(self.env.now, "receive", pkt, self.asn)
 
 		# for standard packets
-		if pkt["type"] == "STD":
+		if pkt.type == "STD":
 			self.process_std_pkt(pkt)
 
 		# for RAT packets
-		elif pkt["type"] == "RAT":
+		elif pkt.type == "RAT":
 
 			# react to it, if this packet has not already been seen
-			if not pkt["identifier"] in self.seen_rats:
-				self.seen_rats.append(pkt["identifier"])
+			self.evict_seen_rats()
+			already_seen = pkt.identifier in self.seen_rats
+			if not already_seen:
+				self.seen_rats.add(pkt.identifier)
+				self.seen_rats_expiry.append((self.env.now, pkt.identifier))
 
 				# call the corresponding reaction
-				if pkt["content"]["protocol"] == "help":
+				if pkt.content["protocol"] == "help":
 					self.rat_reaction_help(pkt)
-				elif pkt["content"]["protocol"] == "help_retractment":
+				elif pkt.content["protocol"] == "help_retractment":
 					self.rat_reaction_help_retractment(pkt)
-				elif pkt["content"]["protocol"] == "support":
+				elif pkt.content["protocol"] == "support":
 					self.rat_reaction_support(pkt)
 
 
-			# distributed as specified by the protocol
-			pkt_tmp = copy.deepcopy(pkt)
-			pkt_tmp["last_hop"] = self.asn
+			# distributed as specified by the protocol; the content is
+			# shared, only the per-hop fields are copied
+			pkt_tmp = pkt.copy(last_hop=self.asn)
 
 			# íf the RAT is a support message, determine whether this AS will
 			# responsible for splitting traffic towards the ally
 			# if yes, add the time at which it is processed to the pkt
-			if (pkt["content"]["protocol"] == "support" and 
+			if (pkt.content["protocol"] == "support" and 
 				self.router_table.splitting_node and 
-				f"ally_{pkt['content']['ally']}" in self.router_table.table[self.router_table.table["split_percentage"] > 0]["origin"].values
+				self.router_table.is_splitting_towards(pkt.content["ally"])
 				):
-				pkt_tmp["content"]["splitting_node_time"] = self.env.now
+				pkt_tmp = pkt_tmp.copy_with_content(splitting_node_time=self.env.now)
 				
 				# also, denote that changes towards this splitting node happen immediately
-				self.time_to_change_splitting_nodes[pkt["src"]] = 0
+				self.time_to_change_splitting_nodes[pkt.src] = 0
 
 
 			# depending on the specified relay type, send out packets
-			if pkt["content"]["relay_type"] == "original_next_hop":
+			if pkt.content["relay_type"] == "original_next_hop":
 				next_hops = self.router_table.determine_highest_original()
 				self.send_packet(pkt_tmp, next_hops) 
-			elif pkt["content"]["relay_type"] == "broadcast":
-				next_hops = list(set(self.ebgp_AS_peers) - {pkt["last_hop"]})
-				self.send_packet(pkt_tmp, next_hops) 
-			elif pkt["content"]["relay_type"] == "no_relay":
+			elif pkt.content["relay_type"] == "broadcast":
+				next_hops = list(set(self.ebgp_AS_peers) - {pkt.last_hop})
+				# all peers already received this RAT when it was seen for
+				# the first time, so do not broadcast it again
+				if already_seen:
+					self.suppressed_rats[pkt.content["protocol"]] += len(next_hops)
+				else:
+					self.send_packet(pkt_tmp, next_hops) 
+			elif pkt.content["relay_type"] == "no_relay":
 				pass
 
 
+	def evict_seen_rats(self):
+		"""
+		Removes all identifiers from "seen_rats", that were seen more than
+		"network.rat_ttl" steps ago.
+		"""
+		oldest_allowed = self.env.now - self.network.rat_ttl
+		while self.seen_rats_expiry and self.seen_rats_expiry[0][0] < oldest_allowed:
+			self.seen_rats.discard(self.seen_rats_expiry.popleft()[1])
+
+
 	def process_std_pkt(self, pkt):
 		"""
 		This method is responsible for processing an incoming, standard
@@ -200,19 +249,19 @@ class AutonomousSystem(object):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
 
 		# if the destination of this packet is an address this AS advertise,
 		# this node is getting attacked
-		if pkt["dst"] in self.advertised_asns:
+		if pkt.dst in self.advertised_asns:
 			self.attack_reaction(pkt)
 		# else, relay it
 		else:
-			pkt["last_hop"] = self.asn
+			pkt.last_hop = self.asn
 			self.send_packet(
 				pkt, 
-				self.router_table.determine_next_hops(pkt["dst"])
+				self.router_table.determine_next_hops(pkt.dst)
 			)
 
 
@@ -222,11 +271,11 @@ class AutonomousSystem(object):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
-		self.logger.info(f"[{self.env.now}] Attack Packet with ID {pkt['identifier']} arrived with magnitutde {pkt['content']['attack_volume']} Gbps.")
+		self.logger.info("[%s] Attack Packet with ID %s arrived with magnitutde %s Gbps.", self.env.now, pkt.identifier, pkt.attack_volume)
 		self.received_attacks.append(
-			(self.env.now, pkt["content"]["attack_volume"])
+			(self.env.now, pkt.attack_volume)
 		)
 
 
@@ -237,22 +286,22 @@ class AutonomousSystem(object):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
-		self.logger.info(f"Reacting to Help RAT")
+		self.logger.info("Reacting to Help RAT")
 
 		# denote that this AS is now helping this victim
-		if not pkt["src"] in self.helping_nodes:
-			self.helping_nodes.append(pkt["src"])
+		if not pkt.src in self.helping_nodes:
+			self.helping_nodes.append(pkt.src)
 
 		# update the victim related information in the router table
-		self.router_table.update_victim_info(pkt["content"]["scrubbing_capability"], pkt["content"]["attack_volume"])
+		self.router_table.update_victim_info(pkt.content["scrubbing_capability"], pkt.attack_volume)
 
 		# apply activation timers for the different splitting nodes further
 		# up the attack path
 		for ally, delay in self.time_to_change_splitting_nodes.items():
-			self.logger.info(f"XXX - {ally} - {delay}")
-			self.env.process(self.router_table.set_activation_with_delay(ally, pkt["content"]["ally_percentage"], delay*2))
+			self.logger.info("XXX - %s - %s", ally, delay)
+			self.router_table.set_activation_with_delay(ally, pkt.content["ally_percentage"], delay*2)
 
 		# denote the node that is just before this node in the attack path
 		attack_path_predecessors = self.network.get_atk_path_predecessors(self.asn)
@@ -278,9 +327,9 @@ class AutonomousSystem(object):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
-		self.logger.info(f"Reacting to Help Retractment RAT")
+		self.logger.info("Reacting to Help Retractment RAT")
 		self.router_table.reset()
 		self.helping_nodes = []
 
@@ -298,8 +347,8 @@ class AutonomousSystem(object):
 		if hasattr(self, "supporting_allies"):
 			self.supporting_allies = []
 		if hasattr(self, "helping_nodes"):
-			if pkt["src"] in self.helping_nodes:
-				self.helping_nodes.remove(pkt["src"])
+			if pkt.src in self.helping_nodes:
+				self.helping_nodes.remove(pkt.src)
 		if hasattr(self, "time_to_change_splitting_nodes"):
 			self.time_to_change_splitting_nodes = {}
 
@@ -314,22 +363,22 @@ class AutonomousSystem(object):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
 
-		if pkt["content"]["as_path_to_victim"][-1] in self.helping_nodes:
-			self.logger.info(f"Reacting to Support RAT")
+		if pkt.content["as_path_to_victim"][-1] in self.helping_nodes:
+			self.logger.info("Reacting to Support RAT")
 			# add the advertised route the routing table
 			entry = {
 				"identifier": f"support_RAT_reaction_{int(self.env.now)}",
-				"next_hop": pkt["content"]["as_path_to_victim"][pkt["content"]["hc"] - 1],
-				"destination": pkt["content"]["as_path_to_victim"][-1],
-				"priority": 3 if (not pkt["last_hop"] in self.attack_path_predecessors) else 1,
+				"next_hop": pkt.content["as_path_to_victim"][pkt.hc - 1],
+				"destination": pkt.content["as_path_to_victim"][-1],
+				"priority": 3 if (not pkt.last_hop in self.attack_path_predecessors) else 1,
 				"split_percentage": 0,
-				"scrubbing_capabilities": pkt["content"]["scrubbing_capability"],
-				"as_path": pkt["content"]["as_path_to_victim"][pkt["content"]["hc"]:],
-				"origin": f"ally_{pkt['src']}",
-				"recvd_from": pkt["last_hop"],
+				"scrubbing_capabilities": pkt.content["scrubbing_capability"],
+				"as_path": pkt.content["as_path_to_victim"][pkt.hc:],
+				"origin": f"ally_{pkt.src}",
+				"recvd_from": pkt.last_hop,
 				"activation": 1.0,
 				"time_added": self.env.now
 			}
@@ -337,8 +386,8 @@ class AutonomousSystem(object):
 
 			# also, if this support message came further up the path, denote the time
 			# it takes for it to receive messages
-			if self.on_attack_path and "splitting_node_time" in pkt["content"].keys():
-				self.time_to_change_splitting_nodes[pkt['src']] = self.env.now - pkt["content"]["splitting_node_time"]
+			if self.on_attack_path and "splitting_node_time" in pkt.content:
+				self.time_to_change_splitting_nodes[pkt.src] = self.env.now - pkt.content["splitting_node_time"]
 
 
 	def __str__(self):
@@ -0,0 +1,256 @@
+"""
+Contains the Ensemble class.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import numpy as np
+
+
+def replica_dtype(nr_replicas):
+	"""
+	:param nr_replicas: the number of replicas
+	:type nr_replicas: int
+
+	:returns: the type of the records of an ensemble, a time and one value
+		per replica
+	:rtype: np.dtype
+	"""
+	return np.dtype([("time", np.float64), ("value", np.float64, (nr_replicas,))])
+
+
+class Ensemble(object):
+	"""
+	This class keeps the state of several replicas of a simulation, that are
+	run together in a single simulation with the fluid traffic model (see
+	"FluidFlow"), for estimating the variance of its results.
+
+	Replicas differ only in the noise of the attack volume of the source.
+	Replica 0 is the simulation itself, i.e., its attack volumes are the ones
+	of the "SourceAS", its traffic is received by the "VictimAS" and "AllyAS"
+	objects, and its victim sends the help RATs. All other replicas share the
+	topology, routing tables, RATs and ally activations of replica 0, and
+	therefore also the start of the attack, which the timing of the help
+	signal depends on. Their attack traffic and everything derived from it
+	is kept as numpy arrays with one entry per replica: the traffic on its
+	way (in the delay line of "FluidFlow"), the traffic received by the
+	victim and allies, and the attack volume approximation of the victim.
+	Hence, all replicas advance with a single sparse matrix product per
+	tick, in the same event loop.
+
+	The series of all replicas are recorded like the recordings of the
+	network (see "Internet.create_recorder"), i.e., in bounded memory if a
+	recording chunk size is given, and their totals are kept as they are
+	recorded.
+
+	Since the replicas do not run a control plane of their own, i.e., do not
+	decide about help, support and the splits of the routing tables based
+	on their own traffic, the spread of their totals only reflects the noise
+	of the attack traffic, and not the variance of the feedback loop of the
+	victim (see "summary").
+
+	:param network: the network of replica 0
+	:param nr_replicas: the number of replicas, including replica 0
+	:param rng: the random number generator for the attack volumes of the
+		replicas 1, 2, ..., created from the given seed
+	:param sent: the attack volumes sent by the source, as (time, volume by
+		replica) records
+	:param received: the attack volumes received, as (time, volume by
+		replica) records, by ASN of the receiving victim or ally
+	:param attack_volume_approximations: the attack volume approximation of
+		the victim, as (time, approximation by replica) records
+	:param sent_total: the attack volume sent so far, by replica
+	:param received_totals: the attack volume received so far, by replica,
+		by ASN of the receiving victim or ally
+	:param approximation: the latest attack volume approximation, by replica
+	:param accelerator: the momentum of the approximation, by replica
+
+	:type network: network.Internet
+	:type nr_replicas: int
+	:type rng: np.random.Generator
+	:type sent: recorder.Recorder
+	:type received: dict[int, recorder.Recorder]
+	:type attack_volume_approximations: recorder.Recorder
+	:type sent_total: np.ndarray
+	:type received_totals: dict[int, np.ndarray]
+	:type approximation: np.ndarray
+	:type accelerator: np.ndarray
+	"""
+
+
+	def __init__(self, network, nr_replicas, seed=None):
+		self.network = network
+		self.nr_replicas = nr_replicas
+		self.rng = np.random.default_rng(seed)
+
+		dtype = replica_dtype(nr_replicas)
+		self.sent = network.create_recorder("ensemble_sent", dtype)
+		self.received = {
+			AS.asn: network.create_recorder(f"ensemble_AS{AS.asn}_received_attacks", dtype)
+			for AS in [network.victim] + network.allies
+		}
+		self.attack_volume_approximations = network.create_recorder("ensemble_attack_volume_approximations", dtype)
+		self.sent_total = np.zeros(nr_replicas)
+		self.received_totals = {asn: np.zeros(nr_replicas) for asn in self.received}
+		self.approximation = None
+		self.accelerator = np.zeros(nr_replicas)
+
+
+	def recorders(self):
+		"""
+		:returns: the recorders of the series of all replicas, by name
+		:rtype: dict[str, recorder.Recorder]
+		"""
+		recorders = {
+			"ensemble_sent": self.sent,
+			"ensemble_attack_volume_approximations": self.attack_volume_approximations
+		}
+		for asn, recorder in self.received.items():
+			recorders[f"ensemble_AS{asn}_received_attacks"] = recorder
+		return recorders
+
+
+	def attack_volumes(self, attack_volume):
+		"""
+		Determines the attack volumes the source sends at the current time in
+		all replicas, following the same schedule as "SourceAS.attack".
+
+		:param attack_volume: the attack volume of replica 0
+		:type attack_volume: float
+
+		:returns: the attack volume, by replica
+		:rtype: np.ndarray
+		"""
+		source = self.network.source
+		now = self.network.env.now
+		start = source.attack_start
+		load = source.standard_load
+		full = source.full_attack_vol
+		second_wave = source.attack_stop + 150
+
+		standard_load = self.rng.integers(load - 10, load + 10, size=self.nr_replicas, endpoint=True)
+		full_load = full - self.rng.integers(0, int(full / 15), size=self.nr_replicas, endpoint=True)
+		volumes = np.select(
+			[
+				now < start,
+				now < source.attack_slowdown,
+				now < source.attack_stop,
+				now < second_wave,
+				now < start + second_wave,
+				now < source.attack_slowdown + second_wave,
+				now < source.attack_stop + second_wave
+			],
+			[
+				standard_load,
+				full_load,
+				max(full * (0.95)**(now - source.attack_slowdown), load),
+				standard_load,
+				standard_load,
+				full_load,
+				max(full * (0.95)**(now - (source.attack_slowdown + second_wave)), load)
+			],
+			default=standard_load
+		).astype(float)
+		volumes[0] = attack_volume
+
+		self.sent.append((now, volumes))
+		self.sent_total += volumes
+		return volumes
+
+
+	def receive(self, asn, attack_volumes, reference_state):
+		"""
+		Records the attack volumes received by a victim or ally in all
+		replicas. For the victim, the attack volume approximations of all
+		replicas are updated, following "VictimAS.attack_vol_approximation";
+		the help signal is issued and retracted, and the allies are activated,
+		for all replicas together, by replica 0.
+
+		:param asn: the ASN of the receiving AS
+		:param attack_volumes: the received attack volume, by replica
+		:param reference_state: whether the victim of replica 0 had an attack
+			volume approximation and had issued a help signal, before it
+			received its attack volume
+
+		:type asn: int
+		:type attack_volumes: np.ndarray
+		:type reference_state: tuple[bool, bool]
+		"""
+		now = self.network.env.now
+		self.received[asn].append((now, attack_volumes))
+		self.received_totals[asn] += attack_volumes
+
+		victim = self.network.victim
+		if asn != victim.asn:
+			return
+
+		had_approximation, had_help_signal = reference_state
+		ally_capabilities = sum(d["scrubbing_capability"] for d in victim.ally_help_info.values())
+
+		if not had_approximation:
+			recent = attack_volumes.copy()
+		else:
+			previous = self.approximation
+			recent = attack_volumes + sum(d["scrubbing_capability"] * d["activation"] for d in victim.ally_help_info.values())
+
+			nuanced = ally_capabilities > previous
+			direction = np.sign(attack_volumes / victim.scrubbing_capability - 1)
+			accelerator = np.where(
+				direction == np.sign(self.accelerator),
+				self.accelerator * (1 + victim.accelerator_factor),
+				direction * victim.momentum_starting_value
+			)
+			accelerator = np.clip(accelerator, -victim.momentum_limit_value, victim.momentum_limit_value)
+			self.accelerator = np.where(nuanced, accelerator, self.accelerator)
+			recent = np.where(nuanced, recent * (1 + self.accelerator), recent)
+
+		if had_approximation:
+			self.approximation = victim.alpha_ewa * recent + (1 - victim.alpha_ewa) * previous
+		else:
+			self.approximation = recent
+		self.attack_volume_approximations.append((now, self.approximation))
+
+		# the help signal was just issued, or retracted
+		if victim.help_signal_issued and not had_help_signal:
+			self.approximation = attack_volumes.copy()
+			self.attack_volume_approximations.append((now, self.approximation))
+		elif had_help_signal and not victim.help_signal_issued:
+			self.accelerator[:] = 0.0
+
+
+	def totals(self):
+		"""
+		Sums up the attack volumes sent and received over the whole
+		simulation.
+
+		:returns: the total attack volume sent by the source ("sent"), and
+			received by every victim or ally (by ASN), by replica
+		:rtype: dict[object, np.ndarray]
+		"""
+		totals = {asn: total.copy() for asn, total in self.received_totals.items()}
+		totals["sent"] = self.sent_total.copy()
+		return totals
+
+
+	def summary(self, z=1.96):
+		"""
+		Summarizes the totals of all replicas by their mean and the half
+		width of the interval of the traffic noise around it, by default the
+		95% one. The interval only covers the noise of the attack traffic
+		under the control decisions of replica 0, not the variance of whole
+		simulations, since the replicas share these decisions.
+
+		:param z: the quantile of the standard normal distribution of the
+			level of the interval
+
+		:type z: float
+
+		:returns: the mean and the half width of the traffic noise interval
+			of every total (see "totals")
+		:rtype: dict[object, tuple[float, float]]
+		"""
+		return {
+			key: (float(np.mean(values)), float(z * np.std(values, ddof=1) / np.sqrt(self.nr_replicas)) if self.nr_replicas > 1 else 0.0)
+			for key, values in self.totals().items()
+		}
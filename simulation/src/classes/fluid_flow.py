@@ -0,0 +1,192 @@
+"""
+Contains the FluidFlow class.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import numpy as np
+
+from .packet import Packet
+
+
+class FluidFlow(object):
+	"""
+	This class simulates the attack traffic towards the victim as a fluid,
+	instead of relaying every attack packet hop by hop. Route advertisements
+	are not affected, they are still relayed as packets.
+
+	Every "tick" steps, the traffic arriving at each AS is taken from a delay
+	line. The traffic arriving at a sink (the victim, or an ally that accepts
+	traffic for the victim) is handed to it as one aggregated attack packet,
+	everything else is forwarded at once, by multiplying it with a sparse
+	matrix holding the split percentages of all routing tables. The
+	forwarded traffic is put back into the delay line, to arrive after the
+	propagation delay. Rows of the matrix are only recomputed for routing
+	tables whose version changed; ASes that are not materialized (see
+	"ASTable") forward along their initial routes, without being created.
+
+	If an ensemble is given, the traffic of all its replicas is propagated
+	together: the delay line holds one column of traffic per replica, and
+	only the traffic of replica 0 is handed to the victim and ally objects,
+	while the traffic of all replicas is recorded by the ensemble.
+
+	:param network: the network whose attack traffic is simulated
+	:param env: the scheduler the simulation is running on
+	:param dst: the ASN the attack traffic is addressed to, i.e., the victim
+	:param tick: number of steps between two propagation steps
+	:param delay: the propagation delay, in ticks
+	:param ensemble: the replicas to simulate together, None for a single
+		simulation
+	:param delay_line: the traffic arriving at every AS, by replica, for the
+		next "delay + 1" ticks; the row of tick "k" is "k % (delay + 1)"
+	:param src: the ASN of the last AS that injected traffic
+	:param versions: the routing table versions the rows of the split
+		matrix were computed for
+	:param rows: the next hops and split percentages of every AS
+	:param split_matrix: the transposed split matrix, i.e., entry (j, i) is
+		the percentage of traffic AS i forwards to AS j
+
+	:type network: network.Internet
+	:type env: scheduler.SimpyScheduler | scheduler.HeapScheduler
+	:type dst: int
+	:type tick: float
+	:type delay: int
+	:type ensemble: ensemble.Ensemble
+	:type delay_line: np.ndarray
+	:type src: int
+	:type versions: list[int]
+	:type rows: list[list[tuple[int, float]]]
+	:type split_matrix: scipy.sparse.csr_matrix
+	"""
+
+
+	def __init__(self, network, tick, ensemble=None):
+		self.network = network
+		self.env = network.env
+		self.dst = network.victim.asn
+		self.tick = tick
+		self.delay = max(1, int(round(network.propagation_delay / tick)))
+		self.ensemble = ensemble
+		self.delay_line = np.zeros((
+			self.delay + 1,
+			network.nr_ASes,
+			1 if ensemble is None else ensemble.nr_replicas
+		))
+		self.src = None
+
+		self.versions = [-1] * network.nr_ASes
+		self.rows = [network.ASes.next_hops(asn) for asn in range(network.nr_ASes)]
+		self.split_matrix = None
+
+
+	def tick_index(self):
+		"""
+		:returns: the index of the tick of the current simulation time
+		:rtype: int
+		"""
+		return int(round(self.env.now / self.tick))
+
+
+	def inject(self, pkt, next_hops_w_perc):
+		"""
+		Sends the attack volume of a packet into the network, split over the
+		given next hops; it arrives there after the propagation delay.
+
+		:param pkt: the attack packet
+		:param next_hops_w_perc: the next hops and the percentage of traffic
+			each of them receives
+
+		:type pkt: packet.Packet
+		:type next_hops_w_perc: list[tuple[int, float]]
+		"""
+		if pkt.dst != self.dst:
+			raise Exception("Fluid traffic can only be sent to the victim!")
+
+		self.src = pkt.src
+		if self.ensemble is None:
+			attack_volumes = pkt.attack_volume
+		else:
+			attack_volumes = self.ensemble.attack_volumes(pkt.attack_volume)
+
+		arrivals = self.delay_line[(self.tick_index() + self.delay) % (self.delay + 1)]
+		for next_hop, percentage in next_hops_w_perc:
+			arrivals[next_hop] += attack_volumes * percentage
+
+
+	def update_split_matrix(self):
+		"""
+		Recomputes the rows of the split matrix whose routing table changed,
+		and rebuilds the matrix if any did.
+		"""
+		changed = False
+		for AS in self.network.ASes.materialized():
+			if self.versions[AS.asn] != AS.router_table.version:
+				self.versions[AS.asn] = AS.router_table.version
+				self.rows[AS.asn] = AS.router_table.determine_next_hops(self.dst)
+				changed = True
+
+		if changed or self.split_matrix is None:
+			# scipy is slow to import, and only needed by this traffic model
+			from scipy.sparse import csr_matrix
+			senders = [asn for asn, row in enumerate(self.rows) for _ in row]
+			next_hops = [next_hop for row in self.rows for next_hop, _ in row]
+			percentages = [percentage for row in self.rows for _, percentage in row]
+			self.split_matrix = csr_matrix(
+				(percentages, (next_hops, senders)),
+				shape=(self.network.nr_ASes, self.network.nr_ASes)
+			)
+
+
+	def sinks(self):
+		"""
+		:returns: the ASNs of all ASes that accept traffic for the victim
+		:rtype: list[int]
+		"""
+		return [
+			AS.asn for AS in [self.network.victim] + self.network.allies
+			if self.dst in AS.advertised_asns
+		]
+
+
+	def step(self):
+		"""
+		Performs one propagation step: the traffic arriving at the sinks is
+		received by them, all other traffic is forwarded.
+		"""
+		tick_indx = self.tick_index()
+		arrivals = self.delay_line[tick_indx % (self.delay + 1)].copy()
+		self.delay_line[tick_indx % (self.delay + 1)] = 0
+
+		victim = self.network.victim
+		for sink in self.sinks():
+			if not arrivals[sink].any():
+				continue
+			reference_state = (bool(victim.attack_volume_approximations), victim.help_signal_issued)
+
+			if arrivals[sink, 0] > 0:
+				pkt = Packet(
+					f"Attack_Flow_{sink}_{tick_indx}",
+					"STD",
+					self.src,
+					self.dst,
+					None,
+					{"relay_type": "next_hop"},
+					attack_volume=float(arrivals[sink, 0])
+				)
+				self.network.ASes[sink].process_pkt(pkt)
+			if self.ensemble is not None:
+				self.ensemble.receive(sink, arrivals[sink].copy(), reference_state)
+			arrivals[sink] = 0
+
+		if arrivals.any():
+			self.update_split_matrix()
+			self.delay_line[(tick_indx + self.delay) % (self.delay + 1)] += self.split_matrix @ arrivals
+
+
+	def propagation_cycle(self):
+		"""
+		Performs a propagation step, and schedules the next one in one tick.
+		"""
+		self.step()
+		self.env.call_later(self.tick, self.propagation_cycle)
@@ -0,0 +1,238 @@
+"""
+Contains the LoadKPIs and EstimationKPIs classes.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import copy
+import math
+
+
+class LoadKPIs(object):
+	"""
+	Key performance indicators of the attack traffic arriving at an AS that
+	scrubs it (the victim or an ally), updated with every received attack
+	packet, in constant memory.
+
+	All traffic received at the same time forms the load of one step. The
+	load of the victim is additionally used to measure how long it takes
+	after the help signal until the traffic is split in a stable way, i.e.,
+	until the load changes by at most "tolerance" times the scrubbing
+	capability from one step to the next, for "window" consecutive steps.
+
+	:param capacity: the scrubbing capability of the AS
+	:param tolerance: the change of the load between two steps, relative to
+		the capacity, up to which the split is considered stable
+	:param window: the number of consecutive stable steps after which the
+		split is considered settled
+	:param step_time: the time of the current step, None before the first
+		reception
+	:param step_load: the traffic received in the current step so far
+	:param previous_load: the load of the previous step
+	:param nr_steps: the number of completed steps
+	:param total: the traffic received in total
+	:param max_load: the largest load of a completed step
+	:param overloaded_steps: the number of completed steps with a load above
+		the capacity
+	:param overloaded_time: the time from these steps to the respective next
+		step
+	:param help_time: the time the help signal was issued, if it was
+	:param stable_since: the first step of the current series of stable
+		steps after the help signal
+	:param nr_stable_steps: the number of steps in this series
+	:param settling_latency: the time from the help signal until the split
+		settled, None if it did not yet
+
+	:type capacity: float
+	:type tolerance: float
+	:type window: int
+	:type step_time: float
+	:type step_load: float
+	:type previous_load: float
+	:type nr_steps: int
+	:type total: float
+	:type max_load: float
+	:type overloaded_steps: int
+	:type overloaded_time: float
+	:type help_time: float
+	:type stable_since: float
+	:type nr_stable_steps: int
+	:type settling_latency: float
+	"""
+
+
+	def __init__(self, capacity, tolerance=0.05, window=10):
+		self.capacity = capacity
+		self.tolerance = tolerance
+		self.window = window
+		self.step_time = None
+		self.step_load = 0
+		self.previous_load = None
+		self.nr_steps = 0
+		self.total = 0
+		self.max_load = 0
+		self.overloaded_steps = 0
+		self.overloaded_time = 0
+		self.help_time = None
+		self.stable_since = None
+		self.nr_stable_steps = 0
+		self.settling_latency = None
+
+
+	def record(self, time, attack_volume):
+		"""
+		Records the reception of attack traffic.
+
+		:param time: the time of the reception
+		:param attack_volume: the received attack volume
+
+		:type time: float
+		:type attack_volume: float
+		"""
+		if time != self.step_time:
+			if self.step_time is not None:
+				self.finish_step(time)
+			self.step_time = time
+			self.step_load = 0
+		self.step_load += attack_volume
+		self.total += attack_volume
+
+
+	def record_help(self, time):
+		"""
+		Records that the help signal was issued; only the first one counts.
+
+		:param time: the time of the help signal
+		:type time: float
+		"""
+		if self.help_time is None:
+			self.help_time = time
+
+
+	def finish_step(self, next_time):
+		"""
+		Completes the current step, which lasts until the given time.
+
+		:param next_time: the time of the next step, or the end of the
+			simulation
+		:type next_time: float
+		"""
+		load = self.step_load
+		self.nr_steps += 1
+		self.max_load = max(self.max_load, load)
+		if load > self.capacity:
+			self.overloaded_steps += 1
+			self.overloaded_time += next_time - self.step_time
+
+		if self.help_time is not None and self.settling_latency is None and self.step_time > self.help_time:
+			if self.previous_load is not None and abs(load - self.previous_load) <= self.tolerance * self.capacity:
+				if self.nr_stable_steps == 0:
+					self.stable_since = self.step_time
+				self.nr_stable_steps += 1
+				if self.nr_stable_steps == self.window:
+					self.settling_latency = self.stable_since - self.help_time
+			else:
+				self.nr_stable_steps = 0
+		self.previous_load = load
+
+
+	def summary(self, now):
+		"""
+		:param now: the current simulation time, i.e., the end of the current
+			step
+		:type now: float
+
+		:returns: the indicators, including the current step
+		:rtype: dict[str, float]
+		"""
+		kpis = copy.copy(self)
+		if kpis.step_time is not None:
+			kpis.finish_step(now)
+		return {
+			"received": kpis.total,
+			"steps": kpis.nr_steps,
+			"max_load": kpis.max_load,
+			"mean_utilisation": kpis.total / (kpis.capacity * kpis.nr_steps) if kpis.nr_steps else 0,
+			"peak_utilisation": kpis.max_load / kpis.capacity,
+			"overloaded_steps": kpis.overloaded_steps,
+			"overloaded_time": kpis.overloaded_time
+		}
+
+
+	def __eq__(self, other):
+		return isinstance(other, LoadKPIs) and vars(self) == vars(other)
+
+
+class EstimationKPIs(object):
+	"""
+	The error of the attack volume approximations of the victim, updated with
+	every approximation, in constant memory. An approximation at step t is
+	compared with the attack volume the source sent at step t - d, where d
+	is the path delay, i.e., the number of hops of the initial AS path of
+	the source times the propagation delay: the traffic the victim measures
+	at step t left the source at t - d, so the error does not include the
+	propagation lag. Approximations made before any traffic could have
+	arrived are not counted. In a partitioned simulation, the error is only
+	known if the source is simulated by the same process as the victim.
+
+	:param nr_samples: the number of approximations
+	:param sum_abs_errors: the sum of the absolute errors
+	:param sum_squared_errors: the sum of the squared errors
+	:param sum_relative_errors: the sum of the absolute errors, relative to
+		the sent attack volume
+	:param max_abs_error: the largest absolute error
+
+	:type nr_samples: int
+	:type sum_abs_errors: float
+	:type sum_squared_errors: float
+	:type sum_relative_errors: float
+	:type max_abs_error: float
+	"""
+
+
+	def __init__(self):
+		self.nr_samples = 0
+		self.sum_abs_errors = 0
+		self.sum_squared_errors = 0
+		self.sum_relative_errors = 0
+		self.max_abs_error = 0
+
+
+	def record(self, approximation, attack_volume):
+		"""
+		Records an approximation.
+
+		:param approximation: the approximated attack volume
+		:param attack_volume: the attack volume actually sent
+
+		:type approximation: float
+		:type attack_volume: float
+		"""
+		error = abs(approximation - attack_volume)
+		self.nr_samples += 1
+		self.sum_abs_errors += error
+		self.sum_squared_errors += error ** 2
+		self.sum_relative_errors += error / attack_volume if attack_volume else 0
+		self.max_abs_error = max(self.max_abs_error, error)
+
+
+	def summary(self):
+		"""
+		:returns: the mean absolute, root mean squared, mean relative and
+			maximal absolute error, None if nothing was approximated
+		:rtype: dict[str, float]
+		"""
+		if not self.nr_samples:
+			return None
+		return {
+			"samples": self.nr_samples,
+			"mean_absolute_error": self.sum_abs_errors / self.nr_samples,
+			"root_mean_squared_error": math.sqrt(self.sum_squared_errors / self.nr_samples),
+			"mean_relative_error": self.sum_relative_errors / self.nr_samples,
+			"max_absolute_error": self.max_abs_error
+		}
+
+
+	def __eq__(self, other):
+		return isinstance(other, EstimationKPIs) and vars(self) == vars(other)
@@ -7,16 +7,34 @@ Author:
 
 import random
 import string
-import copy
-import matplotlib.pyplot as plt
-import networkx as nx
-from pyvis.network import Network
+import json
+import pickle
+import logging
+from collections import Counter
+import numpy as np
 
 from .autonomous_system import AutonomousSystem
 from .sourceAS import SourceAS
 from .victimAS import VictimAS
 from .allyAS import AllyAS
 from .router_table import RoutingTable
+from .as_table import ASTable, IDENTIFIER_LENGTH
+from .fluid_flow import FluidFlow
+from .ensemble import Ensemble
+from .recorder import Recorder, RECORD_DTYPE
+from ..plotting import decimate, render_attack_traffic
+
+
+# attributes of the ASes, their routing tables and the traffic models that
+# refer to other objects of the simulation, and are therefore kept by
+# "Internet.reset"
+REFERENCE_ATTRIBUTES = {
+	"env",
+	"network",
+	"logger",
+	"router_table",
+	"ensemble"
+}
 
 
 class Internet(object):
@@ -26,31 +44,71 @@ class Internet(object):
 	It will initialize all necessary ASes, handle the communications between them,
 	and collect and plot simulation data points.
 
-	:param env: the simpy environment the simulation is running in
+	:param env: the scheduler the simulation is running on
 	:param init_graph: the initial graph, dictacting the topology of this
 		Internet instance
 	:param nr_ASes: the numbe of included autononmous systems
 	:param propagation_delay: the time it takes for a message to be
 		transmitted (we ignore transmissions delay, etc...)
+	:param rat_ttl: number of steps an AS remembers a seen RAT identifier
+	:param event_trace: if given, all sent and received packets are
+		recorded in it
+	:param traffic_model: either "packet", to relay every attack packet
+		individually, or "fluid", to propagate the attack traffic of all
+		ASes at once, every "attack_freq" steps (see "FluidFlow")
+	:param fluid_flow: simulates the attack traffic, if the traffic model
+		is "fluid", None otherwise
+	:param ensemble: the replicas simulated together with this network, if
+		more than one replica is simulated, None otherwise
+	:param recording_chunk_size: if given, the recordings of the network and
+		its ASes keep at most this many records in memory, and write the
+		rest into .npy files in "{log_subpath}/recordings" (see "Recorder"),
+		otherwise they are kept in memory
+	:param pending_deliveries: the packets on their way, by time of arrival
+		and receiving ASN
+	:param partition_of: if this network is simulated by several processes,
+		the index of the partition (i.e., process) every AS belongs to, by
+		ASN, None otherwise (see "pdes.py")
+	:param partition_indx: the index of the partition simulated by this
+		process, if "partition_of" is given
+	:param outbox: the packets on their way to ASes of other partitions,
+		as (time of arrival, packet) tuples
 	:param logger: used to log events related to this instance
+	:param create_logger_func: used to create the loggers of the ASes
 	:param log_subpath: path to store logs
 	:param figure_subpath: path to store figures
-	:param ASes: a list of all initiated autonomous systems
+	:param ASes: all autonomous systems, which are only created once they are
+		needed (see "ASTable")
 	:param source: the source autonomous system
 	:param victim: the victim autonomous system
 	:param allies: the ally autonomous systems
+	:param initial_state: the pickled states of the random number
+		generators of "random" and "numpy", and of the network and its
+		ASes, right after they were created, restored by "reset"
 
-	:type env: simpy.Environment
+	:type env: scheduler.SimpyScheduler | scheduler.HeapScheduler
 	:type init_graph: nx.classes.graph.Graph
 	:type nr_ASes: int
 	:type propagation_delay: float
+	:type rat_ttl: float
+	:type event_trace: event_trace.EventTrace
+	:type traffic_model: str
+	:type fluid_flow: fluid_flow.FluidFlow
+	:type ensemble: ensemble.Ensemble
+	:type recording_chunk_size: int
+	:type pending_deliveries: dict[tuple[float, int], list[packet.Packet]]
+	:type partition_of: list[int]
+	:type partition_indx: int
+	:type outbox: list[tuple[float, packet.Packet]]
 	:type logger: logging.RootLogger
+	:type create_logger_func: callable
 	:type log_subpath: str
 	:type figure_subpath: str
-	:type ASes: list[AutonomousSystem]
+	:type ASes: ASTable
 	:type source: AutonomousSystem
 	:type victim: AutonomousSystem
 	:type allies: AutonomousSystem
+	:type initial_state: bytes
 	"""
 
 	__special_AS_classes__ = {
@@ -63,69 +121,61 @@ class Internet(object):
 
 	def __init__(self, env, graph, victim_indx, source_indx, ally_indc,
 				 attack_freq, prop_delay, network_logger, create_logger_func,
-				 log_subpath, figure_subpath):
+				 log_subpath, figure_subpath, rat_ttl=100, event_trace=None,
+				 traffic_model="packet", nr_replicas=1, replica_seed=None,
+				 recording_chunk_size=None):
 
 		# set attributes
 		self.env = env
 		self.init_graph = graph
 		self.nr_ASes = len(graph.nodes)
 		self.propagation_delay = prop_delay
+		self.rat_ttl = rat_ttl
+		self.event_trace = event_trace
+		self.traffic_model = traffic_model
+		self.recording_chunk_size = recording_chunk_size
+		self.pending_deliveries = {}
+		self.partition_of = None
+		self.partition_indx = None
+		self.outbox = []
 		self.logger = network_logger
 		self.log_subpath = log_subpath
 		self.figure_subpath = figure_subpath
-		self.ASes = []
+		self.ASes = ASTable(self, victim_indx)
 		self.allies = []
 
 		self.plot_values = {
 			"victim_scrubbing_capabilitiy": None,
-			"victim_help_calls": [],
-			"victim_help_retractment_calls": [],
-			"victim_attack_approximations": []
+			"victim_help_calls": self.create_recorder("victim_help_calls"),
+			"victim_help_retractment_calls": self.create_recorder("victim_help_retractment_calls"),
+			"victim_attack_approximations": self.create_recorder("victim_attack_approximations")
 		}
 
-		# save a plot of the initial graph
-		Internet.save_graph(graph, f"{self.figure_subpath}/init_graph.html")
-
-		# translate the networkx nodes to AutonomousSystem classes
+		# translate the networkx nodes to rows of the AS table; only the
+		# special ASes are created right away, all others once they are
+		# reached (see "create_AS")
+		self.create_logger_func = create_logger_func
 		for node_indx in graph.nodes:
 
 			# determine which nodes point towards this node, and which ones
 			# itself point to
 			incoming = [u for u, v in graph.in_edges(node_indx)]
 			outgoing = [v for u, v in graph.out_edges(node_indx)]
-			neighbors = incoming + outgoing
-
-			# create all the necessary routing table entries
-			init_routing_table = [{
-				"identifier": Internet.generate_random_identifier(),
-				"next_hop": out_node,
-				"destination": victim_indx,
-				"priority": 1,
-				"split_percentage": 0,
-				"scrubbing_capabilities": 0,
-				"as_path": [],
-				"origin": "original",
-				"recvd_from": node_indx,
-				"time_added": 0
-			} for out_node in outgoing]
-
-			# select one best path by increasing the priority to 2
-			if len(init_routing_table) > 0:
-				selected_route = random.randint(
-					0, len(init_routing_table) - 1
-				)
-				init_routing_table[selected_route]["priority"] = 2
+
+			# draw the identifiers of all the necessary routing table
+			# entries at once, and select one best path, which gets
+			# priority 2
+			identifiers = Internet.generate_random_identifier(IDENTIFIER_LENGTH * len(outgoing))
+			selected_route = random.randint(0, len(outgoing) - 1) if outgoing else -1
+			self.ASes.append(incoming, outgoing, identifiers, selected_route)
 
 			# determine the role of this node, and initiaize it accordinly
 			role = graph.nodes[node_indx]["role"]
+			if role == "standard":
+				continue
 
 			# for distributing additional information
-			additional_attr = {}
-
-			if role in ["source", "victim", "ally"]:
-				for entry_indx in range(len(init_routing_table)):
-					init_routing_table[entry_indx]["as_path"] = graph.nodes[node_indx]["as_path_to_victim"]
-				additional_attr["as_path_to_victim"] = graph.nodes[node_indx]["as_path_to_victim"]
+			additional_attr = {"as_path_to_victim": graph.nodes[node_indx]["as_path_to_victim"]}
 
 			# depending on the role, further attributes are supplied
 			if role == "source":
@@ -137,28 +187,143 @@ class Internet(object):
 			elif role == "ally":
 				additional_attr["scrubbing_capability"] = graph.nodes[node_indx]["scrubbing_cap"]
 
-			# create an individual logger for this AS
-			as_logger = create_logger_func(
-				f"AS{node_indx}-LOGGER",
-				f"{log_subpath}/log_node_{node_indx}.txt"
-			)
-
-			# initialize the AS
-			self.ASes.append(self.__special_AS_classes__[role](
-				env,
-				self,
-				as_logger,
-				node_indx,
-				RoutingTable(self.env, self, init_routing_table, node_indx, as_logger),
-				neighbors,
-				additional_attr
-			))
+			self.ASes.add(self.create_AS(node_indx, additional_attr))
 
 		# specifically save the special ASes
 		self.source = self.ASes[source_indx]
 		self.victim = self.ASes[victim_indx]
 		self.allies = [self.ASes[ally_indx] for ally_indx in ally_indc]
 
+		# several replicas can only be simulated together by the fluid
+		# traffic model, which needs to know the victim and allies
+		if nr_replicas > 1 and traffic_model != "fluid":
+			raise Exception("Replicas can only be simulated with the fluid traffic model!")
+		self.ensemble = Ensemble(self, nr_replicas, replica_seed) if nr_replicas > 1 else None
+
+		if traffic_model == "fluid":
+			self.fluid_flow = FluidFlow(self, attack_freq, self.ensemble)
+		elif traffic_model == "packet":
+			self.fluid_flow = None
+		else:
+			raise Exception(f"Unknown traffic model \"{traffic_model}\"!")
+
+		self.initial_state = pickle.dumps(
+			(random.getstate(), np.random.get_state(), self.export_state()),
+			protocol=pickle.HIGHEST_PROTOCOL
+		)
+
+
+	def create_AS(self, asn, additional_attr=None, logger=None):
+		"""
+		Creates the object of an AS, with its initial routes from its row in
+		the AS table, as the class of its role in the initial graph. Standard
+		ASes are created by the AS table, once they are first needed.
+
+		:param asn: the ASN of the AS
+		:param additional_attr: the attributes of its role, e.g., the
+			scrubbing capability of an ally
+		:param logger: the logger of the AS, created if not given
+
+		:type asn: int
+		:type additional_attr: dict
+		:type logger: logging.RootLogger
+
+		:returns: the AS
+		:rtype: AutonomousSystem
+		"""
+		role = self.init_graph.nodes[asn]["role"]
+		init_routing_table = self.ASes.initial_routes(asn)
+		if role in ["source", "victim", "ally"]:
+			for entry in init_routing_table:
+				entry["as_path"] = self.init_graph.nodes[asn]["as_path_to_victim"]
+
+		# create an individual logger for this AS
+		if logger is None:
+			logger = self.create_AS_logger(asn)
+
+		return self.__special_AS_classes__[role](
+			self.env,
+			self,
+			logger,
+			asn,
+			RoutingTable(self.env, self, init_routing_table, asn, logger),
+			self.ASes.ebgp_AS_peers(asn),
+			additional_attr or {}
+		)
+
+
+	def stateful_objects(self):
+		"""
+		:returns: the objects whose state changes while the simulation runs:
+			all materialized ASes and their routing tables, and the traffic
+			models, by name
+		:rtype: dict[str, object]
+		"""
+		objects = {}
+		for AS in self.ASes.materialized():
+			objects[f"AS{AS.asn}"] = AS
+			objects[f"AS{AS.asn}_router_table"] = AS.router_table
+		for name in ["fluid_flow", "ensemble"]:
+			if getattr(self, name) is not None:
+				objects[name] = getattr(self, name)
+		return objects
+
+
+	def export_state(self):
+		"""
+		Collects the state of the network, i.e., its recordings and all
+		attributes of "stateful_objects", except the ones referring to other
+		objects of the simulation.
+
+		:returns: the recordings of the network, and the attributes of every
+			stateful object, by name
+		:rtype: tuple[dict, dict[str, dict]]
+		"""
+		return self.plot_values, {
+			name: {key: value for key, value in vars(obj).items() if key not in REFERENCE_ATTRIBUTES}
+			for name, obj in self.stateful_objects().items()
+		}
+
+
+	def reset(self):
+		"""
+		Restores the network to the state right after it was created: all
+		routing tables, ASes, recordings and indicators, on a new scheduler
+		of the same type, without any packets on their way, and with the
+		random number generators of "random" and "numpy" in the states they
+		had then, such that a reset network is simulated exactly like a newly
+		created one with the same parameters. The ASes are not
+		created again, so many attack scenarios can be simulated on the same
+		network, e.g., with different parameters (see
+		"checkpoint.change_parameters"); the ones materialized since the
+		network was created get the state of freshly created ones. Loggers and
+		output paths stay the ones of the network.
+		"""
+		self.env = type(self.env)()
+		self.pending_deliveries = {}
+		self.outbox = []
+
+		random_state, numpy_random_state, (plot_values, states) = pickle.loads(self.initial_state)
+		random.setstate(random_state)
+		np.random.set_state(numpy_random_state)
+		self.plot_values = plot_values
+		for AS in self.ASes.materialized():
+			if f"AS{AS.asn}" not in states:
+				fresh = self.create_AS(AS.asn, logger=AS.logger)
+				for name, obj in [(f"AS{AS.asn}", fresh), (f"AS{AS.asn}_router_table", fresh.router_table)]:
+					states[name] = {key: value for key, value in vars(obj).items() if key not in REFERENCE_ATTRIBUTES}
+
+		for name, obj in self.stateful_objects().items():
+			references = {key: value for key, value in vars(obj).items() if key in REFERENCE_ATTRIBUTES}
+			vars(obj).clear()
+			vars(obj).update(states[name])
+			vars(obj).update(references)
+			if "env" in references:
+				obj.env = self.env
+
+		for name, recorder in self.recorders().items():
+			recorder.relocate(self.recording_path(name))
+
 
 	def relay_std_packet(self, pkt, next_hops_w_perc):
 		"""
@@ -170,31 +335,220 @@ class Internet(object):
 			one of the next hops, and the percentage of traffic going to this
 			hop, i.e., a multipath implementation.
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		:type next_hops_w_perc: list[tuples[int, float]]
 		"""
 
 		# increase hop counter
-		pkt["content"]["hc"] += 1
+		pkt.hc += 1
 
-		# wait for the propagation delay NOTE random delay because
-		# of concurrency issues
-		yield self.env.timeout(
-			self.propagation_delay
-		)
-		self.logger.debug(f"[{self.env.now}] Sending attack message to {[t[0] for t in next_hops_w_perc]} with percentages {[t[1] for t in next_hops_w_perc]} from {pkt['last_hop']}.")
+		if self.logger.isEnabledFor(logging.DEBUG):
+			self.logger.debug("[%s] Sending attack message to %s with percentages %s from %s.", self.env.now, [t[0] for t in next_hops_w_perc], [t[1] for t in next_hops_w_perc], pkt.last_hop)
 
 		# split the attack traffic, according to proportions of the
-		# given routing table
+		# given routing table; every next hop gets its own per-hop fields,
+		# since receivers modify them while relaying
 		for next_hop, percentage in next_hops_w_perc:
 			if percentage > 0:
-				# NOTE needed because of concurrence issues
-				tmp_pkt = copy.deepcopy(pkt)
-				modified_content = {k: v for k, v in pkt["content"].items()}
-				modified_content["attack_volume"] = pkt["content"]["attack_volume"] * percentage
-				tmp_pkt["content"] = modified_content
-				tmp_pkt["next_hop"] = next_hop
-				self.ASes[next_hop].process_pkt(tmp_pkt)
+				self.schedule_delivery(pkt.copy(
+					next_hop=next_hop,
+					attack_volume=pkt.attack_volume * percentage
+				))
+
+
+	def is_local(self, asn):
+		"""
+		:param asn: the ASN of an AS
+		:type asn: int
+
+		:returns: whether the AS is simulated by this process, which is
+			always the case, unless the simulation is partitioned
+		:rtype: bool
+		"""
+		return self.partition_of is None or self.partition_of[asn] == self.partition_indx
+
+
+	def schedule_delivery(self, pkt):
+		"""
+		Schedules a packet to arrive at its next hop after the propagation
+		delay. If the next hop belongs to another partition, the packet is
+		put into the outbox instead.
+
+		:param pkt: the packet, with its next hop set
+
+		:type pkt: packet.Packet
+		"""
+		arrival = self.env.now + self.propagation_delay
+		if self.partition_of is not None and self.partition_of[pkt.next_hop] != self.partition_indx:
+			self.outbox.append((arrival, pkt))
+		else:
+			self.add_delivery(arrival, pkt)
+
+
+	def add_delivery(self, arrival, pkt):
+		"""
+		Adds a packet to the packets arriving at its next hop at the given
+		time. All packets arriving at the same AS at the same time are
+		delivered together by a single, urgent event (see "deliver"), i.e.,
+		before any other timer of the same time.
+
+		:param arrival: the time of arrival
+		:param pkt: the packet, with its next hop set
+
+		:type arrival: float
+		:type pkt: packet.Packet
+		"""
+		key = (arrival, pkt.next_hop)
+		batch = self.pending_deliveries.get(key)
+		if batch is None:
+			batch = self.pending_deliveries[key] = []
+			self.env.call_later(arrival - self.env.now, self.deliver, key, urgent=True)
+		batch.append(pkt)
+
+
+	def deliver(self, key):
+		"""
+		Delivers all packets that arrive at an AS at the given time, in a
+		deterministic order, which only depends on the sending ASes: first
+		all RATs, by sending AS and in the order each AS sent them, then the
+		attack traffic, where all fragments of traffic from the same source
+		to the same destination are merged into one packet.
+
+		:param key: the time of arrival and the ASN of the receiving AS
+
+		:type key: tuple[float, int]
+		"""
+		batch = self.pending_deliveries.pop(key)
+		batch.sort(key=lambda pkt: pkt.last_hop)
+		receiver = self.ASes[key[1]]
+
+		attack_traffic = {}
+		for pkt in batch:
+			if pkt.type == "RAT":
+				receiver.process_pkt(pkt)
+			else:
+				flow = (pkt.src, pkt.dst)
+				if flow in attack_traffic:
+					attack_traffic[flow].attack_volume += pkt.attack_volume
+				else:
+					attack_traffic[flow] = pkt
+
+		for pkt in attack_traffic.values():
+			receiver.process_pkt(pkt)
+
+	def create_AS_logger(self, asn):
+		"""
+		Creates the individual logger of an AS.
+
+		:param asn: the ASN of the AS
+		:type asn: int
+
+		:returns: the logger
+		:rtype: logging.RootLogger
+		"""
+		return self.create_logger_func(
+			f"AS{asn}-LOGGER",
+			f"{self.log_subpath}/log_node_{asn}.txt"
+		)
+
+
+	def recording_path(self, name):
+		"""
+		:param name: the name of a recording
+		:type name: str
+
+		:returns: the path of the file the recording is written to, None if
+			recordings are kept in memory
+		:rtype: str
+		"""
+		if self.recording_chunk_size is None:
+			return None
+		return f"{self.log_subpath}/recordings/{name}.npy"
+
+
+	def create_recorder(self, name, dtype=RECORD_DTYPE):
+		"""
+		Creates a recorder for the recording of the network or one of its
+		ASes with the given name.
+
+		:param name: the name of the recording, unique in the network
+		:param dtype: the type of the records
+
+		:type name: str
+		:type dtype: np.dtype
+
+		:returns: the recorder
+		:rtype: Recorder
+		"""
+		return Recorder(dtype, self.recording_path(name), self.recording_chunk_size or 1 << 16)
+
+
+	def recorders(self):
+		"""
+		:returns: all recorders of the network, its materialized ASes (the
+			recordings of all other ASes are empty) and its ensemble, by name
+		:rtype: dict[str, Recorder]
+		"""
+		recorders = {name: value for name, value in self.plot_values.items() if isinstance(value, Recorder)}
+		for AS in self.ASes.materialized():
+			recorders.update({
+				f"AS{AS.asn}_{name}": value
+				for name, value in vars(AS).items() if isinstance(value, Recorder)
+			})
+		if self.ensemble is not None:
+			recorders.update(self.ensemble.recorders())
+		return recorders
+
+
+	def close_recordings(self):
+		"""
+		Closes the files of all recorders (see "Recorder.close"), such that
+		they hold all records, once the simulation has ended.
+		"""
+		for recorder in self.recorders().values():
+			recorder.close()
+
+
+	def redirect_output(self, network_logger, create_logger_func, log_subpath,
+						figure_subpath, event_trace=None):
+		"""
+		Directs the logs, figures, recordings and the event trace of this
+		network, and of all its ASes, to new destinations, e.g., after it was
+		restored from a checkpoint (see "checkpoint.py").
+
+		:param network_logger: the logger of the network
+		:param create_logger_func: the function to create the loggers of the
+			ASes with
+		:param log_subpath: path to store logs
+		:param figure_subpath: path to store figures
+		:param event_trace: if given, all sent and received packets are
+			recorded in it
+
+		:type network_logger: logging.RootLogger
+		:type create_logger_func: callable
+		:type log_subpath: str
+		:type figure_subpath: str
+		:type event_trace: event_trace.EventTrace
+		"""
+		self.logger = network_logger
+		self.create_logger_func = create_logger_func
+		self.log_subpath = log_subpath
+		self.figure_subpath = figure_subpath
+		self.event_trace = event_trace
+		for AS in self.ASes.materialized():
+			AS.logger = AS.router_table.logger = self.create_AS_logger(AS.asn)
+		for name, recorder in self.recorders().items():
+			recorder.relocate(self.recording_path(name))
+
+
+	def __getstate__(self):
+		# the loggers are pickled by their name, but their configuration, the
+		# function creating them and the open event trace are left behind
+		state = vars(self).copy()
+		state["create_logger_func"] = None
+		state["event_trace"] = None
+		return state
+
 
 	def get_atk_path_predecessors(self, node):
 		if node in self.source.as_path_to_victim:
@@ -202,6 +556,77 @@ class Internet(object):
 		else:
 			return []
 
+	def public_asn(self, asn):
+		"""
+		:param asn: the ASN of an AS in the simulation, i.e., its node in the
+			initial graph
+		:type asn: int
+
+		:returns: the ASN of the AS in the AS-relationship file it was read
+			from (see "as_relationships.py"), or the given one for generated
+			topologies
+		:rtype: int
+		"""
+		return self.init_graph.nodes[asn].get("asn", asn)
+
+	def routing_cache_statistics(self):
+		"""
+		Collects the number of memoized (hits) and recomputed (misses)
+		forwarding decisions over the routing tables of all materialized ASes.
+
+		:returns: a dictionary with the total hits and misses
+		:rtype: dict[str, int]
+		"""
+		return {
+			"hits": sum(AS.router_table.cache_hits for AS in self.ASes.materialized()),
+			"misses": sum(AS.router_table.cache_misses for AS in self.ASes.materialized())
+		}
+
+	def rat_statistics(self):
+		"""
+		Collects the number of forwarded and suppressed (i.e., not
+		broadcasted again, since already seen) RAT messages over all ASes,
+		by protocol; ASes that are not materialized have not seen any.
+
+		:returns: a dictionary with the forwarded and suppressed messages
+		:rtype: dict[str, dict[str, int]]
+		"""
+		forwarded = Counter()
+		suppressed = Counter()
+		for AS in self.ASes.materialized():
+			forwarded.update(AS.forwarded_rats)
+			suppressed.update(AS.suppressed_rats)
+		return {"forwarded": dict(forwarded), "suppressed": dict(suppressed)}
+
+	def kpi_summary(self):
+		"""
+		Collects the key performance indicators of the simulation so far,
+		which are updated by the victim and allies while the simulation runs
+		(see "kpis.py"): the load of the victim and how long it was above its
+		scrubbing capability, the time from the help signal until the split
+		of the attack traffic settled, the utilisation of every ally, the
+		error of the attack volume approximations, and the number of RAT
+		messages sent. None of them needs the recordings, so they can be
+		compared over many simulations without plotting them. ASes are
+		reported by their public ASN (see "public_asn").
+
+		:returns: the indicators, JSON serializable
+		:rtype: dict
+		"""
+		rat_messages = self.rat_statistics()["forwarded"]
+		return {
+			"time": self.env.now,
+			"victim": {"asn": self.public_asn(self.victim.asn), **self.victim.load_kpis.summary(self.env.now)},
+			"allies": [
+				{"asn": self.public_asn(ally.asn), **ally.load_kpis.summary(self.env.now)}
+				for ally in self.allies
+			],
+			"help_time": self.victim.load_kpis.help_time,
+			"help_to_stable_split_latency": self.victim.load_kpis.settling_latency,
+			"estimation_error": self.victim.estimation_kpis.summary(),
+			"rat_messages": {"total": sum(rat_messages.values()), **rat_messages}
+		}
+
 	def relay_rat(self, pkt, next_hops):
 		"""
 		This function is responsible to relay packets of type route
@@ -210,144 +635,109 @@ class Internet(object):
 		:param pkt: the to be transmitted packet
 		:param next_hops_w_perc: the list of next hops to send the package to
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		:type next_hops_w_perc: list[int]
 		"""
 
 		# increase hop counter
-		pkt["content"]["hc"] += 1
+		pkt.hc += 1
 
-		# wait for the propagation delay
-		yield self.env.timeout(self.propagation_delay + random.uniform(-0.01, 0.01))
-		self.logger.debug(f"[{self.env.now}] RAT {pkt['identifier']}  delayed to {next_hops} from {pkt['last_hop']}.")
+		self.logger.debug("[%s] RAT %s  delayed to %s from %s.", self.env.now, pkt.identifier, next_hops, pkt.last_hop)
 
 		# send it to all specified next hops
 		for next_hop in next_hops:
-			tmp_pkt = copy.deepcopy(pkt)
-			tmp_pkt["next_hop"] = next_hop
-			self.ASes[next_hop].process_pkt(tmp_pkt)
+			self.schedule_delivery(pkt.copy(next_hop=next_hop))
 
 
-	def plot(self):
+	def plot(self, show=True, formats=("png", "svg"), dpi=400, max_points=None,
+			 renderer=None):
 		"""
 		This method will aggregated the collected data points to create
 		figures about the recorded attack traffic at the victim and the
 		allies over time.
 
 		Generated figures as saved in the supplied path for figures during
-		initialization of the Internet instance.
+		initialization of the Internet instance. Long series are decimated to
+		their minima and maxima (see "plotting.decimate"), and the figure is
+		rendered by "plotting.render_attack_traffic", either directly or by
+		the background process of a renderer.
+
+		:param show: whether to show the figure; not possible with a renderer
+		:param formats: the file formats to save the figure in
+		:param dpi: the resolution of the figure
+		:param max_points: the maximal number of points plotted per series,
+			None to plot all
+		:param renderer: renders the figure in the background, if given
+
+		:type show: bool
+		:type formats: list[str]
+		:type dpi: int
+		:type max_points: int
+		:type renderer: plotting.FigureRenderer
+
+		:returns: the result of the rendering, if a renderer is given
+		:rtype: concurrent.futures.Future
 		"""
+		if show and renderer is not None:
+			raise Exception("A figure rendered in the background can not be shown!")
+
+		def series(recorder):
+			# the recordings are read as arrays, without copying them
+			records = recorder.array()
+			return decimate(records["time"], records["value"], max_points)
+
+		received = self.victim.received_attacks
+		data = {
+			"source": str(self.source),
+			"victim_asn": self.victim.asn,
+			"scrubbing_capability": self.plot_values["victim_scrubbing_capabilitiy"],
+			"end": received[-1][0] if received else self.env.now,
+			"sent": series(self.source.attack_traffic_recording),
+			"approximations": series(self.plot_values["victim_attack_approximations"]),
+			"t2test": series(self.victim.t2test),
+			"t3test": series(self.victim.t3test),
+			"received": {
+				str(sink): series(sink.received_attacks)
+				for sink in self.allies + [self.victim]
+			},
+			"help_retractments": series(self.plot_values["victim_help_retractment_calls"])
+		}
 
-		plt.figure("DDoS Traffic Recordings", figsize=(16, 10))
-		plt.title("DDoS Traffic Recordings")
-		plt.grid()
-		plt.ylim(0, 2000)
-
-		# plot attack traffic
-		plt.plot(
-			*list(zip(*self.source.attack_traffic_recording)),
-			label=f"Sent by {str(self.source)}",
-			color="black",
-			lw=1.5,
-			ls="dotted"
-		)
-
-		plt.plot(
-			*list(zip(*self.plot_values["victim_attack_approximations"])),
-			label=f"Attack Approximation"
-		)
-
-
-		plt.plot(
-			*list(zip(*self.victim.t2test)),
-			label=f"T2"
-		)
-
-		plt.plot(
-			*list(zip(*self.victim.t3test)),
-			label=f"T3"
-		)
-
-
-		# plot all sinks (victim + allies)
-		for sink in self.allies + [self.victim]:
-			plt.scatter(
-				*list(zip(*sink.received_attacks)),
-				s=1,
-				label=f"Received by {str(sink)}",
-				marker="X"
-			)
-
-		plt.hlines(
-			y=self.plot_values["victim_scrubbing_capabilitiy"],
-			xmin=0,
-			xmax=self.victim.received_attacks[-1][0],
-			color="black",
-			label="victim_scrubbing_capability"
-		)
-
-		"""
-		for tp, val in self.plot_values["victim_help_calls"]:
-			plt.annotate(
-				f"[AS{self.victim.asn}]\nHelp Signal Issued",
-				(tp, val + 15),
-				xytext=(
-					tp,
-					max(val, self.plot_values["victim_scrubbing_capabilitiy"]) + 450
-				),
-				horizontalalignment="center",
-				arrowprops=dict(arrowstyle='-|>', lw=2)
-			)
-		"""
-		for tp, val in self.plot_values["victim_help_retractment_calls"]:
-			plt.annotate(
-				f"[AS{self.victim.asn}]\nHelp Signal Retracted",
-				(tp, val + 15),
-				xytext=(
-					tp,
-					max(val, self.plot_values["victim_scrubbing_capabilitiy"]) + 300
-				),
-				horizontalalignment="center",
-				arrowprops=dict(arrowstyle='-|>', lw=2)
-			)
-
-		plt.legend(loc="upper right", prop={"size": 17}, markerscale=6)
-		plt.tight_layout()
-		plt.savefig(f"{self.figure_subpath}/recorded_attack_traffic.png", dpi=400)
-		plt.savefig(f"{self.figure_subpath}/recorded_attack_traffic.svg", dpi=400)
-		plt.show()
+		path = f"{self.figure_subpath}/recorded_attack_traffic"
+		if renderer is not None:
+			return renderer.submit(render_attack_traffic, data, path, formats, dpi)
+		render_attack_traffic(data, path, formats, dpi, show)
 
 	def generate_networkx_graph(self, changed_edge_color="purple"):
 		"""
 		This method will use the initial networkx graph, and the ASes that run
 		through a simulation, to generate the changed network topology as a
 		networkx and save it as a PyVis html figure in the supplied figure
-		path.
+		path. For large networks, "export_topology_diff" is much cheaper.
 
 		:param changed_edge_color: the color assigned to indicated changed
 			edges
 
 		:type changed_edge_color: str
+
+		:returns: the changed topology
+		:rtype: nx.classes.digraph.DiGraph
 		"""
 
-		# initialize a directed graph
+		# initialize a directed graph; networkx is only needed here, since
+		# the initial graph is given
+		import networkx as nx
 		graph = nx.DiGraph()
 
 		# add the nodes
 		graph.add_nodes_from(range(self.nr_ASes))
 
-		# add the edges, node by node
+		# add the edges the attack traffic is forwarded along
 		for node_indx in range(self.nr_ASes):
 			graph.nodes[node_indx]["role"] = "standard"
 			graph.nodes[node_indx]["color"] = "lightgrey"
-			next_hops_w_perc = self.ASes[node_indx].router_table.determine_next_hops(
-				self.victim.asn
-			)
-			for next_hop, percentage in next_hops_w_perc:
-				if percentage > 0:
-					graph.add_edge(node_indx, next_hop)
-					graph[node_indx][next_hop]["split_percentage"] = percentage
-					graph[node_indx][next_hop]["title"] = percentage
+		for (u, v), percentage in self.forwarding_edges().items():
+			graph.add_edge(u, v, split_percentage=percentage, title=percentage)
 
 
 		# denote the special nodes
@@ -377,9 +767,11 @@ class Internet(object):
 		# only makes sense if the status of the graph at this point is that
 		# it is defending, i.e., allies supporting
 		tmp = []
+		tmp_set = set()
 		for u, v in graph.edges:
-			if (v, u) in list(graph.edges) and not (v, u) in tmp:
+			if graph.has_edge(v, u) and (v, u) not in tmp_set:
 				tmp.append((u, v))
+				tmp_set.add((u, v))
 		for u, v in tmp:
 			if graph.nodes[u]["role"] != "standard":
 				graph.remove_edge(u, v)
@@ -390,10 +782,121 @@ class Internet(object):
 
 		# save figure
 		Internet.save_graph(graph, f"{self.figure_subpath}/generated_graph.html")
+		return graph
+
+
+	def forwarding_edges(self):
+		"""
+		:returns: the edges the attack traffic towards the victim is currently
+			forwarded along, with their split percentages
+		:rtype: dict[tuple[int, int], float]
+		"""
+		return {
+			(asn, next_hop): percentage
+			for asn in range(self.nr_ASes)
+			for next_hop, percentage in self.ASes.next_hops(asn)
+			if percentage > 0
+		}
+
+
+	def topology_diff(self):
+		"""
+		Compares the edges the attack traffic is currently forwarded along to
+		the edges of the initial graph, in time linear in the number of
+		edges, and collects the edges the attack traffic of the source can
+		currently take.
+
+		:returns: the ASNs of the source, victim and allies, and the edges
+			that were "added" (neither they nor their reverse are in the
+			initial graph), "reversed" (only their reverse is in the initial
+			graph) and "removed" (initial edges the attack traffic is not
+			forwarded along in either direction), and the "attack" subgraph,
+			each edge as a [u, v, split percentage] list
+		:rtype: dict
+		"""
+		forwarding = self.forwarding_edges()
+		initial = set(self.init_graph.edges)
+
+		added = []
+		reversed_edges = []
+		for (u, v), percentage in forwarding.items():
+			if (u, v) in initial:
+				continue
+			if (v, u) in initial:
+				reversed_edges.append([u, v, percentage])
+			else:
+				added.append([u, v, percentage])
+		removed = [
+			[u, v, 0]
+			for u, v in self.init_graph.edges
+			if (u, v) not in forwarding and (v, u) not in forwarding
+		]
+
+		# the subgraph reachable from the source along the forwarding edges
+		next_hops = {}
+		for (u, v), percentage in forwarding.items():
+			next_hops.setdefault(u, []).append((v, percentage))
+		attack = []
+		visited = {self.source.asn}
+		stack = [self.source.asn]
+		while stack:
+			u = stack.pop()
+			for v, percentage in next_hops.get(u, []):
+				attack.append([u, v, percentage])
+				if v not in visited:
+					visited.add(v)
+					stack.append(v)
+
+		return {
+			"time": self.env.now,
+			"source": self.source.asn,
+			"victim": self.victim.asn,
+			"allies": [ally.asn for ally in self.allies],
+			"added": added,
+			"reversed": reversed_edges,
+			"removed": removed,
+			"attack": sorted(attack)
+		}
+
+
+	def export_topology_diff(self, path, file_format="json"):
+		"""
+		Saves the changes of the topology and the attack subgraph (see
+		"topology_diff"), either as JSON, or as an edge list with one
+		"<u> <v> <kind> <split percentage>" line per edge, where the kind is
+		"added", "reversed", "removed" or "attack".
+
+		:param path: the path of the file
+		:param file_format: either "json" or "edgelist"
+
+		:type path: str
+		:type file_format: str
+		"""
+		diff = self.topology_diff()
+		with open(path, "w") as file:
+			if file_format == "json":
+				json.dump(diff, file)
+			elif file_format == "edgelist":
+				for kind in ["added", "reversed", "removed", "attack"]:
+					for u, v, percentage in diff[kind]:
+						file.write(f"{u} {v} {kind} {percentage}\n")
+			else:
+				raise Exception(f"Unknown topology format \"{file_format}\"!")
 
 
 	@staticmethod
 	def save_graph(graph, path):
+		"""
+		Renders a graph as an interactive PyVis html figure; PyVis is only
+		imported once a graph is rendered.
+
+		:param graph: the graph
+		:param path: the path of the html file
+
+		:type graph: nx.classes.graph.Graph
+		:type path: str
+		"""
+		from pyvis.network import Network
 		net = Network(
 			notebook=True,
 			directed=True,
@@ -0,0 +1,132 @@
+"""
+Contains the Packet class.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+from types import MappingProxyType
+
+
+class Packet(object):
+	"""
+	This class represents a packet that is sent between autonomous systems,
+	either a standard packet carrying attack load ("STD") or a route
+	advertisement ("RAT").
+
+	The fields that change from hop to hop (last and next hop, hop counter
+	and the, possibly split, attack volume) are attributes of the packet
+	itself, while everything else is kept in a read-only "content" mapping.
+	Relaying a packet to several next hops copies only the per-hop fields
+	and shares the content, so the cost of a copy depends neither on the
+	length of an AS path in the content nor on the number of next hops.
+	Changing the content of a relayed packet creates a new mapping
+	("copy_with_content"), the content of all other copies stays untouched.
+
+	:param identifier: the identifier of the packet
+	:param type: the type of the packet, either "STD" or "RAT"
+	:param src: the ASN that created the packet
+	:param dst: the ASN the packet is addressed to, None for RATs
+	:param last_hop: the ASN that relayed the packet last
+	:param next_hop: the ASN the packet is relayed to
+	:param hc: the hop counter
+	:param attack_volume: the carried attack volume (STD) or the attack
+		volume believed by the victim (RAT), None if not applicable
+	:param content: the read-only, shared content of the packet
+
+	:type identifier: str
+	:type type: str
+	:type src: int
+	:type dst: int
+	:type last_hop: int
+	:type next_hop: int
+	:type hc: int
+	:type attack_volume: float
+	:type content: types.MappingProxyType
+	"""
+
+	__slots__ = (
+		"identifier",
+		"type",
+		"src",
+		"dst",
+		"last_hop",
+		"next_hop",
+		"hc",
+		"attack_volume",
+		"content"
+	)
+
+
+	def __init__(self, identifier, pkt_type, src, dst, last_hop, content,
+				 attack_volume=None, hc=0, next_hop=None):
+		self.identifier = identifier
+		self.type = pkt_type
+		self.src = src
+		self.dst = dst
+		self.last_hop = last_hop
+		self.next_hop = next_hop
+		self.hc = hc
+		self.attack_volume = attack_volume
+		self.content = MappingProxyType(dict(content))
+
+
+	def copy(self, **per_hop_fields):
+		"""
+		Returns a copy of this packet that shares its content, with the given
+		per-hop fields changed.
+
+		:param per_hop_fields: new values for any of "last_hop", "next_hop",
+			"hc" and "attack_volume"
+		:type per_hop_fields: dict
+
+		:returns: the copy
+		:rtype: Packet
+		"""
+		pkt = Packet.__new__(Packet)
+		pkt.identifier = self.identifier
+		pkt.type = self.type
+		pkt.src = self.src
+		pkt.dst = self.dst
+		pkt.last_hop = self.last_hop
+		pkt.next_hop = self.next_hop
+		pkt.hc = self.hc
+		pkt.attack_volume = self.attack_volume
+		pkt.content = self.content
+		for key, value in per_hop_fields.items():
+			setattr(pkt, key, value)
+		return pkt
+
+
+	def copy_with_content(self, **content_fields):
+		"""
+		Returns a copy of this packet with a new content, consisting of the
+		current content updated with the given fields.
+
+		:param content_fields: the content fields to be added or changed
+		:type content_fields: dict
+
+		:returns: the copy
+		:rtype: Packet
+		"""
+		pkt = self.copy()
+		pkt.content = MappingProxyType({**self.content, **content_fields})
+		return pkt
+
+
+	def __getstate__(self):
+		# the read-only content can not be pickled itself, e.g., to send a
+		# packet to another process
+		state = {key: getattr(self, key) for key in self.__slots__}
+		state["content"] = dict(self.content)
+		return state
+
+
+	def __setstate__(self, state):
+		for key, value in state.items():
+			setattr(self, key, value)
+		self.content = MappingProxyType(self.content)
+
+
+	def __repr__(self):
+		return "Packet(" + ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__[:-1]) + f", content={dict(self.content)!r})"
@@ -0,0 +1,298 @@
+"""
+Contains the Recorder class.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import os
+import numpy as np
+
+from ..event_trace import HEADER_SIZE, npy_header
+
+
+# the (time, value) records most recordings consist of
+RECORD_DTYPE = np.dtype([("time", np.float64), ("value", np.float64)])
+
+# the number of records a recorder starts with, before it grows
+INITIAL_CAPACITY = 64
+
+
+class Recorder(object):
+	"""
+	Records a series of data points (e.g., the received attack volume over
+	time) into a numpy buffer, instead of a list of tuples.
+
+	If a path is given, the buffer grows up to "chunk_size" records, and is
+	appended to a .npy file whenever it is full, such that the memory used by
+	a recording is bounded, no matter how long the simulation runs. The file
+	always holds a valid header, so it can be memory-mapped through
+	"np.load(path, mmap_mode='r')" while the simulation is running.
+	Without a path, the buffer just keeps growing.
+
+	A recorder can be used like the list it replaces: it supports "append",
+	"len", iteration and indexing, where single records are returned as
+	tuples (or floats, for a plain dtype). Slices, and "array", return numpy
+	arrays instead, which are views of the buffer or of the memory-mapped
+	file, i.e., they are not copied, but are only valid until the next
+	record is appended. A slice that covers both the file and the buffer is
+	copied; reading never writes to the file.
+
+	A pickled recorder (e.g., in a checkpoint) contains the path of its file,
+	the number of records in it, and only its buffered records, such that
+	pickling takes memory in the chunk size, no matter how long the
+	recording is. The file therefore has to be kept until the unpickled
+	recorder continues, which only uses the records the pickled one had
+	written to it, even if that one wrote more afterwards (see "spill" and
+	"relocate").
+
+	:param dtype: the type of the records
+	:param path: the path of the .npy file, None to keep all records in
+		memory
+	:param chunk_size: the maximal number of records kept in memory, if a
+		path is given
+	:param buffer: the records not in the file yet, followed by free space
+	:param nr_buffered: the number of records in the buffer
+	:param nr_spilled: the number of records in the file
+	:param file: the open file, None until the first chunk is written, and
+		after the recorder was closed
+	:param spilled: the memory-mapped records of the file, None if they
+		were not mapped yet, or changed since
+
+	:type dtype: np.dtype
+	:type path: str
+	:type chunk_size: int
+	:type buffer: np.ndarray
+	:type nr_buffered: int
+	:type nr_spilled: int
+	:type file: io.BufferedWriter
+	:type spilled: np.memmap
+	"""
+
+
+	def __init__(self, dtype=RECORD_DTYPE, path=None, chunk_size=1 << 16):
+		self.dtype = np.dtype(dtype)
+		self.path = path
+		self.chunk_size = chunk_size
+		self.buffer = np.empty(min(INITIAL_CAPACITY, chunk_size), dtype=self.dtype)
+		self.nr_buffered = 0
+		self.nr_spilled = 0
+		self.file = None
+		self.spilled = None
+
+
+	def append(self, record):
+		"""
+		Records a data point.
+
+		:param record: the data point, e.g., a (time, value) tuple
+		:type record: tuple | float
+		"""
+		if self.nr_buffered == len(self.buffer):
+			self.make_room()
+		self.buffer[self.nr_buffered] = record
+		self.nr_buffered += 1
+
+
+	def make_room(self):
+		"""
+		Writes the full buffer to the file if a path is given and the buffer
+		reached the chunk size, and otherwise doubles its size.
+		"""
+		if self.path is not None and self.nr_buffered >= self.chunk_size:
+			self.spill()
+			if len(self.buffer) > self.chunk_size:
+				self.buffer = np.empty(self.chunk_size, dtype=self.dtype)
+			return
+
+		capacity = max(2 * len(self.buffer), INITIAL_CAPACITY)
+		if self.path is not None:
+			capacity = min(capacity, self.chunk_size)
+		buffer = np.empty(capacity, dtype=self.dtype)
+		buffer[:self.nr_buffered] = self.buffer[:self.nr_buffered]
+		self.buffer = buffer
+
+
+	def spill(self):
+		"""
+		Appends the buffered records to the file, and updates its header.
+		"""
+		if self.file is None and self.nr_spilled:
+			# the file was closed, or this recorder was unpickled; the
+			# recording continues after its own records, and drops the ones
+			# another recorder appended to the same file since
+			self.file = open(self.path, "r+b")
+			self.file.seek(HEADER_SIZE + self.nr_spilled * self.dtype.itemsize)
+			self.file.truncate()
+		elif self.file is None:
+			os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+			self.file = open(self.path, "wb")
+			self.file.write(npy_header(0, self.dtype))
+
+		self.file.write(self.buffer[:self.nr_buffered].tobytes())
+		self.nr_spilled += self.nr_buffered
+		self.nr_buffered = 0
+
+		self.file.seek(0)
+		self.file.write(npy_header(self.nr_spilled, self.dtype))
+		self.file.seek(0, os.SEEK_END)
+		self.file.flush()
+		self.spilled = None
+
+
+	def close(self):
+		"""
+		Writes the buffered records to the file, if records were written to
+		it before, and closes it, e.g., at the end of a simulation. The file
+		then holds all records; recording can continue afterwards, which
+		opens it again.
+		"""
+		if not self.nr_spilled:
+			return
+		if self.nr_buffered:
+			self.spill()
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+
+
+	def spilled_records(self):
+		"""
+		:returns: the records in the file, memory-mapped
+		:rtype: np.memmap
+		"""
+		if self.spilled is None:
+			self.spilled = np.load(self.path, mmap_mode="r")[:self.nr_spilled]
+		return self.spilled
+
+
+	def chunks(self):
+		"""
+		:returns: all records, as the memory-mapped records of the file (if
+			any) and the buffered ones, without copying them
+		:rtype: list[np.ndarray]
+		"""
+		chunks = [self.buffer[:self.nr_buffered]]
+		if self.nr_spilled:
+			chunks.insert(0, self.spilled_records())
+		return chunks
+
+
+	def array(self):
+		"""
+		Returns all records as one array, without copying them: the buffered
+		records if none are in the file, and otherwise the memory-mapped file,
+		after the buffered records are written to it.
+
+		:returns: all records
+		:rtype: np.ndarray
+		"""
+		if not self.nr_spilled:
+			return self.buffer[:self.nr_buffered]
+		if self.nr_buffered:
+			self.spill()
+		return self.spilled_records()
+
+
+	def relocate(self, path):
+		"""
+		Continues the recording in another file, e.g., after the network was
+		restored from a checkpoint; the records in the current file are
+		copied into it chunk by chunk, or into memory if no path is given.
+
+		:param path: the path of the new .npy file, None to keep all records
+			in memory
+		:type path: str
+		"""
+		if path == self.path:
+			return
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+
+		buffered = self.buffer[:self.nr_buffered].copy()
+		if self.nr_spilled and path is None:
+			buffered = np.concatenate([self.spilled_records(), buffered])
+		elif self.nr_spilled:
+			os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+			spilled = self.spilled_records()
+			with open(path, "wb") as file:
+				file.write(npy_header(self.nr_spilled, self.dtype))
+				for start in range(0, self.nr_spilled, self.chunk_size):
+					file.write(spilled[start:start + self.chunk_size].tobytes())
+		self.__setstate__({
+			"dtype": self.dtype,
+			"path": path,
+			"chunk_size": self.chunk_size,
+			"nr_spilled": self.nr_spilled if path is not None else 0,
+			"records": buffered
+		})
+
+
+	def __len__(self):
+		return self.nr_spilled + self.nr_buffered
+
+
+	def __getitem__(self, key):
+		if isinstance(key, (int, np.integer)):
+			indx = key + len(self) if key < 0 else key
+			if not 0 <= indx < len(self):
+				raise IndexError("Recorder index out of range")
+			if indx >= self.nr_spilled:
+				return self.buffer[indx - self.nr_spilled].item()
+			return self.spilled_records()[indx].item()
+
+		start, stop, step = key.indices(len(self))
+		indices = range(start, stop, step)
+		if not indices:
+			return self.buffer[:0]
+		if min(indices[0], indices[-1]) >= self.nr_spilled:
+			records, offset = self.buffer[:self.nr_buffered], self.nr_spilled
+		elif max(indices[0], indices[-1]) < self.nr_spilled:
+			records, offset = self.spilled_records(), 0
+		else:
+			# the slice covers the file and the buffer, so it is copied
+			indices = np.arange(start, stop, step)
+			spilled = indices < self.nr_spilled
+			records = np.empty(len(indices), dtype=self.dtype)
+			records[spilled] = self.spilled_records()[indices[spilled]]
+			records[~spilled] = self.buffer[indices[~spilled] - self.nr_spilled]
+			return records
+		stop -= offset
+		return records[start - offset:stop if stop >= 0 else None:step]
+
+
+	def __iter__(self):
+		for chunk in self.chunks():
+			yield from chunk.tolist()
+
+
+	def __eq__(self, other):
+		if isinstance(other, (Recorder, list, tuple)):
+			return list(self) == list(other)
+		return NotImplemented
+
+
+	def __repr__(self):
+		return f"Recorder({list(self)!r})"
+
+
+	def __getstate__(self):
+		return {
+			"dtype": self.dtype,
+			"path": self.path,
+			"chunk_size": self.chunk_size,
+			"nr_spilled": self.nr_spilled,
+			"records": self.buffer[:self.nr_buffered]
+		}
+
+
+	def __setstate__(self, state):
+		self.dtype = state["dtype"]
+		self.path = state["path"]
+		self.chunk_size = state["chunk_size"]
+		self.buffer = state["records"]
+		self.nr_buffered = len(self.buffer)
+		self.nr_spilled = state["nr_spilled"]
+		self.file = None
+		self.spilled = None
@@ -5,11 +5,10 @@ Author:
 	Devrim Celik 08.06.2022
 """
 
+from collections import Counter, defaultdict
 import numpy as np
-import pandas as pd
 
 
-# TODO needs to handle empty
 class RoutingTable():
 	"""
 	This class represents a routing table of a BGP router.
@@ -21,18 +20,46 @@ class RoutingTable():
 	Generally, within the table, we differentiate between "original" entries (entries added before help call was issued)
 	and newly added ones by "allies".
 
-
-	:param env: simpy environment on which simulation is running
-	:param table: contains the routes
+	The routes are not kept in a pd.DataFrame, but in preallocated numpy arrays, one per numeric column, of which only
+	the first "size" rows are in use. Appending a route is therefore amortized O(1), and priority/activation changes
+	are done in place. The "origin" column is integer coded: "original" entries are stored as
+	__original_origin_code__, and "ally_<asn>" entries are stored as <asn>.
+
+	Since the table changes rarely compared to how often it is read, the forwarding decisions are memoized: every
+	change of the routes or their split percentages increases the "version" of the table, and
+	"determine_next_hops"/"determine_highest_original" only recompute their result if it was calculated for an older
+	version.
+
+	The split percentages are calculated incrementally: the table keeps running totals of the number of original and
+	ally routes per priority, of the scrubbing capabilities times activation per priority and of all scrubbing
+	capabilities. Changing the priority or activation of some routes only adjusts these totals for the changed routes,
+	and "update" only recomputes the split percentages that are affected.
+
+	:param env: the scheduler on which the simulation is running
+	:param network: the network this routing table is part of
+	:param columns: contains the numeric columns of the routes, by key
+	:param identifiers: the identifier column of the routes
+	:param as_paths: the as_path column of the routes
+	:param size: the number of routes in the table
 	:param asn: the autonomous system number of the AS that this router serves in
 	:param logger: a logger
 	:param attack_vol_on_victim: the current believe on the attack volume of the DDoS attack on the victim
-
-	:type env: simpy.Environment
-	:type table: pd.DataFrame
+	:param version: increased with every change of the table, used to invalidate memoized results
+	:param cache_hits: number of forwarding decisions answered from the memoized results
+	:param cache_misses: number of forwarding decisions that had to be recomputed
+
+	:type env: scheduler.SimpyScheduler | scheduler.HeapScheduler
+	:type network: network.Internet
+	:type columns: dict[str, np.ndarray]
+	:type identifiers: list[str]
+	:type as_paths: list[list[int]]
+	:type size: int
 	:type asn: int
 	:type logger: logging.RootLogger
 	:type attack_vol_on_victim: float
+	:type version: int
+	:type cache_hits: int
+	:type cache_misses: int
 	"""
 
 	__available_origins__ = [
@@ -53,6 +80,18 @@ class RoutingTable():
 		"time_added",
 	]
 
+	__numeric_keys__ = {
+		"next_hop": np.int64,
+		"destination": np.int64,
+		"priority": np.int64,
+		"split_percentage": np.float64,
+		"scrubbing_capabilities": np.float64,
+		"origin": np.int64,
+		"recvd_from": np.int64,
+		"time_added": np.float64,
+		"activation": np.float64,
+	}
+
 	__priority_table__ = {
 		"unused_original": 1,
 		"initial_used_original": 2,
@@ -61,130 +100,475 @@ class RoutingTable():
 		"not_splitting_ally": 1
 	}
 
+	__original_origin_code__ = -1
+
+	__minimum_capacity__ = 4
+
 
 	def __init__(self, env, network, initial_entries, asn, logger):
 
 		# set attributes
 		self.env = env
 		self.network = network
-		self.table = pd.DataFrame(initial_entries) if len(initial_entries) != 0 else pd.DataFrame(
-			columns=self.__available_keys__
-		)
-		self.table["activation"] = 1.0
+		self.size = 0
+		self.columns = {
+			key: np.zeros(max(len(initial_entries), self.__minimum_capacity__), dtype=dtype)
+			for key, dtype in self.__numeric_keys__.items()
+		}
+		self.identifiers = []
+		self.as_paths = []
 		self.asn = asn
 		self.logger = logger
 		self.attack_vol_on_victim = None
 		self.victim_scrubbing_capability = None
 		self.splitting_node = False
 
-		# for printing
-		self.new_line = "\n"
-		self.tab = "\t"
-		self.string_first_last_line = "+--+----------+----+--------+-----+---+-----+-------------+-------------+"
-		self.string_middle_line = "+" + "-" * (len(self.string_first_last_line) - 2) + "+"
-
-		self.starting_entry_nr = len(self.table)
+		# for memoizing forwarding decisions
+		self.version = 0
+		self.cache_hits = 0
+		self.cache_misses = 0
+		self.next_hops_cache = {}
+		self.highest_original_cache = (-1, [])
+
+		# for the incremental split calculation
+		self.nr_originals_by_priority = Counter()
+		self.nr_allies_by_priority = Counter()
+		self.support_by_priority = defaultdict(float)
+		self.scrubbing_capabilities_total = 0.0
+		self.changed_rows = set()
+		self.structure_changed = False
+		self.split_state = None
+
+		for entry in initial_entries:
+			self._append(entry)
+
+		self.starting_entry_nr = self.size
 		self.nr_extra_entries_max = 0
 
 
-		if len(self.table) != 0:
+		if self.size != 0:
 			self.update()
 
 
+	def __len__(self):
+		return self.size
+
+
+	def column(self, key):
+		"""
+		Returns the in-use part of a numeric column. The returned array is a
+		view, which must not be written to; changes go through the
+		mutating methods, which keep the running totals of the split
+		calculation and the memoized forwarding decisions consistent.
+
+		:param key: the name of the column, one of "__numeric_keys__"
+		:type key: str
+
+		:returns: the column values of all routes
+		:rtype: np.ndarray
+		"""
+		return self.columns[key][:self.size]
+
+
+	@classmethod
+	def encode_origin(cls, origin):
+		"""
+		Translates an origin string ("original" or "ally_<asn>") to its
+		integer code.
+
+		:param origin: the origin string
+		:type origin: str
+
+		:returns: the origin code
+		:rtype: int
+		"""
+		if origin == "original":
+			return cls.__original_origin_code__
+		return int(origin.split("_")[-1])
+
+
+	@classmethod
+	def decode_origin(cls, origin_code):
+		"""
+		Translates an integer origin code back to its origin string.
+
+		:param origin_code: the origin code
+		:type origin_code: int
+
+		:returns: the origin string
+		:rtype: str
+		"""
+		if origin_code == cls.__original_origin_code__:
+			return "original"
+		return f"ally_{origin_code}"
+
+
+	def _append(self, entry):
+		"""
+		Appends an entry to the end of the columns, doubling their capacity
+		if necessary. Does not update the split percentages.
+
+		:param entry: the new entry, need value for keys described
+			in "__available_keys__"
+		:type entry: dict
+		"""
+		if self.size == len(self.columns["priority"]):
+			for key, values in self.columns.items():
+				grown = np.zeros(2 * len(values), dtype=values.dtype)
+				grown[:self.size] = values[:self.size]
+				self.columns[key] = grown
+
+		for key in self.__numeric_keys__:
+			if key == "origin":
+				value = self.encode_origin(entry["origin"])
+			elif key == "activation":
+				value = entry.get("activation", 1.0)
+			else:
+				value = entry[key]
+			self.columns[key][self.size] = value
+		self.identifiers.append(entry["identifier"])
+		self.as_paths.append(entry["as_path"])
+		self.size += 1
+
+		self._account([self.size - 1], 1)
+		self.structure_changed = True
+
+
+	def _keep(self, mask):
+		"""
+		Removes all routes for which the given mask is False, keeping the
+		order of the remaining ones. Does not update the split percentages.
+
+		:param mask: boolean mask over the routes in the table
+		:type mask: np.ndarray
+		"""
+		kept = np.flatnonzero(mask)
+		if len(kept) == self.size:
+			return
+		for key, values in self.columns.items():
+			values[:len(kept)] = values[kept]
+		self.identifiers = [self.identifiers[indx] for indx in kept]
+		self.as_paths = [self.as_paths[indx] for indx in kept]
+		self.size = len(kept)
+
+		self._recount()
+		self.structure_changed = True
+
+
+	def _set(self, key, mask, value):
+		"""
+		Sets the given numeric column to a value for all routes selected by
+		the mask, and adjusts the running totals for the routes whose value
+		actually changed. Does not update the split percentages.
+
+		:param key: the column, either "priority" or "activation"
+		:param mask: boolean mask over the routes in the table
+		:param value: the new value
+
+		:type key: str
+		:type mask: np.ndarray
+		:type value: float
+		"""
+		changed = np.flatnonzero(mask & (self.column(key) != value))
+		if len(changed):
+			self._account(changed, -1)
+			self.columns[key][changed] = value
+			self._account(changed, 1)
+			self.changed_rows.update(changed.tolist())
+
+
+	def _account(self, rows, sign):
+		"""
+		Adds (sign=1) or removes (sign=-1) the given routes to/from the
+		running totals, i.e., the number of original and ally routes per
+		priority, the scrubbing capabilities times activation per priority
+		and the summed up scrubbing capabilities.
+
+		:param rows: indices of the routes
+		:param sign: whether to add or remove them
+
+		:type rows: list[int]
+		:type sign: int
+		"""
+		for origin, priority, scrubbing_capabilities, activation in zip(
+			self.columns["origin"][rows].tolist(),
+			self.columns["priority"][rows].tolist(),
+			self.columns["scrubbing_capabilities"][rows].tolist(),
+			self.columns["activation"][rows].tolist()
+		):
+			if origin == self.__original_origin_code__:
+				self.nr_originals_by_priority[priority] += sign
+			else:
+				self.nr_allies_by_priority[priority] += sign
+			self.support_by_priority[priority] += sign * scrubbing_capabilities * activation
+			self.scrubbing_capabilities_total += sign * scrubbing_capabilities
+
+
+	def _recount(self):
+		"""
+		Recomputes all running totals (see "_account") from scratch.
+		"""
+		self.nr_originals_by_priority = Counter()
+		self.nr_allies_by_priority = Counter()
+		self.support_by_priority = defaultdict(float)
+		self.scrubbing_capabilities_total = 0.0
+		self._account(np.arange(self.size), 1)
+
+
+	def _determine_case(self):
+		"""
+		Determines, using the running totals, which case of the split
+		calculation applies (see "update") and what the highest priority in
+		the table is.
+
+		:returns: the case (1, 2 or 3) and the highest priority
+		:rtype: tuple[int, int]
+		"""
+		highest = max(
+			priority for priority in self.nr_originals_by_priority + self.nr_allies_by_priority
+		)
+		if not self.nr_allies_by_priority[highest]:
+			return 1, highest
+		elif not self.nr_originals_by_priority[highest]:
+			return 2, highest
+		else:
+			return 3, highest
+
+
 	def update(self):
 		"""
 		The key method of the "RoutingTable" class. Using the route entries in
 		its "table" attribute, this method determines the used path(s) toward
 		the victim, with adequate split percentages when multipathing is
 		necessary.
+
+		The split percentages are only recomputed as far as necessary: if
+		neither the routes, nor the case, the highest priority or the
+		incoming traffic magnitude changed, nothing is done; if only some
+		routes changed their priority or activation, only those routes (and
+		the remainder of the highest original entry) are recomputed.
 		"""
-		if len(self.table):
-			# start by resetting split percentages
-			self.table["split_percentage"] = 0
-
-			# case 1: we do not have any allies (that have a high priority)
-			# in which case the original with the highest priority get
-			# 100 percent
-			if not self.table[self.table["priority"] == self.table["priority"].max()]["origin"].str.contains("ally").any():
-				self.table.loc[self.table["priority"] == self.table["priority"].max(), "split_percentage"] = 1.0
-			# case 2: we have allies, and they are the only ones with the
-			# highest priority, in which case we split proportionally
-			elif self.table[self.table["priority"] == self.table["priority"].max()]["origin"].str.contains("ally").all():
-				self.table["split_percentage"] = self.table.apply(
-					lambda row: row["scrubbing_capabilities"] / self.table["scrubbing_capabilities"].sum(),
-					axis=1
-				)
-			# case 3: we have allies and an original entry that both
-			# should be used; in this case, distribute to the allies
-			# proportionally to the attack volume, and the rest goes to
-			# the victim
-			else:
+		if self.size:
+			case, highest = self._determine_case()
+
+			incoming_taffic_magnitude = None
+			if case == 3:
 				# variables used
-				tmp = self.table[(self.table["origin"].str.contains("ally").any()) & (self.table["priority"] != 3)]
-				traffic_amount_already_split_away = (tmp["scrubbing_capabilities"] * tmp["activation"]).sum()
-				tmp = self.table[(self.table["origin"].str.contains("ally").any()) & (self.table["priority"] == 3)]
-				traffic_amount_split_away_here = (tmp["scrubbing_capabilities"] * tmp["activation"]).sum()
+				splitting_ally = self.__priority_table__["splitting_ally"]
+				traffic_amount_already_split_away = sum(
+					support for priority, support in self.support_by_priority.items() if priority != splitting_ally
+				)
+				traffic_amount_split_away_here = self.support_by_priority[splitting_ally]
 
 				# calculate the amount of arriving traffic, by subracting
 				# ally scrubbing capabilities that receive before on the
 				# attack path
 				incoming_taffic_magnitude = max(self.attack_vol_on_victim - traffic_amount_already_split_away, self.victim_scrubbing_capability)
-				self.logger.info(f"ROUTER| ALREADY {traffic_amount_already_split_away} HERE {traffic_amount_split_away_here} INC {incoming_taffic_magnitude}]")
+				self.logger.info("ROUTER| ALREADY %s HERE %s INC %s]", traffic_amount_already_split_away, traffic_amount_split_away_here, incoming_taffic_magnitude)
 				# if splitting away to the allies leaves less to the victim than it can handle,
 				# then do this
 				incoming_taffic_magnitude = max(incoming_taffic_magnitude, traffic_amount_split_away_here)
 
-				# set the allies
-				self.table["split_percentage"] = self.table.apply(
-					lambda row: row["activation"] * row["scrubbing_capabilities"] / incoming_taffic_magnitude if row["priority"] == 3 else 0,
-					axis=1
-				)
+			split_state = (case, highest, incoming_taffic_magnitude)
+			if self.structure_changed or split_state != self.split_state:
+				self._split_all(case, highest, incoming_taffic_magnitude)
+			elif self.changed_rows:
+				self._split_changed(case, highest, incoming_taffic_magnitude)
+			else:
+				self._update_splitting_node()
+				return
+			self.split_state = split_state
 
+			# printing the table is expensive, so the table is only
+			# converted to a string if debug logs are enabled
+			self.logger.debug("[%s] Routing Table:\n%s", self.env.now, self)
 
-				# then the highest original entry
-				self.table.loc[(self.table["origin"] == "original") & (self.table["priority"] == self.table["priority"].max()), "split_percentage"] = 1.0 - self.table["split_percentage"].sum()
+		elif not self.structure_changed:
+			return
 
-			self.logger.debug(f"[{self.env.now}] Routing Table:\n{self}")
+		# invalidate all memoized forwarding decisions
+		self.version += 1
+		self.changed_rows.clear()
+		self.structure_changed = False
 
-		if len(self.table) > 1:
-			self.splitting_node = not bool(set(self.table.loc[self.table["origin"].str.contains("ally")]["recvd_from"].to_list()).intersection(set(self.network.ASes[self.asn].attack_path_predecessors)))
+		self._update_splitting_node()
 
-		self.nr_extra_entries_max = max(len(self.table) - self.starting_entry_nr, self.nr_extra_entries_max)
+		self.nr_extra_entries_max = max(self.size - self.starting_entry_nr, self.nr_extra_entries_max)
 
 		# check to see that percentage is 1.0
-		if len(self.table) > 0 and round(self.table["split_percentage"].sum(), 1) != 1.0:
-			print(f"[{self.asn}] Router Entry Percentages do not add up to 1.0, instead {round(self.table['split_percentage'].sum(), 1)}") # using "yield error" makes thi method not execute at all anymore, without errorrß????????
+		if self.size > 0 and round(self.column("split_percentage").sum(), 1) != 1.0:
+			print(f"[{self.asn}] Router Entry Percentages do not add up to 1.0, instead {round(self.column('split_percentage').sum(), 1)}") # using "yield error" makes thi method not execute at all anymore, without errorrß????????
+
+
+	def _split_all(self, case, highest, incoming_taffic_magnitude):
+		"""
+		Recomputes the split percentages of all routes.
+
+		:param case: the case of the split calculation (see "update")
+		:param highest: the highest priority in the table
+		:param incoming_taffic_magnitude: the traffic arriving at this AS,
+			only used in case 3
+
+		:type case: int
+		:type highest: int
+		:type incoming_taffic_magnitude: float
+		"""
+		priority = self.column("priority")
+		split_percentage = self.column("split_percentage")
+		scrubbing_capabilities = self.column("scrubbing_capabilities")
+
+		# start by resetting split percentages
+		split_percentage[:] = 0
+
+		# case 1: we do not have any allies (that have a high priority)
+		# in which case the original with the highest priority get
+		# 100 percent
+		if case == 1:
+			split_percentage[priority == highest] = 1.0
+		# case 2: we have allies, and they are the only ones with the
+		# highest priority, in which case we split proportionally
+		elif case == 2:
+			split_percentage[:] = scrubbing_capabilities / self.scrubbing_capabilities_total
+		# case 3: we have allies and an original entry that both
+		# should be used; in this case, distribute to the allies
+		# proportionally to the attack volume, and the rest goes to
+		# the victim
+		else:
+			# set the allies
+			splitting_here = priority == self.__priority_table__["splitting_ally"]
+			split_percentage[splitting_here] = scrubbing_capabilities[splitting_here] * self.column("activation")[splitting_here] / incoming_taffic_magnitude
+
+			# then the highest original entry
+			is_original = self.column("origin") == self.__original_origin_code__
+			split_percentage[is_original & (priority == highest)] = 1.0 - split_percentage.sum()
+
+
+	def _split_changed(self, case, highest, incoming_taffic_magnitude):
+		"""
+		Recomputes the split percentages of the routes in "changed_rows",
+		given that the case, the highest priority and the incoming traffic
+		magnitude stayed the same since the last update.
+
+		:param case: the case of the split calculation (see "update")
+		:param highest: the highest priority in the table
+		:param incoming_taffic_magnitude: the traffic arriving at this AS,
+			only used in case 3
+
+		:type case: int
+		:type highest: int
+		:type incoming_taffic_magnitude: float
+		"""
+		rows = np.fromiter(self.changed_rows, dtype=np.int64, count=len(self.changed_rows))
+		priority = self.column("priority")
+		split_percentage = self.column("split_percentage")
+
+		# case 1: only the priority of the changed routes matters
+		if case == 1:
+			split_percentage[rows] = (priority[rows] == highest).astype(np.float64)
+		# case 2: the split only depends on the scrubbing capabilities, which
+		# did not change
+		elif case == 2:
+			pass
+		# case 3: changes of an original route might move the remainder to
+		# another entry, so recompute everything
+		elif (self.column("origin")[rows] == self.__original_origin_code__).any():
+			self._split_all(case, highest, incoming_taffic_magnitude)
+		# case 3: set the changed allies, then give the remainder to the
+		# highest original entry
+		else:
+			splitting_here = priority[rows] == self.__priority_table__["splitting_ally"]
+			split_percentage[rows] = np.where(
+				splitting_here,
+				self.column("scrubbing_capabilities")[rows] * self.column("activation")[rows] / incoming_taffic_magnitude,
+				0.0
+			)
+			is_original = self.column("origin") == self.__original_origin_code__
+			split_percentage[is_original & (priority == highest)] = 1.0 - split_percentage[~is_original].sum()
+
+
+	def _update_splitting_node(self):
+		"""
+		Determines whether this AS is a splitting node, i.e., none of its ally
+		routes were received from its predecessors on the attack path.
+		"""
+		if self.size > 1:
+			is_ally = self.column("origin") != self.__original_origin_code__
+			ally_senders = set(self.column("recvd_from")[is_ally].tolist())
+			# without ally routes, there is nothing to check (which also
+			# happens during the initialization, before the AS exists)
+			self.splitting_node = not ally_senders or not bool(ally_senders.intersection(set(self.network.ASes[self.asn].attack_path_predecessors)))
 
 
 	def determine_next_hops(self, dst):
 		"""
-		Returns a list of next hops towards the victim, with probabilities.
+		Returns a list of next hops towards the destination, with
+		probabilities. The result is memoized per destination until the next
+		change of the table, and must therefore not be modified.
+
+		:param dst: the destination
+		:type dst: int
 
 		:returns: the list of next hop with percentages
 		:rytpe: list[tuple[int, float]]
 		"""
-		return list(
-			self.table[["next_hop", "split_percentage"]].groupby(["next_hop"]).sum().itertuples(
-				index=True,
-				name=None
-			)
+		version, next_hops_w_perc = self.next_hops_cache.get(dst, (-1, None))
+		if version == self.version:
+			self.cache_hits += 1
+			return next_hops_w_perc
+		self.cache_misses += 1
+
+		to_dst = self.column("destination") == dst
+		next_hops, route_to_next_hop = np.unique(self.column("next_hop")[to_dst], return_inverse=True)
+		percentages = np.bincount(
+			route_to_next_hop,
+			weights=self.column("split_percentage")[to_dst],
+			minlength=len(next_hops)
 		)
+		next_hops_w_perc = list(zip(next_hops.tolist(), percentages.tolist()))
+
+		self.next_hops_cache[dst] = (self.version, next_hops_w_perc)
+		return next_hops_w_perc
 
 
 	def determine_highest_original(self):
 		"""
 		Returns the a list containing next hop of the route, that is original
-		and has the highest priority of the originals.
+		and has the highest priority of the originals. The result is memoized
+		until the next change of the table, and must therefore not be modified.
 
 		:returns: a list with the "original" next hop with the highest
 			probability
 		:rtype: list[int]
 
 		"""
-		if len(self.table):
-			return [self.table[self.table["origin"] == "original"].loc[self.table[self.table["origin"] == "original"]["priority"].idxmax()]["next_hop"]]
+		version, highest_original = self.highest_original_cache
+		if version == self.version:
+			self.cache_hits += 1
+			return highest_original
+		self.cache_misses += 1
+
+		originals = np.flatnonzero(self.column("origin") == self.__original_origin_code__)
+		if len(originals):
+			highest = originals[np.argmax(self.column("priority")[originals])]
+			highest_original = [int(self.column("next_hop")[highest])]
 		else:
-			return []
+			highest_original = []
+
+		self.highest_original_cache = (self.version, highest_original)
+		return highest_original
+
+
+	def is_splitting_towards(self, ally):
+		"""
+		Returns whether traffic is currently split towards the given ally.
+
+		:param ally: the asn of the ally
+		:type ally: int
+
+		:returns: whether an entry of the ally has a non-zero split percentage
+		:rtype: bool
+		"""
+		return bool(((self.column("origin") == ally) & (self.column("split_percentage") > 0)).any())
 
 
 	def add_entry(self, entry: dict):
@@ -196,7 +580,7 @@ class RoutingTable():
 			in "__available_keys__"
 		:type entry: dict
 		"""
-		self.table = pd.DataFrame(self.table.to_dict('records') + [entry])
+		self._append(entry)
 		self.update()
 
 
@@ -205,7 +589,7 @@ class RoutingTable():
 		Removes all entries from the table, that originated from an ally, and
 		update the routing table percentages afterwards.
 		"""
-		self.table = self.table[~("ally" in self.table["origin"])]
+		self._keep(self.column("origin") == self.__original_origin_code__)
 		self.update()
 
 	def update_victim_info(self, victim_scrubbing_capability, attack_volume):
@@ -229,7 +613,11 @@ class RoutingTable():
 		:param entry: a asn
 		:type entry: int
 		"""
-		self.table.loc[("ally" in self.table["origin"]) | (self.table["recvd_from"] == asn), "priority"] = self.__priority_table__["not_splitting_ally"]
+		self._set(
+			"priority",
+			(self.column("origin") != self.__original_origin_code__) & (self.column("recvd_from") == asn),
+			self.__priority_table__["not_splitting_ally"]
+		)
 		self.update()
 
 
@@ -240,7 +628,11 @@ class RoutingTable():
 		__priority_table__["split_used_original"].
 		Update the split percentages afterwards
 		"""
-		self.table.loc[(self.table["origin"] == "original") & (self.table["priority"] == self.__priority_table__["initial_used_original"]), "priority"] = self.__priority_table__["split_used_original"]
+		self._set(
+			"priority",
+			(self.column("origin") == self.__original_origin_code__) & (self.column("priority") == self.__priority_table__["initial_used_original"]),
+			self.__priority_table__["split_used_original"]
+		)
 		self.update()
 
 
@@ -251,7 +643,11 @@ class RoutingTable():
 		self.__priority_table__["initial_used_original"].
 		Update the split percentages afterwards.
 		"""
-		self.table.loc[(self.table["origin"] == "original") & (self.table["priority"] == self.__priority_table__["split_used_original"]), "priority"] = self.__priority_table__["initial_used_original"]
+		self._set(
+			"priority",
+			(self.column("origin") == self.__original_origin_code__) & (self.column("priority") == self.__priority_table__["split_used_original"]),
+			self.__priority_table__["initial_used_original"]
+		)
 		self.update()
 
 
@@ -261,7 +657,7 @@ class RoutingTable():
 		the original priority to __priority_table__["initial_used_original"].
 		Update the split percentages afterwards.
 		"""
-		self.table = self.table[self.table["origin"] == "original"]
+		self._keep(self.column("origin") == self.__original_origin_code__)
 		self.attack_vol_on_victim = None
 		self.victim_scrubbing_capability = None
 		self.splitting_node = False
@@ -281,13 +677,44 @@ class RoutingTable():
 		:type ally: int
 		:type activation: float
 		:type delay: float
+
+		:returns: the timer of the change
+		:rtype: scheduler.Timer
+		"""
+		self.logger.info("[%s] Setting Ally %s activation to %s in %s steps.", self.env.now, ally, activation, delay)
+		return self.env.call_later(delay, self.set_activation, ally, activation)
+
+	def set_activation(self, ally, activation):
 		"""
-		self.logger.info(f"[{self.env.now}] Setting Ally {ally} activation to {activation} in {delay} steps.")
-		yield self.env.timeout(delay)
-		
-		self.logger.info(f"[{self.env.now}] Ally {ally} activation set to {activation}.")
-		self.table.loc[self.table.origin == f"ally_{ally}", "activation"] = activation
+		Sets the activation entry of the given ally in the routing table, and
+		updates the routing table.
+
+		:param ally: the asn of the ally
+		:param activation: the activation value to be set
+
+		:type ally: int
+		:type activation: float
+		"""
+		self.logger.info("[%s] Ally %s activation set to %s.", self.env.now, ally, activation)
+		self._set("activation", self.column("origin") == ally, activation)
 		self.update()
 
+	@property
+	def table(self):
+		"""
+		A pd.DataFrame snapshot of the routes, with decoded origins; meant for
+		inspection and printing, changes to it are not reflected in the table.
+
+		:returns: the routes, one row per entry
+		:rtype: pd.DataFrame
+		"""
+		# pandas is slow to import, and only needed here
+		import pandas as pd
+		table = pd.DataFrame({key: self.column(key).copy() for key in self.__numeric_keys__})
+		table["origin"] = [self.decode_origin(origin_code) for origin_code in table["origin"]]
+		table.insert(0, "identifier", self.identifiers)
+		table["as_path"] = self.as_paths
+		return table[self.__available_keys__ + ["activation"]]
+
 	def __str__(self):
 		return self.table.to_markdown()
@@ -0,0 +1,250 @@
+"""
+Contains the Timer, SimpyScheduler and HeapScheduler classes.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import heapq
+import itertools
+from functools import partial
+import simpy
+from simpy.events import URGENT, NORMAL
+
+
+class Timer(object):
+	"""
+	A callback scheduled for a point in simulation time, which can be
+	cancelled until it is called.
+
+	:param time: the simulation time the callback is scheduled for
+	:param callback: the function to call
+	:param args: the arguments to call it with
+	:param cancelled: whether the timer was cancelled
+
+	:type time: float
+	:type callback: callable
+	:type args: tuple
+	:type cancelled: bool
+	"""
+
+	__slots__ = ("time", "callback", "args", "cancelled")
+
+
+	def __init__(self, time, callback, args):
+		self.time = time
+		self.callback = callback
+		self.args = args
+		self.cancelled = False
+
+
+	def cancel(self):
+		"""
+		Prevents the callback from being called; has no effect, if it was
+		already called.
+		"""
+		self.cancelled = True
+
+
+class SimpyScheduler(object):
+	"""
+	The scheduling interface used by the simulation classes, implemented on
+	top of a simpy environment, through its public interface only: the
+	timers of every point in time are kept in a heap, ordered by their
+	priority and the order they were scheduled in, and one simpy timeout per
+	point in time calls them.
+
+	All simulation classes only use "now", "call_later" and "run", such that
+	they run on this scheduler as well as on the "HeapScheduler". Timers
+	scheduled for the same time are called in the order they were
+	scheduled on both, except that urgent timers are called before all
+	other timers of the same time, so both produce the exact same
+	simulation.
+
+	Simpy environments can not be pickled, so a pickled "SimpyScheduler"
+	only keeps its pending timers, and schedules them again, in the same
+	order, in a new environment when it is unpickled.
+
+	:param env: the simpy environment
+	:param timers: the heap of the timers of every pending point in time, as
+		(priority, sequence number, timer) tuples
+	:param sequence: generates the sequence numbers
+	:param nr_events: number of callbacks called so far
+
+	:type env: simpy.Environment
+	:type timers: dict[float, list[tuple[int, int, Timer]]]
+	:type sequence: itertools.count
+	:type nr_events: int
+	"""
+
+
+	def __init__(self, env=None):
+		self.env = simpy.Environment() if env is None else env
+		self.timers = {}
+		self.sequence = itertools.count()
+		self.nr_events = 0
+
+
+	@property
+	def now(self):
+		return self.env.now
+
+
+	def call_later(self, delay, callback, *args, urgent=False):
+		"""
+		Schedules a callback to be called after the given delay.
+
+		:param delay: the delay, in steps
+		:param callback: the function to call
+		:param args: the arguments to call it with
+		:param urgent: whether to call it before all non-urgent timers
+			scheduled for the same time
+
+		:type delay: float
+		:type callback: callable
+		:type args: tuple
+		:type urgent: bool
+
+		:returns: the timer, which can be used to cancel the call
+		:rtype: Timer
+		"""
+		timer = Timer(self.env.now + delay, callback, args)
+		self._schedule(timer, delay, URGENT if urgent else NORMAL)
+		return timer
+
+
+	def _schedule(self, timer, delay, priority):
+		if delay < 0:
+			raise ValueError(f"Negative delay {delay}")
+		timers = self.timers.get(timer.time)
+		if timers is None:
+			# the first timer of this time, which is also reached while the
+			# timers of this time are called
+			timers = self.timers[timer.time] = []
+			self.env.timeout(delay).callbacks.append(partial(self._fire, timer.time))
+		heapq.heappush(timers, (priority, next(self.sequence), timer))
+
+
+	def _fire(self, time, event):
+		timers = self.timers[time]
+		while timers:
+			_, _, timer = heapq.heappop(timers)
+			if not timer.cancelled:
+				self.nr_events += 1
+				timer.callback(*timer.args)
+		del self.timers[time]
+
+
+	def __getstate__(self):
+		return {
+			"now": self.env.now,
+			"nr_events": self.nr_events,
+			"timers": [
+				(priority, timer)
+				for time in sorted(self.timers)
+				for priority, _, timer in sorted(self.timers[time])
+				if not timer.cancelled
+			]
+		}
+
+
+	def __setstate__(self, state):
+		self.env = simpy.Environment(state["now"])
+		self.timers = {}
+		self.sequence = itertools.count()
+		self.nr_events = state["nr_events"]
+		for priority, timer in state["timers"]:
+			self._schedule(timer, timer.time - self.env.now, priority)
+
+
+	def run(self, until=None):
+		"""
+		Runs the simulation; if "until" is given, up to (but excluding) this
+		point in time, otherwise until no timer is left.
+
+		:param until: the end of the simulation
+
+		:type until: float
+		"""
+		if until is None:
+			self.env.run()
+		elif until < self.env.now:
+			raise ValueError(f"Cannot run until {until}, the time is already {self.env.now}")
+		elif until > self.env.now:
+			# simpy stops before the timeouts of that time
+			self.env.run(until=until)
+
+
+class HeapScheduler(object):
+	"""
+	A lightweight alternative to the "SimpyScheduler", which keeps all timers
+	in a plain binary heap, ordered by their time, their priority and the
+	order they were scheduled in, and calls them one after another; there
+	are no simpy events, processes or generators involved.
+
+	:param now: the current simulation time
+	:param queue: the heap of scheduled timers, as (time, priority, sequence
+		number, timer) tuples
+	:param sequence: generates the sequence numbers
+	:param nr_events: number of callbacks called so far
+
+	:type now: float
+	:type queue: list[tuple[float, int, int, Timer]]
+	:type sequence: itertools.count
+	:type nr_events: int
+	"""
+
+
+	def __init__(self):
+		self.now = 0
+		self.queue = []
+		self.sequence = itertools.count()
+		self.nr_events = 0
+
+
+	def call_later(self, delay, callback, *args, urgent=False):
+		"""
+		Schedules a callback to be called after the given delay.
+
+		:param delay: the delay, in steps
+		:param callback: the function to call
+		:param args: the arguments to call it with
+		:param urgent: whether to call it before all non-urgent timers
+			scheduled for the same time
+
+		:type delay: float
+		:type callback: callable
+		:type args: tuple
+		:type urgent: bool
+
+		:returns: the timer, which can be used to cancel the call
+		:rtype: Timer
+		"""
+		if delay < 0:
+			raise ValueError(f"Negative delay {delay}")
+		timer = Timer(self.now + delay, callback, args)
+		heapq.heappush(self.queue, (timer.time, URGENT if urgent else NORMAL, next(self.sequence), timer))
+		return timer
+
+
+	def run(self, until=None):
+		"""
+		Runs the simulation; if "until" is given, up to (but excluding) this
+		point in time, otherwise until no timer is left.
+
+		:param until: the end of the simulation
+
+		:type until: float
+		"""
+		queue = self.queue
+		heappop = heapq.heappop
+		while queue and (until is None or queue[0][0] < until):
+			time, _, _, timer = heappop(queue)
+			if timer.cancelled:
+				continue
+			self.now = time
+			self.nr_events += 1
+			timer.callback(*timer.args)
+
+		if until is not None:
+			self.now = until
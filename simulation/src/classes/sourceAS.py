@@ -9,6 +9,7 @@ import random
 import math
 
 from .autonomous_system import AutonomousSystem
+from .packet import Packet
 
 
 class SourceAS(AutonomousSystem):
@@ -21,11 +22,13 @@ class SourceAS(AutonomousSystem):
 	:param as_path_to_victim: the path to the victim, by nodes
 	:param attack_traffic_recording: records the send out attack packets
 		for later plotting
+	:param attack_indx: the number of attack packets sent so far
 
 	:type attack_vol_limits: tuple[int, int]
 	:type attack_freq: float
 	:type as_path_to_victim: list[int]
-	:type attack_traffic_recording:	list[float]
+	:type attack_traffic_recording:	recorder.Recorder
+	:type attack_indx: int
 	"""
 
 	__doc__ += AutonomousSystem.__doc__
@@ -43,7 +46,8 @@ class SourceAS(AutonomousSystem):
 		self.attack_stop = 300
 		self.attack_freq = args[-1]["attack_freq"]
 		self.as_path_to_victim = args[-1]["as_path_to_victim"]
-		self.attack_traffic_recording = []
+		self.attack_traffic_recording = self.network.create_recorder(f"AS{self.asn}_attack_traffic_recording")
+		self.attack_indx = 0
 
 
 
@@ -52,72 +56,74 @@ class SourceAS(AutonomousSystem):
 		This method, once called, will initiate an attack cycle.
 		"""
 
-		self.logger.info(f"[{self.env.now}] Starting attack on {self.as_path_to_victim[-1]} with full strength {self.full_attack_vol} and frequency {self.attack_freq}.")
-
-		atk_indx = 0
-		while True:
-			yield self.env.timeout(self.attack_freq)
-
-			if self.env.now < self.attack_start:
-				attack_volume = random.randint(
-					self.standard_load - 10,
-					self.standard_load + 10
-				)
-			elif self.attack_start <= self.env.now < self.attack_slowdown:
-				attack_volume = self.full_attack_vol - random.randint(
-					0,
-					int(self.full_attack_vol / 15)
-				)
-			elif self.attack_slowdown <= self.env.now < self.attack_stop:
-				attack_volume = max(
-					self.full_attack_vol * (0.95)**(self.env.now - self.attack_slowdown),
-					self.standard_load
-				)
-			elif self.attack_stop <= self.env.now < self.attack_stop + 150:
-				attack_volume = random.randint(
-					self.standard_load - 10,
-					self.standard_load + 10
-				)
-			elif self.attack_stop + 150 <= self.env.now < self.attack_start + self.attack_stop + 150:
-				attack_volume = random.randint(
-					self.standard_load - 10,
-					self.standard_load + 10
-				)
-			elif self.attack_start + self.attack_stop + 150 <= self.env.now < self.attack_slowdown + self.attack_stop + 150:
-				attack_volume = self.full_attack_vol - random.randint(
-					0,
-					int(self.full_attack_vol / 15)
-				)
-			elif self.attack_slowdown + self.attack_stop + 150 <= self.env.now < self.attack_stop + self.attack_stop + 150:
-				attack_volume = max(
-					self.full_attack_vol * (0.95)**(self.env.now - (self.attack_slowdown + self.attack_stop + 150)),
-					self.standard_load)
-			else:
-				attack_volume = random.randint(
-					self.standard_load - 10,
-					self.standard_load + 10
-				)
-			
-
-			self.attack_traffic_recording.append((self.env.now, attack_volume))
-			pkt = {
-				"identifier": f"Attack_Packet_{self.asn}_{atk_indx}",
-				"type": "STD",
-				"src": self.asn,
-				"dst": self.as_path_to_victim[-1],
-				"last_hop": self.asn,
-				"content": {
-					"attack_volume": attack_volume,
-					"relay_type": "next_hop",
-					"hc": 0
-				}
-			}
-
-			self.send_packet(
-				pkt,
-				self.router_table.determine_next_hops(self.as_path_to_victim[-1])
+		self.logger.info("[%s] Starting attack on %s with full strength %s and frequency %s.", self.env.now, self.as_path_to_victim[-1], self.full_attack_vol, self.attack_freq)
+
+		self.env.call_later(self.attack_freq, self.attack)
+
+
+
+	def attack(self):
+		"""
+		Sends one attack packet, and schedules the next one.
+		"""
+		if self.env.now < self.attack_start:
+			attack_volume = random.randint(
+				self.standard_load - 10,
+				self.standard_load + 10
+			)
+		elif self.attack_start <= self.env.now < self.attack_slowdown:
+			attack_volume = self.full_attack_vol - random.randint(
+				0,
+				int(self.full_attack_vol / 15)
+			)
+		elif self.attack_slowdown <= self.env.now < self.attack_stop:
+			attack_volume = max(
+				self.full_attack_vol * (0.95)**(self.env.now - self.attack_slowdown),
+				self.standard_load
 			)
-			atk_indx += 1
+		elif self.attack_stop <= self.env.now < self.attack_stop + 150:
+			attack_volume = random.randint(
+				self.standard_load - 10,
+				self.standard_load + 10
+			)
+		elif self.attack_stop + 150 <= self.env.now < self.attack_start + self.attack_stop + 150:
+			attack_volume = random.randint(
+				self.standard_load - 10,
+				self.standard_load + 10
+			)
+		elif self.attack_start + self.attack_stop + 150 <= self.env.now < self.attack_slowdown + self.attack_stop + 150:
+			attack_volume = self.full_attack_vol - random.randint(
+				0,
+				int(self.full_attack_vol / 15)
+			)
+		elif self.attack_slowdown + self.attack_stop + 150 <= self.env.now < self.attack_stop + self.attack_stop + 150:
+			attack_volume = max(
+				self.full_attack_vol * (0.95)**(self.env.now - (self.attack_slowdown + self.attack_stop + 150)),
+				self.standard_load)
+		else:
+			attack_volume = random.randint(
+				self.standard_load - 10,
+				self.standard_load + 10
+			)
+		
+
+		self.attack_traffic_recording.append((self.env.now, attack_volume))
+		pkt = Packet(
+			f"Attack_Packet_{self.asn}_{self.attack_indx}",
+			"STD",
+			self.asn,
+			self.as_path_to_victim[-1],
+			self.asn,
+			{"relay_type": "next_hop"},
+			attack_volume=attack_volume
+		)
+
+		self.send_packet(
+			pkt,
+			self.router_table.determine_next_hops(self.as_path_to_victim[-1])
+		)
+		self.attack_indx += 1
+		self.env.call_later(self.attack_freq, self.attack)
 
 
 
@@ -129,14 +135,14 @@ class SourceAS(AutonomousSystem):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
-		self.router_table.update_victim_info(pkt["content"]["scrubbing_capability"], pkt["content"]["attack_volume"])
+		self.router_table.update_victim_info(pkt.content["scrubbing_capability"], pkt.attack_volume)
 		
-		if not pkt["src"] in self.helping_nodes:
-			self.helping_nodes.append(pkt["src"])
+		if not pkt.src in self.helping_nodes:
+			self.helping_nodes.append(pkt.src)
 
-		if (pkt["content"]["attacker_asn"] == self.asn):
+		if (pkt.content["attacker_asn"] == self.asn):
 			self.on_attack_path = True
 			self.router_table.increase_original_priority()
 
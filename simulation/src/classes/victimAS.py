@@ -5,10 +5,12 @@ Author:
 	Devrim Celik 08.06.2022
 """
 
-import simpy 
+import bisect
 import numpy as np
 
 from .autonomous_system import AutonomousSystem
+from .packet import Packet
+from .kpis import LoadKPIs, EstimationKPIs
 
 class VictimAS(AutonomousSystem):
 
@@ -18,14 +20,23 @@ class VictimAS(AutonomousSystem):
 
 	:param scrubbing_capability: scrubbing capability of this node
 	:param as_path_to_victim:
+	:param attack_volume_approximations: the approximated attack volume,
+		after every received attack packet
 	:param help_signal_issued: used to recognize, whether a help signal
 		has already been issued
 	:param ally_help: for collecting the allies that are helping this vctim
+	:param load_kpis: the indicators of the attack traffic this victim
+		receives
+	:param estimation_kpis: the indicators of the error of the attack volume
+		approximations
 
 	:type scrubbing_capability: int
 	:type as_path_to_victim: list[int]
+	:type attack_volume_approximations: recorder.Recorder
 	:type help_signal_issued: bool
 	:type ally_help: dict
+	:type load_kpis: kpis.LoadKPIs
+	:type estimation_kpis: kpis.EstimationKPIs
 	"""
 
 	__doc__ += AutonomousSystem.__doc__
@@ -40,7 +51,7 @@ class VictimAS(AutonomousSystem):
 		self.as_path_to_victim = []
 		self.attack_src = None
 		# for attack volume approximation
-		self.attack_volume_approximations = []
+		self.attack_volume_approximations = self.network.create_recorder(f"AS{self.asn}_attack_volume_approximations", np.float64)
 		self.expected_attack_volume = self.scrubbing_capability
 		self.alpha_ewa = 0.3
 		self.accelerator = 0.0
@@ -56,14 +67,19 @@ class VictimAS(AutonomousSystem):
 		self.last_help = -10000000
 		self.help_signal_issued = False
 		self.new_signal_threshold = 25
-		self.help_process = None
+		self.help_timer = None
+		self.activation_timers = []
 		# for ally activation
 		self.ally_activation_recordings = []
 		self.ally_activation = 1.0
 		self.ally_help_info = {}
 
-		self.t2test = []
-		self.t3test = []
+		self.t2test = self.network.create_recorder(f"AS{self.asn}_t2test")
+		self.t3test = self.network.create_recorder(f"AS{self.asn}_t3test")
+
+		# key performance indicators
+		self.load_kpis = LoadKPIs(self.scrubbing_capability)
+		self.estimation_kpis = EstimationKPIs()
 
 
 	def attack_vol_approximation(self):
@@ -106,19 +122,28 @@ class VictimAS(AutonomousSystem):
 			recent = self.attack_volume_approximations[-1] + self.attack_volume_approximations[-1]* (1 - self.received_attacks[-1][1]/(t2 * (1 - t3))) * 0.1
 		"""
 
-		self.logger.info(f"{self.env.now}: recent: {self.received_attacks[-1][1]} + {self.ally_help_info}")
+		self.logger.info("%s: recent: %s + %s", self.env.now, self.received_attacks[-1][1], self.ally_help_info)
 
 
 		# smoothing using previous attack volume approximation
 		if self.attack_volume_approximations:
 			new_approx = self.alpha_ewa * recent + (1 - self.alpha_ewa) * self.attack_volume_approximations[-1]
-			self.logger.info(f"{self.env.now}: recent: {recent}, old: {self.attack_volume_approximations[-1]} and alpha {self.alpha_ewa}.")
+			self.logger.info("%s: recent: %s, old: %s and alpha %s.", self.env.now, recent, self.attack_volume_approximations[-1], self.alpha_ewa)
 		else:
 			new_approx = recent
 
 
 		self.attack_volume_approximations.append(new_approx)
 
+		# the approximation is compared to what the source sent when the
+		# traffic measured now left it, if the source is simulated by the
+		# same process (see "pdes.py")
+		source = self.network.source
+		if self.network.is_local(source.asn):
+			sent_volume = self.sent_attack_volume(source)
+			if sent_volume is not None:
+				self.estimation_kpis.record(new_approx, sent_volume)
+
 		self.network.plot_values["victim_attack_approximations"].append(
 			(self.env.now, new_approx)
 		)
@@ -127,6 +152,26 @@ class VictimAS(AutonomousSystem):
 
 
 
+	def sent_attack_volume(self, source):
+		"""
+		Looks up the attack volume the source sent one path delay ago, i.e.,
+		the number of hops of its initial AS path times the propagation delay,
+		which is the traffic the victim receives now.
+
+		:param source: the source of the attack traffic
+		:type source: sourceAS.SourceAS
+
+		:returns: the attack volume, None if the source did not send anything
+			by then
+		:rtype: float
+		"""
+		as_path = self.network.init_graph.nodes[source.asn]["as_path_to_victim"]
+		sent_at = self.env.now - (len(as_path) - 1) * self.network.propagation_delay
+		recording = source.attack_traffic_recording
+		indx = bisect.bisect_right(recording, sent_at, key=lambda record: record[0])
+		return recording[indx - 1][1] if indx else None
+
+
 	def calculate_new_ally_activation(self):
 		if self.ally_help_info:
 			ally_activation = min(max((self.attack_volume_approximations[-1] - self.scrubbing_capability) / sum([d["scrubbing_capability"] for d in self.ally_help_info.values()]), 0), 1)
@@ -149,11 +194,11 @@ class VictimAS(AutonomousSystem):
 		:returns: whether a help call should be issued or not
 		:rtype: bool
 		"""
+		# all receptions before the last "nr_last_rcv" ones count, if the
+		# approximation exceeds the scrubbing capability
 		atk_pkts = 0
-
-		for atk_time, atk_vol in self.received_attacks[:-nr_last_rcv]:
-			if (self.attack_volume_approximations[-1] > self.scrubbing_capability):
-				atk_pkts += 1
+		if self.attack_volume_approximations[-1] > self.scrubbing_capability:
+			atk_pkts = max(len(self.received_attacks) - nr_last_rcv, 0)
 
 		return (atk_pkts >= min_atk_pkts) and (self.env.now - self.last_retractment) > self.new_signal_threshold
 
@@ -173,57 +218,60 @@ class VictimAS(AutonomousSystem):
 		:rtype: bool
 		"""
 
+		# all receptions before the last "nr_last_rcv" ones count, if the
+		# approximation is below the scrubbing capability
 		atk_pkts = 0
-
-		for atk_time, atk_vol in self.received_attacks[:-nr_last_rcv]:
-			if (self.attack_volume_approximations[-1] < self.scrubbing_capability):
-				atk_pkts += 1
+		if self.attack_volume_approximations[-1] < self.scrubbing_capability:
+			atk_pkts = max(len(self.received_attacks) - nr_last_rcv, 0)
 
 		return (atk_pkts >= min_atk_pkts) and (self.env.now - self.last_help) > self.new_signal_threshold
 
-	def set_ally_activation_w_delay(self, delay, new_activation, ally):
-		try:
-			yield self.env.timeout(delay)
-			# TODO self.ally_activation_recordings.append([self.env.now, new_activation])
-			self.logger.info(f"{self.env.now} | Setting Ally {ally} percentage to {new_activation}.")
-			self.ally_help_info[ally]["activation"] = new_activation
-		except simpy.Interrupt:
-			pass
+	def set_ally_activation(self, new_activation, ally):
+		# TODO self.ally_activation_recordings.append([self.env.now, new_activation])
+		self.logger.info("%s | Setting Ally %s percentage to %s.", self.env.now, ally, new_activation)
+		self.ally_help_info[ally]["activation"] = new_activation
 
 	def help_cycle(self):
+		"""
+		Sends a help RAT, schedules the resulting activation changes of the
+		allies, and schedules the next call of itself, until the help cycle
+		is stopped (see "stop_help_cycle").
+		"""
+		new_ally_activation = self.calculate_new_ally_activation()
+		self.activation_timers = [timer for timer in self.activation_timers if timer.time > self.env.now]
+		for ally, dic in self.ally_help_info.items():
+			self.activation_timers.append(self.env.call_later(dic["splitting_node_delay"]*2, self.set_ally_activation, new_ally_activation, ally))
+		help_pkt = Packet(
+			f"help_{self.help_msg_ctr}_{self.asn}",
+			"RAT",
+			self.asn,
+			None,
+			self.asn,
+			{
+				"attacker_asn": self.attack_src,
+				"scrubbing_capability": self.scrubbing_capability,
+				"relay_type": "broadcast" if self.help_msg_ctr == 0 else "broadcast", # TODO sencdond broadcast to attck path
+				"protocol": "help",
+				"ally_percentage": new_ally_activation,
+				"initial_call": self.help_msg_ctr == 0
+			},
+			attack_volume=self.attack_volume_approximations[-1] # TODO 
+		)
+		self.logger.info("Help Packet \"%s\" sent.", help_pkt.identifier)
+		self.help_msg_ctr += 1
+		self.send_packet(help_pkt, self.ebgp_AS_peers)
+		self.help_timer = self.env.call_later(self.help_msg_delay, self.help_cycle)
 
-		try:
-			processes = []
-			while True:
-				new_ally_activation = self.calculate_new_ally_activation()
-				for ally, dic in self.ally_help_info.items():
-					processes.append([self.env.process(self.set_ally_activation_w_delay(dic["splitting_node_delay"]*2, new_ally_activation, ally)), self.env.now + dic["splitting_node_delay"]*2])
-				help_pkt = {
-					"identifier": f"help_{self.help_msg_ctr}_{self.asn}",
-					"type": "RAT",
-					"src": self.asn,
-					"dst": None,
-					"last_hop": self.asn,
-					"content": {
-						"attack_volume": self.attack_volume_approximations[-1], # TODO 
-						"attacker_asn": self.attack_src,
-						"scrubbing_capability": self.scrubbing_capability,
-						"relay_type": "broadcast" if self.help_msg_ctr == 0 else "broadcast", # TODO sencdond broadcast to attck path
-						"protocol": "help",
-						"ally_percentage": new_ally_activation,
-						"initial_call": self.help_msg_ctr == 0,
-						"hc": 0
-					}
-				}
-				self.logger.info(f"Help Packet \"{help_pkt['identifier']}\" sent.")
-				self.help_msg_ctr += 1
-				self.send_packet(help_pkt, self.ebgp_AS_peers)
-				yield self.env.timeout(self.help_msg_delay)
-
-		except simpy.Interrupt:
-			for p, t in processes:
-				if t > self.env.now:
-					p.interrupt()
+	def stop_help_cycle(self):
+		"""
+		Stops the help cycle, and cancels all pending activation changes of
+		the allies, including the ones due at the current time, which have
+		not fired yet.
+		"""
+		self.help_timer.cancel()
+		for timer in self.activation_timers:
+			timer.cancel()
+		self.activation_timers = []
 
 	def attack_reaction(self, pkt):
 		"""
@@ -236,30 +284,32 @@ class VictimAS(AutonomousSystem):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
 
-		self.logger.info(f"[{self.env.now}] Attack Packet with ID {pkt['identifier']} arrived with magnitutde {pkt['content']['attack_volume']} Gbps.")
+		self.logger.info("[%s] Attack Packet with ID %s arrived with magnitutde %s Gbps.", self.env.now, pkt.identifier, pkt.attack_volume)
 
 		# save the attack packets
 		self.received_attacks.append(
-			(self.env.now, pkt["content"]["attack_volume"])
+			(self.env.now, pkt.attack_volume)
 		)
 		self.network.plot_values["victim_help_calls"].append(
-			(self.env.now, pkt["content"]["attack_volume"])
+			(self.env.now, pkt.attack_volume)
 		)
+		self.load_kpis.record(self.env.now, pkt.attack_volume)
 
 		self.attack_vol_approximation()
 
 		# Case: The attack is larger than our scrubbing capabilities / then we expect
-		if self.expected_attack_volume < int(pkt["content"]["attack_volume"]):
+		if self.expected_attack_volume < int(pkt.attack_volume):
 			# if this is the first attack packet we see
 			if not self.help_signal_issued:
-				self.logger.info(f"[{self.env.now}] Initiating Help Cycle.")
+				self.logger.info("[%s] Initiating Help Cycle.", self.env.now)
 				# we set the attack volume approximation
-				self.attack_volume_approximations.append(pkt["content"]["attack_volume"])
-				self.attack_src = pkt["src"]
-				self.help_process = self.env.process(self.help_cycle())
+				self.attack_volume_approximations.append(pkt.attack_volume)
+				self.attack_src = pkt.src
+				self.help_timer = self.env.call_later(0, self.help_cycle)
+				self.load_kpis.record_help(self.env.now)
 
 				self.help_signal_issued = True
 
@@ -267,10 +317,9 @@ class VictimAS(AutonomousSystem):
 
 		# Case: We do not need help anymore
 		elif self.help_signal_issued and self.retractment_condition():
-			if self.help_process != None:
-				self.help_process.interrupt()
-				self.help_process
-			self.logger.info(f"[{self.env.now}] Issueing Help Retractment.")
+			if self.help_timer != None:
+				self.stop_help_cycle()
+			self.logger.info("[%s] Issueing Help Retractment.", self.env.now)
 			self.ally_activation = 1.0
 			self.ally_help_info = {}
 			self.help_signal_issued = False
@@ -279,19 +328,18 @@ class VictimAS(AutonomousSystem):
 			# TODO right now we broadcast this pkt, but, we could also say: do
 			# only broadcast it to ebgp peers from which you received a
 			# support or attack_path protocol RAT
-			help_pkt = {
-				"identifier": f"help_retractment_{float(self.env.now):6.2}",
-				"type": "RAT",
-				"src": self.asn,
-				"dst": None,
-				"last_hop": self.asn,
-				"content": {
-					"attacker_asn": pkt["src"],
+			help_pkt = Packet(
+				f"help_retractment_{float(self.env.now):6.2}",
+				"RAT",
+				self.asn,
+				None,
+				self.asn,
+				{
+					"attacker_asn": pkt.src,
 					"relay_type": "broadcast",
-					"protocol": "help_retractment",
-					"hc": 0
+					"protocol": "help_retractment"
 				}
-			}
+			)
 			self.rat_reaction_help_retractment(help_pkt)
 
 			self.send_packet(help_pkt, self.ebgp_AS_peers)
@@ -306,11 +354,11 @@ class VictimAS(AutonomousSystem):
 
 		:param pkt: the incoming packets
 
-		:type pkt: dict
+		:type pkt: packet.Packet
 		"""
 		if self.help_signal_issued:
 			try:
-				self.ally_help_info[f"ally{pkt['src']}"] = {"scrubbing_capability": pkt["content"]["scrubbing_capability"], "splitting_node_delay": self.env.now - pkt["content"]["splitting_node_time"], "activation": 1.0}
+				self.ally_help_info[f"ally{pkt.src}"] = {"scrubbing_capability": pkt.content["scrubbing_capability"], "splitting_node_delay": self.env.now - pkt.content["splitting_node_time"], "activation": 1.0}
 			except:
 				print("\n"*5)
 				print(pkt)
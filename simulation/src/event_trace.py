@@ -0,0 +1,224 @@
+"""
+Contains the EventTrace class, used to record the packets sent and received
+during a simulation in a compact binary format, and functions to query such a
+trace.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import struct
+import numpy as np
+
+
+# the codes used for the event types and the RAT protocols in the trace
+EVENT_TYPES = ["send", "receive"]
+PROTOCOLS = ["none", "help", "help_retractment", "support"]
+
+# every event is one fixed-width record of this type
+EVENT_DTYPE = np.dtype([
+	("time", np.float64),
+	("event", np.uint8),
+	("src", np.int32),
+	("dst", np.int32),
+	("asn", np.int32),
+	("protocol", np.uint8),
+	("attack_volume", np.float64),
+	("hc", np.int16),
+])
+
+# the size of the .npy header; it is written with a fixed size, such that it
+# can be rewritten with the final number of records once the trace is closed
+HEADER_SIZE = 256
+
+
+def npy_header(nr_records, dtype=EVENT_DTYPE):
+	"""
+	Creates a .npy (version 1.0) header for a one-dimensional array of
+	records, by default events, padded to "HEADER_SIZE" bytes.
+
+	:param nr_records: the number of records in the file
+	:param dtype: the type of the records
+
+	:type nr_records: int
+	:type dtype: np.dtype
+
+	:returns: the header
+	:rtype: bytes
+	"""
+	header = str({
+		"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+		"fortran_order": False,
+		"shape": (nr_records,)
+	})
+	# magic string (6 bytes), version (2 bytes), header length (2 bytes)
+	header = header.ljust(HEADER_SIZE - 10 - 1) + "\n"
+	assert len(header) == HEADER_SIZE - 10, "the header does not fit into HEADER_SIZE"
+	return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class EventTrace(object):
+	"""
+	Records the events of a simulation, i.e., every sent and received packet,
+	as fixed-width records into a .npy file.
+
+	The events are first collected in one numpy array per field; once
+	"chunk_size" events are collected, they are packed into records and
+	appended to the file. The resulting file can be memory-mapped through
+	"np.load(path, mmap_mode='r')", which is what "query_trace" does.
+
+	:param path: the path of the .npy file
+	:param chunk_size: number of events collected before they are written
+	:param columns: the buffered events, by field
+	:param nr_buffered: the number of events in the buffer
+	:param nr_records: the number of events written to the file
+
+	:type path: str
+	:type chunk_size: int
+	:type columns: dict[str, np.ndarray]
+	:type nr_buffered: int
+	:type nr_records: int
+	"""
+
+	__event_codes__ = {event: code for code, event in enumerate(EVENT_TYPES)}
+	__protocol_codes__ = {protocol: code for code, protocol in enumerate(PROTOCOLS)}
+
+
+	def __init__(self, path, chunk_size=1 << 16):
+		self.path = path
+		self.chunk_size = chunk_size
+		self.columns = {
+			field: np.empty(chunk_size, dtype=EVENT_DTYPE[field])
+			for field in EVENT_DTYPE.names
+		}
+		self.nr_buffered = 0
+		self.nr_records = 0
+
+		self.file = open(path, "wb")
+		self.file.write(npy_header(0))
+
+
+	def record(self, time, event, pkt, asn):
+		"""
+		Records a single event.
+
+		:param time: the simulation time of the event
+		:param event: the event type, one of "EVENT_TYPES"
+		:param pkt: the sent or received packet
+		:param asn: the AS at which the event happened
+
+		:type time: float
+		:type event: str
+		:type pkt: packet.Packet
+		:type asn: int
+		"""
+		indx = self.nr_buffered
+		columns = self.columns
+		columns["time"][indx] = time
+		columns["event"][indx] = self.__event_codes__[event]
+		columns["src"][indx] = pkt.src
+		columns["dst"][indx] = -1 if pkt.dst is None else pkt.dst
+		columns["asn"][indx] = asn
+		columns["protocol"][indx] = self.__protocol_codes__[pkt.content.get("protocol", "none")]
+		columns["attack_volume"][indx] = np.nan if pkt.attack_volume is None else pkt.attack_volume
+		columns["hc"][indx] = pkt.hc
+
+		self.nr_buffered += 1
+		if self.nr_buffered == self.chunk_size:
+			self.flush()
+
+
+	def flush(self):
+		"""
+		Appends all buffered events to the file.
+		"""
+		records = np.empty(self.nr_buffered, dtype=EVENT_DTYPE)
+		for field, values in self.columns.items():
+			records[field] = values[:self.nr_buffered]
+		self.file.write(records.tobytes())
+
+		self.nr_records += self.nr_buffered
+		self.nr_buffered = 0
+
+
+	def close(self):
+		"""
+		Writes the remaining events, sets the final number of events in the
+		header and closes the file.
+		"""
+		self.flush()
+		self.file.seek(0)
+		self.file.write(npy_header(self.nr_records))
+		self.file.close()
+
+
+def query_trace(path, filters=None, group_by=None, chunk_size=1 << 20):
+	"""
+	Filters and aggregates a trace written by "EventTrace". The file is
+	memory-mapped and processed in chunks, such that it never has to be
+	loaded into memory as a whole.
+
+	:param path: the path of the .npy file
+	:param filters: the conditions on the events, by field; each one either
+		a value the field has to be equal to, or a (minimum, maximum) tuple
+		of the range the field has to be in (both inclusive, None for no
+		limit); "event" and "protocol" can be given by their names
+	:param group_by: the field to group the events by, None to aggregate all
+		of them into one group
+	:param chunk_size: number of events processed at once
+
+	:type path: str
+	:type filters: dict
+	:type group_by: str
+	:type chunk_size: int
+
+	:returns: for every group, the number of events and the sum of their
+		attack volumes, by value of the "group_by" field (None if not given)
+	:rtype: dict[object, dict[str, float]]
+	"""
+	filters = {
+		field: (
+			EventTrace.__event_codes__[condition] if field == "event" and isinstance(condition, str) else
+			EventTrace.__protocol_codes__[condition] if field == "protocol" and isinstance(condition, str) else
+			condition
+		)
+		for field, condition in (filters or {}).items()
+	}
+
+	trace = np.load(path, mmap_mode="r")
+	groups = {}
+	for start in range(0, len(trace), chunk_size):
+		chunk = trace[start:start + chunk_size]
+
+		mask = np.ones(len(chunk), dtype=bool)
+		for field, condition in filters.items():
+			if isinstance(condition, tuple):
+				minimum, maximum = condition
+				if minimum is not None:
+					mask &= chunk[field] >= minimum
+				if maximum is not None:
+					mask &= chunk[field] <= maximum
+			else:
+				mask &= chunk[field] == condition
+		chunk = chunk[mask]
+
+		attack_volume = np.nan_to_num(chunk["attack_volume"])
+		if group_by is None:
+			keys, inverse = np.zeros(1, dtype=np.int64), np.zeros(len(chunk), dtype=np.int64)
+		else:
+			keys, inverse = np.unique(chunk[group_by], return_inverse=True)
+		counts = np.bincount(inverse, minlength=len(keys))
+		volumes = np.bincount(inverse, weights=attack_volume, minlength=len(keys))
+
+		for key, count, volume in zip(keys.tolist(), counts.tolist(), volumes.tolist()):
+			if group_by is None:
+				key = None
+			elif group_by == "event":
+				key = EVENT_TYPES[key]
+			elif group_by == "protocol":
+				key = PROTOCOLS[key]
+			group = groups.setdefault(key, {"count": 0, "attack_volume": 0.0})
+			group["count"] += count
+			group["attack_volume"] += volume
+
+	return {key: group for key, group in groups.items() if group["count"]}
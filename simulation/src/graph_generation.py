@@ -6,10 +6,53 @@ Author:
 """
 import networkx as nx
 import random
+from collections import deque
 
 from .auxiliary_functions import assign_attributes
 
 
+# increased whenever the generated graphs change, which invalidates the
+# topologies cached by "topology_cache.py"
+GENERATOR_VERSION = 1
+
+
+def bfs_from_victim(graph, victim):
+    """
+    Runs one breadth first search from the victim node, over the neighbors of
+    every node in an undirected graph, or over its predecessors in a directed
+    one, i.e., against the direction of the edges. It visits every node once,
+    and every edge at most twice, i.e., it takes O(V+E).
+
+    :param graph: networkx graph, reprsenting AS network
+    :param victim: victim node identifier
+
+    :type graph: nx.classes.graph.Graph
+    :type victim: int
+
+    :return: a tuple containing
+        * the nodes in the order they were discovered, starting with the
+          victim
+        * the number of hops from every node to the victim, by node, None
+          for nodes from which the victim can not be reached
+    :rtype: tuple[list[int], list[int]]
+    """
+    next_nodes = graph.predecessors if graph.is_directed() else graph.neighbors
+
+    order = [victim]
+    distances = [None]*len(graph.nodes)
+    distances[victim] = 0
+    Q = deque(order)
+    while Q:
+        current = Q.popleft()
+        for neighbor in next_nodes(current):
+            if distances[neighbor] is None:
+                distances[neighbor] = distances[current] + 1
+                order.append(neighbor)
+                Q.append(neighbor)
+
+    return order, distances
+
+
 def to_directed_via_bfs(input_graph, victim):
     """
     Used to make an undirected Graph with a victim node into a directed graph, such that
@@ -17,6 +60,9 @@ def to_directed_via_bfs(input_graph, victim):
     representing the victim node. It represents the traffic flow with a destination located in
     the victim AS.
 
+    Every edge is directed towards the one of its nodes that a breadth first search from the
+    victim discovers first; edges between nodes it does not discover keep both directions.
+
     :param G_init: undirected networkx graph, reprsenting AS network
     :param victim: victim node identifier
 
@@ -28,55 +74,65 @@ def to_directed_via_bfs(input_graph, victim):
     """
     graph = input_graph.copy()
 
-    # representing the queue through a list and the pop(0) and append() methods
-    Q = [victim]
-    # for indicating, whether nodes were already explored a not
-    explored = [False]*len(graph.nodes)
-    # for remembering which edges to remove and add
-    edges_to_remove = []
-    edges_to_add = []
-    
-    while Q:
-        # assign the current node by dequeuing an element
-        current = Q.pop(0)
-        
-        # consider all neighbors of the current node
-        for neighbor in graph.neighbors(current):
-            
-            if not explored[neighbor]:
-                Q.append(neighbor)
-                edges_to_remove.append((current, neighbor))
-                edges_to_add.append((neighbor, current))
-        #mark this node as explored
-        explored[current] = True        
-    
-    # make G into a directed graph
+    # the position of every node in the search, undiscovered ones come last;
+    # the search runs on the copy, since copying can change the order of the
+    # neighbors, and thereby the order the nodes are discovered in
+    order, _ = bfs_from_victim(graph, victim)
+    rank = [len(order)]*len(graph.nodes)
+    for position, node in enumerate(order):
+        rank[node] = position
+
+    # make G into a directed graph, and remove all edges pointing away from
+    # the victim
     graph = graph.to_directed()
+    graph.remove_edges_from([(u, v) for u, v in graph.edges if rank[u] < rank[v]])
 
-    # remove and add the edges, after checking if this action is legal
-    for u, v in edges_to_remove:
-        if (u, v) in graph.edges:
-            graph.remove_edge(u, v)
-    for u, v, in edges_to_add:
-        if not (u, v) in graph.edges:
-            graph.add_edge(u, v)
-        
     return graph
 
 
 
 
-def add_AS_PATH_to_victim(graph_init, victim):
+def add_AS_PATH_to_victim(graph_init, victim, distances=None):
     """
     This function will take a graph, and add the "as_path_to_victim" attribute to all notes,
     containg the set of nodes that form the shortest path from every node to the victim node.
+
+    The path of every node is the node itself, followed by the path of its first successor that
+    is one hop closer to the victim; every path is built once.
+
+    :param graph_init: directed networkx graph, with the victim as a sink
+    :param victim: victim node
+    :param distances: the number of hops from every node to the victim, by node,
+        if already known (see "bfs_from_victim")
+
+    :type graph_init: nx.classes.graph.Graph
+    :type victim: int
+    :type distances: list[int]
+
+    :return: the graph with the set attributes
+    :rytpe: nx.classes.graph.Graph
     """
     graph = graph_init.copy()
+    if distances is None:
+        _, distances = bfs_from_victim(graph, victim)
 
+    as_paths = [None]*len(graph.nodes)
+    as_paths[victim] = [victim]
     for node_indx in graph.nodes:
-        # calculate shortest path
-        as_path = list(nx.shortest_path(graph, node_indx, victim))
-        graph.nodes[node_indx]["as_path_to_victim"] = as_path
+        # follow the next hops until a node whose path is known, and then
+        # complete the paths of all nodes on the way back
+        chain = []
+        node = node_indx
+        while as_paths[node] is None:
+            if distances[node] is None:
+                raise Exception(f"There is no path from {node} to the victim {victim}!")
+            chain.append(node)
+            node = next(v for v in graph.successors(node) if distances[v] == distances[node] - 1)
+        for hop in reversed(chain):
+            as_paths[hop] = [hop] + as_paths[node]
+            node = hop
+
+        graph.nodes[node_indx]["as_path_to_victim"] = as_paths[node_indx]
 
     return graph
 
@@ -84,20 +140,28 @@ def add_AS_PATH_to_victim(graph_init, victim):
 def graph_pruning_via_BFS(
     Graph:nx.classes.graph.Graph,
     victim:int,
-    max_out_edges:int = 1
+    max_out_edges:int = 1,
+    distances:list = None
 ):
     """
     Prunes a graph, by considering all outward pointing edges of every node,
     associating with each of them how far the victim node is if one were to 
     follow them, and then to delete all nodes that do not have the shortest distance. 
 
-    :param Graph: undirected networkx graph, reprsenting AS network
+    Pruning never changes how far any node is from the victim, since every node keeps at
+    least one of its shortest outward edges, so the distances of a single breadth first
+    search are used for all nodes.
+
+    :param Graph: directed networkx graph, reprsenting AS network
     :param victim: victim node
     :param max_out_edges: max number of outward pointing edges a node may habe
+    :param distances: the number of hops from every node to the victim, by node,
+        if already known (see "bfs_from_victim")
 
     :type G_init: nx.classes.graph.Graph
     :type victim: int
     :type max_out_edges: int
+    :type distances: list[int]
 
     :return: pruned graph
     :rytpe: nx.classes.graph.Graph
@@ -105,38 +169,29 @@ def graph_pruning_via_BFS(
 
     # make a copy to not mingle with the original graph
     G_pruned = Graph.copy()
+    if distances is None:
+        _, distances = bfs_from_victim(G_pruned, victim)
     
-    # get a list of all nodes, minus the victim node (it has only incoming connections)
-    all_nodes = list(G_pruned.nodes)
-    all_nodes.remove(victim)
-    
-    nr_edges_pruned = 0
-    
-    # go through each node
-    for node in all_nodes:
-        # get a list of all outward pointing edges
-        outward_edges = list(G_pruned.out_edges(node))
+    # go through each node, but the victim node (it has only incoming connections)
+    for node in Graph.nodes:
+        if node == victim:
+            continue
 
-        # then for each, determine the length of the shortest path
-        costs = []
-        for _, next_node in outward_edges:
-            costs.append(len(list(nx.shortest_simple_paths(G_pruned, next_node, victim))[0]))
+        # get a list of all outward pointing edges, and the distance to the
+        # victim if one were to follow them
+        outward_edges = list(G_pruned.out_edges(node))
+        costs = [distances[next_node] for _, next_node in outward_edges]
+        if None in costs or not costs:
+            raise Exception(f"There is no path from {node} to the victim {victim}!")
 
         # then remove all the ones who dont belong to the set of shortest
         shortest_path_length = min(costs)
-        delete = [indx for indx, cost in enumerate(costs) if cost != shortest_path_length]
-        for delete_indx in delete:
-            u, v = outward_edges[delete_indx]
-            G_pruned.remove_edge(u, v)
-            nr_edges_pruned += 1
+        G_pruned.remove_edges_from([edge for edge, cost in zip(outward_edges, costs) if cost != shortest_path_length])
 
         # then, if it is still move than max_out_edges, remove the appropriate amount of edges
-        outward_edges = list(G_pruned.out_edges(node))
+        outward_edges = [edge for edge, cost in zip(outward_edges, costs) if cost == shortest_path_length]
         if len(outward_edges) > max_out_edges:
-            to_delete = random.sample(outward_edges, len(outward_edges) - max_out_edges)
-            for u, v in to_delete:
-                G_pruned.remove_edge(u, v)
-                nr_edges_pruned += 1
+            G_pruned.remove_edges_from(random.sample(outward_edges, len(outward_edges) - max_out_edges))
 
     return G_pruned
 
@@ -172,8 +227,37 @@ def generate_directed_AS_graph(nr_ASes, nr_allies, full_attack_vol):
     # generate the an undirected graph, whose topology is close to the AS network
     G = nx.random_internet_as_graph(nr_ASes)
 
+    return direct_AS_graph(G, nr_allies, full_attack_vol)
+
+
+def direct_AS_graph(G, nr_allies, full_attack_vol):
+    """
+    Turns an undirected AS graph into the directed, acyclic network topology of a
+    simulation (see "generate_directed_AS_graph"): assigns a victim node, an adversary
+    node and ally nodes among its customers and content providers, directs and prunes
+    its edges towards the victim, and assigns the attack volume of the source and the
+    scrubbing capabilities of the victim and the allies.
+
+    :param G: undirected networkx graph, with the nodes 0, ..., n-1, whose "type"
+        attribute is one of "T", "M", "C" and "CP", as in "nx.random_internet_as_graph",
+        and in which the victim can be reached from every node
+    :param nr_allies: number of allies willing to help scrubbing DDoS traffic      
+    :param full_attack_vol: the attack volume of the DDoS attack in Mbps
+
+    :type G: nx.classes.graph.Graph
+    :type nr_allies: int
+    :type full_attack_vol: float
+
+    :return: a tuple containing
+        * the directed graph
+        * the victim node
+        * the adversary node
+        * the allies of the victim
+    :rtype: tuple
+    """
+
     # get the list of customers and content-providers
-    customers_and_cps = [indx for indx in range(nr_ASes) if G.nodes[indx]["type"] in ["C", "CP"]]
+    customers_and_cps = [indx for indx in range(len(G.nodes)) if G.nodes[indx]["type"] in ["C", "CP"]]
 
     # from this list, randomly select the victim, adversary and allies
     selected = random.sample(customers_and_cps, nr_allies+2)
@@ -183,15 +267,19 @@ def generate_directed_AS_graph(nr_ASes, nr_allies, full_attack_vol):
 
     # assign attributes (e.g. color)
     G = assign_attributes(G, victim, adversary, allies)
+
+    # the distance of every node to the victim, which neither the orientation
+    # nor the pruning change, so one breadth first search serves both of them
+    _, distances = bfs_from_victim(G, victim)
     
     # change it to a directed, acyclic graph, with the victim as a sink
     G = to_directed_via_bfs(G, victim)
     
     # prune
-    G = graph_pruning_via_BFS(G, victim, 1)
+    G = graph_pruning_via_BFS(G, victim, 1, distances)
 
     # add distances to all sinks
-    G = add_AS_PATH_to_victim(G, victim)
+    G = add_AS_PATH_to_victim(G, victim, distances)
 
     # add attack volume limits to adversary
     G.nodes[adversary]["full_attack_vol"] = full_attack_vol
@@ -0,0 +1,274 @@
+"""
+Contains the functions to run a simulation as a conservative parallel discrete
+event simulation (PDES), i.e., with the ASes partitioned over several
+processes.
+
+Every message between ASes is delayed by exactly the propagation delay, which
+is therefore the lookahead of every partition: whatever an AS sends in
+[T, T + propagation_delay) arrives at or after T + propagation_delay. All
+partitions thus simulate the same window of this width independently, and then
+exchange the packets sent to ASes of other partitions, before the next window
+starts. The result is exactly the one of a sequential simulation, since
+simultaneous events of different ASes commute (packets arriving at the same
+time are delivered in an order that only depends on their senders, see
+"Internet.deliver"), and all events of one AS are simulated by the same
+process, in the same order.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import random
+import logging
+import traceback
+import multiprocessing
+import numpy as np
+
+
+# attributes of ASes and routing tables that refer to the objects of the
+# process they are simulated in, and are therefore not sent back
+RUNTIME_ATTRIBUTES = {
+	"env",
+	"network",
+	"logger",
+	"router_table",
+	"help_timer",
+	"activation_timers"
+}
+
+# the logger of the ASes while they are created to import their state, which
+# already logged their creation in the process that simulated them
+SILENT_LOGGER = logging.getLogger("[PDES-IMPORT]")
+SILENT_LOGGER.disabled = True
+
+
+def partition_graph(graph, nr_partitions, seed=0):
+	"""
+	Partitions the ASes of a graph with few edges between partitions, by
+	repeatedly bisecting the largest partition (Kernighan-Lin), which keeps
+	the number of packets exchanged between the processes low.
+
+	:param graph: the AS graph
+	:param nr_partitions: the number of partitions
+	:param seed: the seed of the bisections; they never use the random
+		number generators of the simulation
+
+	:type graph: nx.classes.graph.Graph
+	:type nr_partitions: int
+	:type seed: int
+
+	:returns: the partition of every AS, by ASN
+	:rtype: list[int]
+	"""
+	if not 1 <= nr_partitions <= len(graph.nodes):
+		raise Exception(f"Can not split {len(graph.nodes)} ASes into {nr_partitions} partitions!")
+
+	# networkx is slow to import, and only needed to partition the graph
+	from networkx.algorithms.community import kernighan_lin_bisection
+
+	undirected = graph.to_undirected(as_view=True)
+	partitions = [set(graph.nodes)]
+	while len(partitions) < nr_partitions:
+		largest = max(partitions, key=len)
+		partitions.remove(largest)
+		partitions.extend(kernighan_lin_bisection(undirected.subgraph(largest), seed=seed))
+
+	partition_of = [None] * len(graph.nodes)
+	for partition_indx, partition in enumerate(sorted(partitions, key=min)):
+		for asn in partition:
+			partition_of[asn] = partition_indx
+	return partition_of
+
+
+def export_state(net, asns):
+	"""
+	Collects the state of the given ASes, and their routing tables.
+
+	:param net: the network
+	:param asns: the ASNs
+
+	:type net: network.Internet
+	:type asns: list[int]
+
+	:returns: the attributes of every AS and of its routing table, by ASN
+	:rtype: dict[int, tuple[dict, dict]]
+	"""
+	return {
+		asn: tuple(
+			{name: value for name, value in vars(obj).items() if name not in RUNTIME_ATTRIBUTES}
+			for obj in [net.ASes[asn], net.ASes[asn].router_table]
+		)
+		for asn in asns
+	}
+
+
+def import_state(net, states):
+	"""
+	Overwrites the state of ASes, and their routing tables, with a state
+	collected by "export_state". ASes that do not exist in this process yet
+	are created without logging anything, and then get their own logger.
+
+	:param net: the network
+	:param states: the attributes of every AS and of its routing table, by
+		ASN
+
+	:type net: network.Internet
+	:type states: dict[int, tuple[dict, dict]]
+	"""
+	for asn, (AS_state, router_table_state) in states.items():
+		if not net.ASes.is_materialized(asn):
+			AS = net.create_AS(asn, logger=SILENT_LOGGER)
+			AS.logger = AS.router_table.logger = net.create_AS_logger(asn)
+			net.ASes.add(AS)
+		vars(net.ASes[asn]).update(AS_state)
+		vars(net.ASes[asn].router_table).update(router_table_state)
+
+
+def run_partition(net, partition_indx, partition_of, simulation_length, random_states, connection):
+	"""
+	Simulates one partition of a network, in a process forked from the one
+	that created the network, in windows of the width of the propagation
+	delay. After every window, the packets sent to other partitions are sent
+	through the connection, and the ones sent to this partition are received.
+	At the end, the state of all ASes of the partition is sent.
+
+	:param net: the network, before the simulation started
+	:param partition_indx: the index of the simulated partition
+	:param partition_of: the partition of every AS, by ASN
+	:param simulation_length: the end of the simulation
+	:param random_states: the states of the random number generators of
+		"random" and "numpy" before the simulation started
+	:param connection: the connection to the coordinating process
+
+	:type net: network.Internet
+	:type partition_indx: int
+	:type partition_of: list[int]
+	:type simulation_length: float
+	:type random_states: tuple
+	:type connection: multiprocessing.connection.Connection
+	"""
+	try:
+		# "random" is seeded again in every forked process
+		random.setstate(random_states[0])
+		np.random.set_state(random_states[1])
+		net.partition_of = partition_of
+		net.partition_indx = partition_indx
+		if partition_of[net.source.asn] == partition_indx:
+			net.source.attack_cycle()
+
+		window_end = 0
+		while window_end < simulation_length:
+			window_end = min(window_end + net.propagation_delay, simulation_length)
+			net.env.run(until=window_end)
+
+			connection.send(net.outbox)
+			net.outbox = []
+			for arrival, pkt in connection.recv():
+				net.add_delivery(arrival, pkt)
+
+		# only the ASes that were reached changed their state
+		asns = [asn for asn, indx in enumerate(partition_of) if indx == partition_indx and net.ASes.is_materialized(asn)]
+		connection.send((
+			net.env.nr_events,
+			export_state(net, asns),
+			net.plot_values if net.victim.asn in asns else None
+		))
+	except Exception as error:
+		connection.send(Exception(f"Partition {partition_indx} failed: {error!r}\n{traceback.format_exc()}"))
+	finally:
+		connection.close()
+
+
+def receive(connection):
+	"""
+	Receives a message from a partition, and raises the exception it sent
+	instead, if it failed.
+
+	:param connection: the connection to the partition
+	:type connection: multiprocessing.connection.Connection
+
+	:returns: the message
+	:rtype: object
+	"""
+	message = connection.recv()
+	if isinstance(message, Exception):
+		raise message
+	return message
+
+
+def run_partitioned(net, nr_partitions, simulation_length):
+	"""
+	Runs the simulation of a network on several processes, each one
+	simulating one partition of the ASes (see "run_partition"), while this
+	process forwards the packets between them. Afterwards, the state of all
+	ASes is copied back into the given network, such that it can be
+	evaluated as if it was simulated by this process.
+
+	Only the "packet" traffic model can be partitioned, and the processes are
+	forked, such that they start from the exact state of this one, including
+	its random number generators.
+
+	:param net: the network, before the simulation started
+	:param nr_partitions: the number of partitions, i.e., processes
+	:param simulation_length: the end of the simulation
+
+	:type net: network.Internet
+	:type nr_partitions: int
+	:type simulation_length: float
+	"""
+	if net.fluid_flow is not None:
+		raise Exception("Only the packet traffic model can be simulated in partitions!")
+	if net.event_trace is not None:
+		raise Exception("The event trace can not be recorded by a partitioned simulation!")
+	if net.propagation_delay <= 0:
+		raise Exception("A partitioned simulation needs a positive propagation delay, since it advances in windows of its width!")
+
+	partition_of = partition_graph(net.init_graph, nr_partitions)
+	net.logger.info("[*] Simulating %s partitions of %s ASes.", nr_partitions, [partition_of.count(indx) for indx in range(nr_partitions)])
+
+	random_states = (random.getstate(), np.random.get_state())
+	context = multiprocessing.get_context("fork")
+	connections = []
+	processes = []
+	completed = False
+	try:
+		for partition_indx in range(nr_partitions):
+			connection, worker_connection = context.Pipe()
+			process = context.Process(
+				target=run_partition,
+				args=(net, partition_indx, partition_of, simulation_length, random_states, worker_connection),
+				daemon=True
+			)
+			process.start()
+			worker_connection.close()
+			connections.append(connection)
+			processes.append(process)
+
+		window_end = 0
+		while window_end < simulation_length:
+			window_end = min(window_end + net.propagation_delay, simulation_length)
+			inboxes = [[] for _ in range(nr_partitions)]
+			for connection in connections:
+				for arrival, pkt in receive(connection):
+					inboxes[partition_of[pkt.next_hop]].append((arrival, pkt))
+			for connection, inbox in zip(connections, inboxes):
+				connection.send(inbox)
+
+		nr_events = 0
+		for connection in connections:
+			partition_events, states, plot_values = receive(connection)
+			nr_events += partition_events
+			import_state(net, states)
+			if plot_values is not None:
+				net.plot_values = plot_values
+		completed = True
+	finally:
+		for process in processes:
+			if not completed:
+				process.terminate()
+			process.join()
+
+	# this process did not simulate anything itself, so only the clock is
+	# advanced
+	net.env.run(until=simulation_length)
+	net.env.nr_events = nr_events
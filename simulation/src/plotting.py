@@ -0,0 +1,204 @@
+"""
+Contains the FigureRenderer class, used to render figures in a background
+process, and the functions to render the figures of a simulation from the
+data collected by "Internet.plot".
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def decimate(times, values, max_points):
+	"""
+	Reduces a series to at most "max_points" points, by splitting it into
+	buckets of consecutive points, and keeping only the minimum and the
+	maximum of every bucket, such that peaks remain visible.
+
+	:param times: the times of the series
+	:param values: the values of the series
+	:param max_points: the maximal number of points, None to keep all
+
+	:type times: np.ndarray
+	:type values: np.ndarray
+	:type max_points: int
+
+	:returns: the times and values of the remaining points
+	:rtype: tuple[np.ndarray, np.ndarray]
+	"""
+	times = np.asarray(times)
+	values = np.asarray(values, dtype=np.float64)
+	if max_points is None or len(values) <= max_points:
+		return np.array(times), np.array(values)
+
+	# pad the values to a multiple of the bucket size, such that every
+	# bucket is one row
+	nr_buckets = max(max_points // 2, 1)
+	bucket_size = -(-len(values) // nr_buckets)
+	padded = np.full(nr_buckets * bucket_size, np.nan)
+	padded[:len(values)] = values
+	buckets = padded.reshape(nr_buckets, bucket_size)
+	buckets = buckets[~np.isnan(buckets).all(axis=1)]
+
+	offsets = np.arange(len(buckets)) * bucket_size
+	indc = np.unique(np.concatenate([
+		offsets + np.nanargmin(buckets, axis=1),
+		offsets + np.nanargmax(buckets, axis=1)
+	]))
+	return np.array(times[indc]), values[indc]
+
+
+def render_attack_traffic(data, path, formats=("png", "svg"), dpi=400, show=False):
+	"""
+	Renders the figure of the attack traffic sent by the source and received
+	by the victim and the allies over time.
+
+	Unless the figure is shown, it is rendered without pyplot, i.e., without
+	a display and independently of any other figure, such that it can be
+	rendered by a background process.
+
+	:param data: the series to plot, see "Internet.plot"
+	:param path: the path of the figure, without the file extension
+	:param formats: the file formats to save the figure in
+	:param dpi: the resolution of the figure
+	:param show: whether to also show the figure
+
+	:type data: dict
+	:type path: str
+	:type formats: list[str]
+	:type dpi: int
+	:type show: bool
+	"""
+	if show:
+		import matplotlib.pyplot as plt
+		figure = plt.figure("DDoS Traffic Recordings", figsize=(16, 10))
+	else:
+		from matplotlib.figure import Figure
+		figure = Figure(figsize=(16, 10))
+	axes = figure.subplots()
+	axes.set_title("DDoS Traffic Recordings")
+	axes.grid()
+	axes.set_ylim(0, 2000)
+
+	# plot attack traffic
+	axes.plot(
+		*data["sent"],
+		label=f"Sent by {data['source']}",
+		color="black",
+		lw=1.5,
+		ls="dotted"
+	)
+	axes.plot(*data["approximations"], label="Attack Approximation")
+	axes.plot(*data["t2test"], label="T2")
+	axes.plot(*data["t3test"], label="T3")
+
+	# plot all sinks (victim + allies)
+	for sink, received in data["received"].items():
+		axes.scatter(
+			*received,
+			s=1,
+			label=f"Received by {sink}",
+			marker="X"
+		)
+
+	axes.hlines(
+		y=data["scrubbing_capability"],
+		xmin=0,
+		xmax=data["end"],
+		color="black",
+		label="victim_scrubbing_capability"
+	)
+
+	for tp, val in zip(*data["help_retractments"]):
+		axes.annotate(
+			f"[AS{data['victim_asn']}]\nHelp Signal Retracted",
+			(tp, val + 15),
+			xytext=(
+				tp,
+				max(val, data["scrubbing_capability"]) + 300
+			),
+			horizontalalignment="center",
+			arrowprops=dict(arrowstyle='-|>', lw=2)
+		)
+
+	axes.legend(loc="upper right", prop={"size": 17}, markerscale=6)
+	figure.tight_layout()
+	for file_format in formats:
+		figure.savefig(f"{path}.{file_format}", dpi=dpi)
+	if show:
+		plt.show()
+
+
+class FigureRenderer(object):
+	"""
+	Renders figures in a background process, such that the process that
+	collected their data (e.g., a simulation) can continue, or start the next
+	simulation, while they are rendered. Figures are rendered one after
+	another, in the order they were submitted.
+
+	The process is forked, like the partitions of a simulation (see
+	"pdes.py"); rendering functions must not use pyplot, since it is not
+	safe to use in a forked process.
+
+	Example:
+		with FigureRenderer() as renderer:
+			for seed in seeds:
+				net = simulate(...)
+				net.plot(show=False, renderer=renderer)
+
+	:param executor: the pool of the background process
+	:param futures: the results of the submitted figures
+
+	:type executor: concurrent.futures.ProcessPoolExecutor
+	:type futures: list[concurrent.futures.Future]
+	"""
+
+
+	def __init__(self):
+		self.executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("fork"))
+		self.futures = []
+
+
+	def submit(self, function, *args, **kwargs):
+		"""
+		Submits a figure, to be rendered by calling the given function.
+
+		:param function: the rendering function
+		:param args: the arguments to call it with, which are pickled
+		:param kwargs: the keyword arguments to call it with
+
+		:type function: callable
+		:type args: tuple
+		:type kwargs: dict
+
+		:returns: the result of the rendering
+		:rtype: concurrent.futures.Future
+		"""
+		future = self.executor.submit(function, *args, **kwargs)
+		self.futures.append(future)
+		return future
+
+
+	def close(self):
+		"""
+		Waits until all submitted figures are rendered, and stops the
+		background process; raises the exception of the first figure that
+		failed.
+		"""
+		try:
+			for future in self.futures:
+				future.result()
+		finally:
+			self.executor.shutdown()
+			self.futures = []
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, *exc_info):
+		self.close()
@@ -0,0 +1,258 @@
+"""
+Contains the functions to cache generated AS graphs on disk, such that
+simulations sharing a topology (e.g., the cells of a sweep that only differ in
+their delays) load it instead of generating it again.
+
+Every topology is stored in a directory of its own, named by a hash of the
+parameters it was generated from (see "topology_key"): the edges, their
+relationships, the types of the ASes and their AS paths to the victim as .npy
+files, which are memory mapped when loaded, and the roles, capabilities and
+the states of the random number generators after the generation in
+"topology.json". Loading a topology restores these states, such that a
+simulation continues exactly as if the topology had been generated.
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import os
+import json
+import random
+import shutil
+import hashlib
+import tempfile
+from collections import deque
+from pathlib import Path
+import networkx as nx
+import numpy as np
+
+from .graph_generation import GENERATOR_VERSION, generate_directed_AS_graph
+from .auxiliary_functions import assign_attributes
+
+
+# the AS types of "nx.random_internet_as_graph", by code
+AS_TYPES = ["T", "M", "C", "CP"]
+
+# the relationships of the edges of "nx.random_internet_as_graph", by code;
+# edges without one (i.e., reversed ones) are stored as -1
+RELATIONSHIPS = ["peer", "transit"]
+
+
+def topology_key(nr_ASes, nr_allies, full_attack_vol, seed):
+	"""
+	:param nr_ASes: the number of ASes
+	:param nr_allies: the number of allies
+	:param full_attack_vol: the attack volume, which the scrubbing
+		capabilities are drawn relative to
+	:param seed: the seed the random number generators were seeded with
+		before the topology was generated
+
+	:type nr_ASes: int
+	:type nr_allies: int
+	:type full_attack_vol: float
+	:type seed: int
+
+	:returns: the name of the topology in the cache, which also depends on
+		the version of the generator
+	:rtype: str
+	"""
+	parameters = json.dumps({
+		"nr_ASes": nr_ASes,
+		"nr_allies": nr_allies,
+		"full_attack_vol": full_attack_vol,
+		"seed": seed,
+		"version": GENERATOR_VERSION
+	}, sort_keys=True)
+	return hashlib.sha256(parameters.encode()).hexdigest()[:24]
+
+
+def edge_insertion_order(graph):
+	"""
+	Orders the edges of a directed graph, such that adding them in this order
+	to an empty graph reproduces the order of the successors and of the
+	predecessors of every node. Both orders matter, since the ASes of a
+	network address their neighbors in them.
+
+	Every edge must come after the previous edge in the successors of its
+	tail, and after the previous edge in the predecessors of its head; the
+	order the graph was built in satisfies both, so the edges are sorted
+	topologically under these two constraints, in linear time.
+
+	:param graph: the directed graph
+	:type graph: nx.classes.digraph.DiGraph
+
+	:returns: the edges
+	:rtype: list[tuple[int, int]]
+	"""
+	next_edges = {}
+	nr_constraints = {}
+	for node in graph.nodes:
+		for neighbors, as_edge in [(graph.successors(node), lambda other: (node, other)), (graph.predecessors(node), lambda other: (other, node))]:
+			previous = None
+			for other in neighbors:
+				edge = as_edge(other)
+				nr_constraints[edge] = nr_constraints.get(edge, 0) + (previous is not None)
+				if previous is not None:
+					next_edges.setdefault(previous, []).append(edge)
+				previous = edge
+
+	ready = deque(edge for edge in graph.edges if nr_constraints[edge] == 0)
+	order = []
+	while ready:
+		edge = ready.popleft()
+		order.append(edge)
+		for next_edge in next_edges.get(edge, []):
+			nr_constraints[next_edge] -= 1
+			if nr_constraints[next_edge] == 0:
+				ready.append(next_edge)
+	return order
+
+
+def save_topology(path, graph, victim, adversary, allies):
+	"""
+	Saves a generated topology, together with the current states of the
+	random number generators, into the given directory. The directory is
+	written under a temporary name first, such that processes saving the
+	same topology at the same time do not read or write incomplete ones.
+
+	:param path: the directory of the topology
+	:param graph: the graph, see "generate_directed_AS_graph"
+	:param victim: the victim node
+	:param adversary: the adversary node
+	:param allies: the ally nodes
+
+	:type path: str
+	:type graph: nx.classes.digraph.DiGraph
+	:type victim: int
+	:type adversary: int
+	:type allies: list[int]
+	"""
+	edges = edge_insertion_order(graph)
+	as_paths = [graph.nodes[node]["as_path_to_victim"] for node in range(len(graph.nodes))]
+	random_version, random_words, random_gauss = random.getstate()
+	_, numpy_keys, numpy_pos, numpy_has_gauss, numpy_gauss = np.random.get_state()
+
+	Path(path).parent.mkdir(parents=True, exist_ok=True)
+	temporary_path = tempfile.mkdtemp(prefix=".topology_", dir=Path(path).parent)
+	try:
+		arrays = {
+			"edges": np.array(edges, dtype=np.int64).reshape(-1, 2),
+			"relationships": np.array([
+				RELATIONSHIPS.index(graph.edges[edge]["type"]) if "type" in graph.edges[edge] else -1
+				for edge in edges
+			], dtype=np.int8),
+			"customers": np.array([
+				-1 if graph.edges[edge].get("customer", "none") == "none" else int(graph.edges[edge]["customer"])
+				for edge in edges
+			], dtype=np.int64),
+			"as_types": np.array([AS_TYPES.index(graph.nodes[node]["type"]) for node in range(len(graph.nodes))], dtype=np.int8),
+			"peers": np.array([graph.nodes[node].get("peers", -1) for node in range(len(graph.nodes))], dtype=np.int64),
+			"as_path_offsets": np.cumsum([0] + [len(as_path) for as_path in as_paths], dtype=np.int64),
+			"as_path_nodes": np.fromiter((node for as_path in as_paths for node in as_path), dtype=np.int64),
+			"random_words": np.array(random_words, dtype=np.int64),
+			"numpy_random_keys": numpy_keys
+		}
+		for name, array in arrays.items():
+			np.save(f"{temporary_path}/{name}.npy", array)
+
+		with open(f"{temporary_path}/topology.json", "w") as file:
+			json.dump({
+				"version": GENERATOR_VERSION,
+				"nr_ASes": len(graph.nodes),
+				"victim": victim,
+				"adversary": adversary,
+				"allies": allies,
+				"full_attack_vol": graph.nodes[adversary]["full_attack_vol"],
+				"scrubbing_caps": {str(node): graph.nodes[node]["scrubbing_cap"] for node in [victim] + allies},
+				"random_state": [random_version, random_gauss],
+				"numpy_random_state": [numpy_pos, numpy_has_gauss, numpy_gauss]
+			}, file, indent="\t")
+
+		os.rename(temporary_path, path)
+	except OSError:
+		# another process saved the same topology in the meantime
+		if not Path(f"{path}/topology.json").exists():
+			raise
+	finally:
+		shutil.rmtree(temporary_path, ignore_errors=True)
+
+
+def load_topology(path):
+	"""
+	Loads a topology saved by "save_topology", and restores the states of
+	the random number generators after it was generated.
+
+	:param path: the directory of the topology
+	:type path: str
+
+	:returns: the graph, the victim node, the adversary node and the ally
+		nodes, see "generate_directed_AS_graph"
+	:rtype: tuple
+	"""
+	with open(f"{path}/topology.json") as file:
+		meta = json.load(file)
+	if meta["version"] != GENERATOR_VERSION:
+		raise Exception(f"The topology \"{path}\" was generated by another version of the generator!")
+	arrays = {
+		name: np.load(f"{path}/{name}.npy", mmap_mode="r")
+		for name in ["edges", "relationships", "customers", "as_types", "peers", "as_path_offsets", "as_path_nodes", "random_words", "numpy_random_keys"]
+	}
+
+	graph = nx.DiGraph()
+	graph.add_nodes_from(
+		(node, {"type": AS_TYPES[as_type]} if peers < 0 else {"type": AS_TYPES[as_type], "peers": peers})
+		for node, (as_type, peers) in enumerate(zip(arrays["as_types"].tolist(), arrays["peers"].tolist()))
+	)
+	graph.add_edges_from(
+		(u, v, {} if relationship < 0 else {"type": RELATIONSHIPS[relationship], "customer": "none" if customer < 0 else str(customer)})
+		for (u, v), relationship, customer in zip(arrays["edges"].tolist(), arrays["relationships"].tolist(), arrays["customers"].tolist())
+	)
+
+	victim, adversary, allies = meta["victim"], meta["adversary"], meta["allies"]
+	assign_attributes(graph, victim, adversary, allies)
+	offsets = arrays["as_path_offsets"].tolist()
+	as_path_nodes = arrays["as_path_nodes"].tolist()
+	for node in range(meta["nr_ASes"]):
+		graph.nodes[node]["as_path_to_victim"] = as_path_nodes[offsets[node]:offsets[node + 1]]
+	graph.nodes[adversary]["full_attack_vol"] = meta["full_attack_vol"]
+	for node, scrubbing_cap in meta["scrubbing_caps"].items():
+		graph.nodes[int(node)]["scrubbing_cap"] = scrubbing_cap
+
+	random_version, random_gauss = meta["random_state"]
+	random.setstate((random_version, tuple(arrays["random_words"].tolist()), random_gauss))
+	numpy_pos, numpy_has_gauss, numpy_gauss = meta["numpy_random_state"]
+	np.random.set_state(("MT19937", np.array(arrays["numpy_random_keys"]), numpy_pos, numpy_has_gauss, numpy_gauss))
+
+	return graph, victim, adversary, allies
+
+
+def generate_cached_AS_graph(cache_path, seed, nr_ASes, nr_allies, full_attack_vol):
+	"""
+	Loads a topology from the cache, or generates it by
+	"generate_directed_AS_graph" and saves it into the cache. The random
+	number generators have to be seeded with the given seed beforehand; in
+	both cases, they end up in the same state.
+
+	:param cache_path: the directory of the cache
+	:param seed: the seed the random number generators were seeded with
+	:param nr_ASes: number of AS to be in the graph
+	:param nr_allies: number of allies willing to help scrubbing DDoS traffic
+	:param full_attack_vol: the attack volume of the DDoS attack in Mbps
+
+	:type cache_path: str
+	:type seed: int
+	:type nr_ASes: int
+	:type nr_allies: int
+	:type full_attack_vol: float
+
+	:returns: the graph, the victim node, the adversary node and the ally
+		nodes, see "generate_directed_AS_graph"
+	:rtype: tuple
+	"""
+	path = f"{cache_path}/{topology_key(nr_ASes, nr_allies, full_attack_vol, seed)}"
+	if Path(f"{path}/topology.json").exists():
+		return load_topology(path)
+
+	graph, victim, adversary, allies = generate_directed_AS_graph(nr_ASes, nr_allies, full_attack_vol)
+	save_topology(path, graph, victim, adversary, allies)
+	return graph, victim, adversary, allies
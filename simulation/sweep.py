@@ -0,0 +1,212 @@
+"""
+A script to run a parameter sweep, i.e., one simulation for every combination
+of the parameter values given in a grid file, in parallel.
+
+The grid file is a JSON object that maps options of "simulation_main.py" to
+either a list of values, or a single value used for all simulations, e.g.
+	{"seed": [1, 2, 3], "nr_ASes": [100, 200], "propagation_delay": [2, 3], "engine": "fast"}
+Every combination (a cell) is identified by a hash of its parameters. Cells
+without a seed get one derived from this hash, such that every simulation has
+its own, reproducible random numbers. A summary of every finished cell is
+appended to "results.csv" in the output directory, and cells already found in
+there are skipped, so an interrupted sweep continues where it stopped.
+The generated topologies are cached (see "topology_cache.py"), such that
+cells with the same number of ASes, allies, attack volume and seed share one.
+
+Example:
+	$ python3 sweep.py grid.json --output sweeps/delays --workers 8
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import random
+import argparse
+import itertools
+import hashlib
+import json
+import time
+import zlib
+import csv
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from simulation_main import create_parser, simulate
+
+
+# the columns of the results table, after the cell hash and the parameters
+METRICS = [
+	"sent",
+	"received_victim",
+	"received_allies",
+	"max_victim_load",
+	"overloaded_steps",
+	"overloaded_time",
+	"help_latency",
+	"mean_ally_utilisation",
+	"estimation_error",
+	"help_retractments",
+	"forwarded_rats",
+	"events",
+	"runtime"
+]
+
+# options that are set by the sweep itself, for every cell
+SWEEP_OPTIONS = ["log_path", "figure_path", "topology_cache"]
+
+
+def read_grid(path):
+	"""
+	Reads a grid file and expands it into its cells.
+
+	:param path: the path of the grid file
+	:type path: str
+
+	:returns: the parameters of every cell, by cell hash
+	:rtype: dict[str, dict]
+	"""
+	with open(path) as file:
+		grid = json.load(file)
+
+	defaults = vars(create_parser().parse_args([]))
+	unknown = (set(grid) - set(defaults)) | (set(grid) & set(SWEEP_OPTIONS))
+	if unknown:
+		raise Exception(f"Unknown sweep parameters {sorted(unknown)}!")
+
+	names = sorted(grid)
+	values = [grid[name] if isinstance(grid[name], list) else [grid[name]] for name in names]
+
+	cells = {}
+	for combination in itertools.product(*values):
+		params = dict(zip(names, combination))
+		key = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+		params.setdefault("seed", zlib.crc32(key.encode()))
+		cells[key] = params
+	return cells
+
+
+def read_finished_cells(path, columns):
+	"""
+	Reads the hashes of the cells in an existing results table.
+
+	:param path: the path of the results table
+	:param columns: the columns the table is expected to have
+
+	:type path: pathlib.Path
+	:type columns: list[str]
+
+	:returns: the hashes of the finished cells
+	:rtype: set[str]
+	"""
+	if not path.exists():
+		return set()
+	with open(path, newline="") as file:
+		reader = csv.DictReader(file)
+		if reader.fieldnames != columns:
+			raise Exception(f"The results in \"{path}\" belong to a sweep with different parameters!")
+		return {row["cell"] for row in reader}
+
+
+def run_cell(key, params, output_path, topology_cache=None):
+	"""
+	Runs the simulation of a single cell, in a worker process, and
+	summarizes it.
+
+	:param key: the hash of the cell
+	:param params: the parameters of the cell, that differ from the defaults
+	:param output_path: the directory of the sweep
+	:param topology_cache: if given, the directory the topologies are
+		cached in, shared by all cells
+
+	:type key: str
+	:type params: dict
+	:type output_path: str
+	:type topology_cache: str
+
+	:returns: a row of the results table
+	:rtype: dict
+	"""
+	args = create_parser().parse_args([])
+	args.verbosity = "off"
+	args.topology_cache = topology_cache
+	for name, value in params.items():
+		setattr(args, name, value)
+
+	# every cell seeds the generators itself, independently of which
+	# worker runs it and what it ran before
+	random.seed(args.seed)
+	np.random.seed(args.seed)
+
+	cell_path = f"{output_path}/cells/{key}"
+	Path(cell_path).mkdir(parents=True, exist_ok=True)
+
+	start = time.perf_counter()
+	net = simulate(args, cell_path, cell_path, plot=False)
+	runtime = time.perf_counter() - start
+
+	# the indicators are collected while the simulation runs, so nothing is
+	# aggregated from the recordings here
+	kpis = net.kpi_summary()
+	estimation_error = kpis["estimation_error"]
+
+	return {
+		"cell": key,
+		**params,
+		"sent": float(net.source.attack_traffic_recording.array()["value"].sum()),
+		"received_victim": kpis["victim"]["received"],
+		"received_allies": sum(ally["received"] for ally in kpis["allies"]),
+		"max_victim_load": kpis["victim"]["max_load"],
+		"overloaded_steps": kpis["victim"]["overloaded_steps"],
+		"overloaded_time": kpis["victim"]["overloaded_time"],
+		"help_latency": kpis["help_to_stable_split_latency"],
+		"mean_ally_utilisation": float(np.mean([ally["mean_utilisation"] for ally in kpis["allies"]])) if kpis["allies"] else None,
+		"estimation_error": None if estimation_error is None else estimation_error["mean_absolute_error"],
+		"help_retractments": len(net.plot_values["victim_help_retractment_calls"]),
+		"forwarded_rats": kpis["rat_messages"]["total"],
+		"events": net.env.nr_events,
+		"runtime": round(runtime, 3)
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("grid", type=str, help="path to the grid file")
+	parser.add_argument("--output", type=str, default="./sweeps/sweep", help="directory for the results table and the logs of all cells")
+	parser.add_argument("--topology_cache", type=str, default=None, help="directory to cache the generated topologies in; defaults to the topologies directory in the output directory")
+	parser.add_argument("--no_topology_cache", action="store_true", help="generate the topology of every cell")
+	parser.add_argument("--workers", type=int, default=None, help="number of worker processes; defaults to the number of CPUs")
+	args = parser.parse_args()
+
+	cells = read_grid(args.grid)
+	Path(args.output).mkdir(parents=True, exist_ok=True)
+	results_path = Path(f"{args.output}/results.csv")
+	columns = ["cell"] + sorted({name for params in cells.values() for name in params}) + METRICS
+	finished = read_finished_cells(results_path, columns)
+	pending = {key: params for key, params in cells.items() if key not in finished}
+	print(f"[*] {len(cells)} cells, {len(cells) - len(pending)} already finished.")
+
+	write_header = not results_path.exists()
+	with open(results_path, "a", newline="") as file, ProcessPoolExecutor(args.workers) as executor:
+		writer = csv.DictWriter(file, columns)
+		if write_header:
+			writer.writeheader()
+
+		topology_cache = None if args.no_topology_cache else args.topology_cache or f"{args.output}/topologies"
+		futures = {executor.submit(run_cell, key, params, args.output, topology_cache): key for key, params in pending.items()}
+		try:
+			for nr_done, future in enumerate(as_completed(futures), start=1):
+				key = futures[future]
+				try:
+					writer.writerow(future.result())
+					file.flush()
+					print(f"[{nr_done}/{len(pending)}] Cell {key} finished.")
+				except Exception as error:
+					print(f"[{nr_done}/{len(pending)}] Cell {key} failed: {error!r}")
+		finally:
+			for future in futures:
+				future.cancel()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,131 @@
+"""
+Contains the fixtures and helpers shared by the PyTest files of the
+simulation.
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+import logging
+from pathlib import Path
+import networkx as nx
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.network import Internet
+from src.classes.scheduler import SimpyScheduler, HeapScheduler
+from src.graph_generation import generate_directed_AS_graph
+
+
+# the roles of the small, meshed Internet
+VICTIM = 0
+SOURCE = 1
+ALLY = 2
+
+
+def create_logger(name, path=None):
+	"""
+	Creates a logger, that is not shared with the simulations run outside of
+	tests; has the same signature as "create_logger".
+
+	:return: the logger
+	:rtype: logging.Logger
+	"""
+	return logging.getLogger(f"TEST-{name}")
+
+
+def meshed_graph(victim_scrubbing_cap):
+	"""
+	Generates a small graph, whose undirected topology contains cycles, and
+	in which the source reaches the victim over two paths of different
+	length.
+
+	:return: the graph
+	:rtype: nx.DiGraph
+	"""
+	graph = nx.DiGraph()
+	graph.add_nodes_from(range(6))
+	graph.add_edges_from([(1, 3), (3, 0), (2, 4), (4, 0), (3, 4), (5, 3), (5, 4), (1, 5)])
+	for node in graph.nodes:
+		graph.nodes[node]["role"] = "standard"
+	graph.nodes[VICTIM].update(role="victim", scrubbing_cap=victim_scrubbing_cap, as_path_to_victim=[0])
+	graph.nodes[SOURCE].update(role="source", full_attack_vol=1000, as_path_to_victim=[1, 3, 0])
+	graph.nodes[ALLY].update(role="ally", scrubbing_cap=300, as_path_to_victim=[2, 4, 0])
+	return graph
+
+
+def start_internet(net):
+	"""
+	Starts the cycles of a network, like a simulation does.
+
+	:return: the Internet instance
+	:rtype: Internet
+	"""
+	net.source.attack_cycle()
+	if net.fluid_flow is not None:
+		net.fluid_flow.propagation_cycle()
+	return net
+
+
+def run_internet(net, until):
+	"""
+	Starts the cycles of a network, and runs it.
+
+	:return: the Internet instance after the run
+	:rtype: Internet
+	"""
+	start_internet(net).env.run(until=until)
+	return net
+
+
+@pytest.fixture
+def create_meshed_internet(tmp_path):
+	"""
+	Creates small Internets on the meshed graph, with the given scheduler,
+	scrubbing capability of the victim, and further arguments of "Internet".
+
+	:return: the function creating an Internet instance
+	:rtype: callable
+	"""
+	def create(scheduler=SimpyScheduler, victim_scrubbing_cap=200, **kwargs):
+		random.seed(0)
+		return Internet(
+			scheduler(), meshed_graph(victim_scrubbing_cap), VICTIM, SOURCE, [ALLY], 1, 3,
+			create_logger("[NETWORK]"), create_logger, str(tmp_path), str(tmp_path), **kwargs
+		)
+	return create
+
+
+@pytest.fixture
+def meshed_internet(create_meshed_internet):
+	"""
+	:return: a small Internet on the meshed graph
+	:rtype: Internet
+	"""
+	return create_meshed_internet()
+
+
+@pytest.fixture
+def create_random_internet(tmp_path):
+	"""
+	Creates Internets on random graphs, generated with the given seed and
+	number of ASes, with the given scheduler, propagation delay, and further
+	arguments of "Internet".
+
+	:return: the function creating an Internet instance
+	:rtype: callable
+	"""
+	def create(seed=3, nr_ASes=60, scheduler=HeapScheduler, propagation_delay=3, **kwargs):
+		random.seed(seed)
+		np.random.seed(seed)
+		graph, victim, adversary, allies = generate_directed_AS_graph(nr_ASes, 2, 1000)
+		return Internet(
+			scheduler(), graph, victim, adversary, allies, 1, propagation_delay,
+			create_logger("[NETWORK]"), create_logger, str(tmp_path), str(tmp_path), **kwargs
+		)
+	return create
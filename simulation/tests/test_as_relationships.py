@@ -0,0 +1,82 @@
+"""
+A PyTest file that contains tests for validating the import of AS-relationship
+files from "as_relationships.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import gzip
+import random
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.as_relationships import read_as_relationships, load_directed_AS_graph, PROVIDER, PEER, CUSTOMER
+from simulation_main import create_config, run_experiment
+
+
+SAMPLE = str(Path(__file__).resolve().parent / "data" / "as_relationships_sample.txt")
+
+
+def test_read(tmp_path):
+	"""
+	Every link is stored for both of its ASes, with the relationship seen
+	from each of them, and compressed files are read the same way.
+	"""
+	relationships = read_as_relationships(SAMPLE)
+	lines = [line.split("|") for line in Path(SAMPLE).read_text().splitlines() if not line.startswith("#")]
+	assert relationships.nr_links == len(lines)
+	assert relationships.nr_ASes == len({int(asn) for line in lines for asn in line[:2]})
+	assert np.all(np.diff(relationships.asns) > 0)
+
+	def neighbors(asn):
+		indx = int(np.searchsorted(relationships.asns, asn))
+		start, end = relationships.indptr[indx], relationships.indptr[indx + 1]
+		return {
+			int(relationships.asns[neighbor]): relationship
+			for neighbor, relationship in zip(relationships.neighbors[start:end], relationships.relationships[start:end])
+		}
+
+	assert neighbors(64700) == {64701: CUSTOMER}
+	assert neighbors(64701) == {64700: PROVIDER}
+	assert neighbors(64512)[64513] == PEER
+
+	as_types = dict(zip(relationships.asns.tolist(), relationships.as_types()))
+	assert as_types[64512] == "T" and as_types[64520] == "M" and as_types[64600] == "C"
+
+	with gzip.open(tmp_path / "sample.txt.gz", "wt") as file:
+		file.write(Path(SAMPLE).read_text())
+	compressed = read_as_relationships(str(tmp_path / "sample.txt.gz"), chunk_size=7)
+	assert np.array_equal(compressed.neighbors, relationships.neighbors)
+	assert np.array_equal(compressed.relationships, relationships.relationships)
+
+	(tmp_path / "broken.txt").write_text("64512|64513|1\n")
+	with pytest.raises(Exception):
+		read_as_relationships(str(tmp_path / "broken.txt"))
+
+
+def test_simulation():
+	"""
+	The largest connected component of a file is simulated, with the roles
+	selected among its customers.
+	"""
+	random.seed(1)
+	graph, victim, adversary, allies = load_directed_AS_graph(SAMPLE, 2, 1000)
+	assert len(graph.nodes) == read_as_relationships(SAMPLE).nr_ASes - 2
+	assert all(graph.nodes[node]["type"] == "C" for node in [victim, adversary] + allies)
+	assert graph.nodes[adversary]["as_path_to_victim"][-1] == victim
+
+	result = run_experiment(create_config(seed=1, as_relationships=SAMPLE, simulation_length=200, engine="fast"))
+	assert result["kpis"]["victim"]["received"] > 0
+
+	# the indicators name the ASes by their ASNs in the file
+	asns = set(read_as_relationships(SAMPLE).asns.tolist())
+	net, kpis = result["network"], result["kpis"]
+	assert kpis["victim"]["asn"] == net.init_graph.nodes[net.victim.asn]["asn"]
+	assert [ally["asn"] for ally in kpis["allies"]] == [net.init_graph.nodes[ally.asn]["asn"] for ally in net.allies]
+	assert all(AS["asn"] in asns for AS in [kpis["victim"]] + kpis["allies"])
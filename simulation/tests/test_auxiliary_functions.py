@@ -0,0 +1,52 @@
+"""
+A PyTest file that contains tests for validating functions from "auxiliary_functions.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.auxiliary_functions import BatchedLogSink, extract_log
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_log_sink_roundtrip(tmp_path, compress):
+	"""
+	The messages of every logger can be extracted from the shared files,
+	including multi-line messages, and repeated logger creation does not
+	duplicate messages.
+	"""
+	sink = BatchedLogSink(str(tmp_path), nr_files=3, compress=compress, batch_size=7)
+	loggers = {}
+	for asn in range(10):
+		sink.create_logger(f"AS{asn}-LOGGER", f"{tmp_path}/log_node_{asn}.txt")
+		loggers[asn] = sink.create_logger(f"AS{asn}-LOGGER", f"{tmp_path}/log_node_{asn}.txt")
+	for step in range(50):
+		for asn, logger in loggers.items():
+			logger.info("[%s] step of AS %s\nsecond line", step, asn)
+	sink.close()
+	assert all(sink.handler not in logger.handlers for logger in loggers.values())
+
+	assert len(list(tmp_path.glob("log_sink_*_of_3.txt*"))) == 3
+	lines = extract_log(str(tmp_path), "log_node_4", f"{tmp_path}/log_node_4.txt")
+	assert len(lines) == 100
+	assert lines[:2] == ["AS4-LOGGER ==> INFO: [0] step of AS 4\n", "second line\n"]
+	assert Path(f"{tmp_path}/log_node_4.txt").read_text() == "".join(lines)
+	assert extract_log(str(tmp_path), "log_node_unknown") == []
+
+
+def test_log_sink_without_messages(tmp_path):
+	"""
+	A sink that never receives a message does not create any files.
+	"""
+	sink = BatchedLogSink(str(tmp_path))
+	sink.create_logger("AS0-LOGGER", f"{tmp_path}/log_node_0.txt", level=100).info("filtered")
+	sink.close()
+
+	assert list(tmp_path.iterdir()) == []
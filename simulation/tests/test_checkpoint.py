@@ -0,0 +1,78 @@
+"""
+A PyTest file that contains tests for validating the checkpoints from "checkpoint.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+from pathlib import Path
+from argparse import Namespace
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.scheduler import SimpyScheduler, HeapScheduler
+from src.checkpoint import save_checkpoint, load_checkpoint, change_parameters
+from conftest import create_logger, start_internet
+
+
+def results(net):
+	"""
+	:return: what the simulation recorded
+	:rtype: tuple
+	"""
+	return (
+		net.env.nr_events,
+		net.victim.received_attacks,
+		[ally.received_attacks for ally in net.allies],
+		net.plot_values,
+		[AS.router_table.version for AS in net.ASes]
+	)
+
+
+@pytest.mark.parametrize("scheduler", [SimpyScheduler, HeapScheduler])
+@pytest.mark.parametrize("traffic_model", ["packet", "fluid"])
+def test_restored_simulation_continues_identically(create_random_internet, tmp_path, scheduler, traffic_model):
+	"""
+	A simulation restored from a checkpoint ends exactly like the simulation
+	that was not interrupted.
+	"""
+	net = start_internet(create_random_internet(scheduler=scheduler, traffic_model=traffic_model))
+	net.env.run(until=400)
+	expected = results(net)
+
+	net = start_internet(create_random_internet(scheduler=scheduler, traffic_model=traffic_model))
+	net.env.run(until=120)
+	save_checkpoint(str(tmp_path / "checkpoint.pkl.gz"), net)
+	# draw other random numbers than the saved simulation
+	random.seed(0)
+	np.random.seed(0)
+
+	restored = load_checkpoint(str(tmp_path / "checkpoint.pkl.gz"))
+	restored.redirect_output(create_logger("[NETWORK]"), create_logger, str(tmp_path), str(tmp_path))
+	assert restored.env.now == 120
+	restored.env.run(until=400)
+
+	assert results(restored) == expected
+	assert expected[1]
+
+
+def test_change_parameters(create_random_internet):
+	"""
+	The parameters that can change in a running simulation are applied, but
+	the fluid traffic model can not change its timing.
+	"""
+	args = Namespace(simulation_length=400, propagation_delay=3, rat_ttl=50, attack_frequency=1, full_attack_volume=2000)
+
+	net = start_internet(create_random_internet())
+	change_parameters(net, args)
+	assert (net.rat_ttl, net.source.full_attack_vol) == (50, 2000)
+
+	net = start_internet(create_random_internet(traffic_model="fluid"))
+	args.propagation_delay = 4
+	with pytest.raises(Exception):
+		change_parameters(net, args)
@@ -0,0 +1,97 @@
+"""
+A PyTest file that contains tests for validating the "Ensemble" class from "ensemble.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.scheduler import HeapScheduler
+from conftest import VICTIM, ALLY, run_internet
+
+
+@pytest.fixture
+def run_ensemble(create_meshed_internet):
+	"""
+	Runs the small meshed Internet with the fluid traffic model and the given
+	number of replicas.
+
+	:return: the function running an Internet instance
+	:rtype: callable
+	"""
+	def run(nr_replicas, until=400, recording_chunk_size=None):
+		net = create_meshed_internet(
+			HeapScheduler, 500, traffic_model="fluid", nr_replicas=nr_replicas,
+			replica_seed=0, recording_chunk_size=recording_chunk_size
+		)
+		return run_internet(net, until)
+	return run
+
+
+def test_ensemble_replica_zero(run_ensemble):
+	"""
+	The first replica is the simulation itself.
+	"""
+	net = run_ensemble(4)
+	ensemble = net.ensemble
+
+	assert [(t, v[0]) for t, v in ensemble.sent] == net.source.attack_traffic_recording
+	assert [(t, v[0]) for t, v in ensemble.received[VICTIM]] == net.victim.received_attacks
+	assert [(t, v[0]) for t, v in ensemble.received[ALLY]] == net.ASes[ALLY].received_attacks
+	assert [v[0] for _, v in ensemble.attack_volume_approximations] == pytest.approx(net.victim.attack_volume_approximations)
+
+
+def test_ensemble_replicas_differ(run_ensemble):
+	"""
+	The replicas differ in their traffic, but not in the one of the first.
+	"""
+	single = run_ensemble(1)
+	net = run_ensemble(8)
+	totals = net.ensemble.totals()
+
+	assert single.ensemble is None
+	assert net.victim.received_attacks == single.victim.received_attacks
+	assert totals["sent"].shape == (8,)
+	assert len(np.unique(totals["sent"])) > 1
+	assert totals["sent"] == pytest.approx(totals[VICTIM] + totals[ALLY] + net.fluid_flow.delay_line.sum(axis=(0, 1)))
+
+	summary = net.ensemble.summary()
+	assert set(summary) == {"sent", VICTIM, ALLY}
+	assert summary["sent"][0] == pytest.approx(totals["sent"].mean())
+	assert summary["sent"][1] > 0
+
+
+def test_ensemble_shares_attack_start(run_ensemble):
+	"""
+	The replicas only differ in the noise of the attack volume, since they
+	share the help signal and ally activations of the first one; their
+	series are recorded in bounded memory, and their totals as they are
+	recorded.
+	"""
+	net = run_ensemble(8, recording_chunk_size=16)
+	ensemble = net.ensemble
+
+	sent = ensemble.sent.array()
+	noise = net.source.full_attack_vol / 15 + 20
+	assert np.all(np.abs(sent["value"] - sent["value"][:, :1]) <= noise)
+
+	for name, recorder in ensemble.recorders().items():
+		assert len(recorder.buffer) <= 16
+		assert net.recorders()[name] is recorder
+	assert ensemble.totals()["sent"] == pytest.approx(sent["value"].sum(axis=0))
+	assert ensemble.totals()[VICTIM] == pytest.approx(ensemble.received[VICTIM].array()["value"].sum(axis=0))
+
+
+def test_ensemble_requires_fluid(create_meshed_internet):
+	"""
+	Replicas can only be simulated with the fluid traffic model.
+	"""
+	with pytest.raises(Exception):
+		create_meshed_internet(HeapScheduler, 500, traffic_model="packet", nr_replicas=2, replica_seed=0)
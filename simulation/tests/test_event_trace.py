@@ -0,0 +1,45 @@
+"""
+A PyTest file that contains tests for validating the event trace from "event_trace.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.packet import Packet
+from src.event_trace import EventTrace, query_trace
+
+
+def test_trace_roundtrip_and_query(tmp_path):
+	"""
+	Events written in several chunks can be loaded as one .npy array, and
+	filtered and aggregated in chunks.
+	"""
+	path = f"{tmp_path}/event_trace.npy"
+	trace = EventTrace(path, chunk_size=7)
+	help_pkt = Packet("help_0_0", "RAT", 0, None, 0, {"protocol": "help"}, attack_volume=900)
+	for step in range(20):
+		attack_pkt = Packet(f"Attack_Packet_1_{step}", "STD", 1, 0, 1, {"relay_type": "next_hop"}, attack_volume=10.0, hc=2)
+		trace.record(step, "send", attack_pkt, 1)
+		trace.record(step + 3, "receive", attack_pkt, step % 2)
+	trace.record(4, "receive", help_pkt, 3)
+	trace.close()
+
+	events = np.load(path)
+	assert len(events) == 41
+	assert events["time"][:4].tolist() == [0, 3, 1, 4]
+
+	assert query_trace(path, {"event": "receive"}, "asn", chunk_size=8) == {
+		0: {"count": 10, "attack_volume": 100.0},
+		1: {"count": 10, "attack_volume": 100.0},
+		3: {"count": 1, "attack_volume": 900.0}
+	}
+	assert query_trace(path, {"protocol": "none", "time": (10, None)}) == {None: {"count": 23, "attack_volume": 230.0}}
+	assert query_trace(path, {"protocol": "help"}, "protocol") == {"help": {"count": 1, "attack_volume": 900.0}}
@@ -0,0 +1,71 @@
+"""
+A PyTest file that contains tests for validating the programmatic simulation
+interface "run_experiment" from "simulation_main.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import os
+import sys
+import json
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from simulation_main import create_config, run_experiment
+
+
+def test_in_memory(tmp_path, monkeypatch):
+	"""
+	An experiment returns its recordings and indicators without writing
+	anything, and a reset network simulates the same scenario again with the
+	same results as the newly created one.
+	"""
+	monkeypatch.chdir(tmp_path)
+	config = create_config(seed=3, nr_ASes=60, simulation_length=300, engine="fast")
+	first = run_experiment(config)
+	assert os.listdir(tmp_path) == []
+
+	net = first["network"]
+	received = first["recordings"][f"AS{net.victim.asn}_received_attacks"]
+	assert first["kpis"]["victim"]["received"] == pytest.approx(received["value"].sum())
+	assert first["events"] > 0
+
+	ASes = list(net.ASes)
+	replays = [run_experiment(config, net=net) for _ in range(2)]
+	assert net.ASes == ASes
+	assert replays[0]["kpis"] == replays[1]["kpis"] and replays[0]["events"] == replays[1]["events"]
+	assert all(
+		np.array_equal(recording, replays[1]["recordings"][name])
+		for name, recording in replays[0]["recordings"].items()
+	)
+
+	# a replay is the same as the experiment on the newly created network
+	assert replays[0]["kpis"] == first["kpis"] and replays[0]["events"] == first["events"]
+	assert all(
+		np.array_equal(recording, replays[0]["recordings"][name])
+		for name, recording in first["recordings"].items()
+	)
+
+	# another scenario on the same network
+	config.full_attack_volume = 2000
+	stronger = run_experiment(config, net=net)
+	assert stronger["kpis"]["victim"]["received"] > replays[0]["kpis"]["victim"]["received"]
+
+	with pytest.raises(Exception):
+		create_config(nr_ases=60)
+
+
+def test_output_path(tmp_path):
+	"""
+	If asked to, an experiment saves its logs and indicators.
+	"""
+	config = create_config(seed=3, nr_ASes=40, simulation_length=100, verbosity="info")
+	result = run_experiment(config, output_path=str(tmp_path / "experiment"))
+	with open(tmp_path / "experiment" / "kpis.json") as file:
+		assert json.load(file) == json.loads(json.dumps(result["kpis"]))
+	assert any(path.name.startswith("log_sink") for path in (tmp_path / "experiment").iterdir())
@@ -0,0 +1,50 @@
+"""
+A PyTest file that contains tests for validating the "FluidFlow" class from "fluid_flow.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from conftest import VICTIM, run_internet
+
+
+def test_fluid_matches_packets_without_rats(create_meshed_internet):
+	"""
+	As long as no routing table changes, the victim receives exactly the same
+	traffic with both traffic models.
+	"""
+	packets = run_internet(create_meshed_internet(victim_scrubbing_cap=10**6, traffic_model="packet"), 60)
+	fluid = run_internet(create_meshed_internet(victim_scrubbing_cap=10**6, traffic_model="fluid"), 60)
+
+	assert fluid.victim.received_attacks == packets.victim.received_attacks
+	assert fluid.source.attack_traffic_recording == packets.source.attack_traffic_recording
+
+
+def test_fluid_split_matrix(create_meshed_internet):
+	"""
+	The split matrix contains the split percentages of all routing tables,
+	and all injected traffic either arrived or is still on its way.
+	"""
+	net = run_internet(create_meshed_internet(victim_scrubbing_cap=10**6, traffic_model="fluid"), 30)
+	split_matrix = net.fluid_flow.split_matrix.toarray()
+
+	for AS in net.ASes:
+		for next_hop, percentage in AS.router_table.determine_next_hops(VICTIM):
+			assert split_matrix[next_hop, AS.asn] == percentage
+	assert split_matrix.sum(axis=0).tolist() == [0, 1, 1, 1, 1, 1]
+
+	sent = sum(volume for _, volume in net.source.attack_traffic_recording)
+	received = sum(volume for _, volume in net.victim.received_attacks)
+	assert received + net.fluid_flow.delay_line.sum() == pytest.approx(sent)
+
+
+def test_unknown_traffic_model(create_meshed_internet):
+	with pytest.raises(Exception):
+		create_meshed_internet(traffic_model="wave")
@@ -0,0 +1,53 @@
+"""
+A PyTest file that contains tests for validating the generation of the
+initial graph from "graph_generation.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+from pathlib import Path
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.graph_generation import bfs_from_victim, to_directed_via_bfs, generate_directed_AS_graph
+
+
+def test_orientation():
+	"""
+	Every edge points towards the node the search from the victim discovers
+	first, also between nodes equally far from the victim.
+	"""
+	graph = nx.Graph([(0, 1), (0, 2), (1, 2), (1, 3), (2, 3), (3, 4)])
+	order, distances = bfs_from_victim(graph, 0)
+	assert order == [0, 1, 2, 3, 4] and distances == [0, 1, 1, 2, 3]
+
+	directed = to_directed_via_bfs(graph, 0)
+	assert sorted(directed.edges) == [(1, 0), (2, 0), (2, 1), (3, 1), (3, 2), (4, 3)]
+	assert bfs_from_victim(directed, 0)[1] == distances
+
+
+def test_generated_graph():
+	"""
+	In a generated graph, every AS has exactly one next hop, and its AS path
+	is the shortest one to the victim, along these next hops.
+	"""
+	random.seed(2)
+	np.random.seed(2)
+	graph, victim, adversary, allies = generate_directed_AS_graph(300, 2, 1000)
+	distances = nx.shortest_path_length(graph.to_undirected(), target=victim)
+
+	assert nx.is_directed_acyclic_graph(graph)
+	assert graph.out_degree(victim) == 0
+	for node in graph.nodes:
+		as_path = graph.nodes[node]["as_path_to_victim"]
+		assert as_path[0] == node and as_path[-1] == victim
+		assert len(as_path) == distances[node] + 1
+		assert all(graph.has_edge(u, v) for u, v in zip(as_path, as_path[1:]))
+		if node != victim:
+			assert graph.out_degree(node) == 1
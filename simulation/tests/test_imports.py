@@ -0,0 +1,27 @@
+"""
+A PyTest file that contains tests for validating that the simulation imports
+the plotting and visualization libraries only once they are used
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmark_imports import measure_import, FORBIDDEN_PACKAGES
+
+
+def test_lazy_imports():
+	"""
+	Starting the simulation does not import any of the packages that are only
+	needed for figures or optional features.
+	"""
+	total, self_times = measure_import("simulation_main")
+	assert total is not None
+	loaded = {name.split(".")[0] for name in self_times}
+	assert "simpy" in loaded
+	assert not loaded.intersection(FORBIDDEN_PACKAGES)
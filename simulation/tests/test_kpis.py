@@ -0,0 +1,102 @@
+"""
+A PyTest file that contains tests for validating the key performance
+indicators from "kpis.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import json
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.kpis import LoadKPIs, EstimationKPIs
+from conftest import run_internet
+
+
+def test_load_kpis():
+	"""
+	Receptions at the same time form one step, and overloaded steps last
+	until the next step, or the end of the simulation.
+	"""
+	kpis = LoadKPIs(100)
+	for time, attack_volume in [(1, 60), (1, 60), (2, 50), (5, 150)]:
+		kpis.record(time, attack_volume)
+
+	summary = kpis.summary(now=6)
+	assert summary["received"] == 320
+	assert summary["steps"] == 3
+	assert summary["max_load"] == 150
+	assert summary["overloaded_steps"] == 2
+	assert summary["overloaded_time"] == (2 - 1) + (6 - 5)
+	assert summary["peak_utilisation"] == 1.5
+
+	# the summary does not complete the current step
+	kpis.record(5, 10)
+	assert kpis.summary(now=6)["max_load"] == 160
+
+
+def test_settling_latency():
+	"""
+	The split settles at the first of "window" consecutive steps after the
+	help signal, in which the load changes by at most the tolerance.
+	"""
+	kpis = LoadKPIs(100, tolerance=0.05, window=3)
+	kpis.record(0, 500)
+	kpis.record_help(0)
+	for time, attack_volume in enumerate([400, 200, 120, 104, 101, 103, 102], start=1):
+		kpis.record(time, attack_volume)
+	assert kpis.settling_latency is None
+
+	kpis.record(8, 300)
+	assert kpis.settling_latency == 5
+
+
+def test_estimation_kpis():
+	"""
+	The errors of the approximations are aggregated without storing them.
+	"""
+	kpis = EstimationKPIs()
+	assert kpis.summary() is None
+
+	kpis.record(90, 100)
+	kpis.record(130, 100)
+	summary = kpis.summary()
+	assert summary["mean_absolute_error"] == 20
+	assert summary["root_mean_squared_error"] == pytest.approx(np.sqrt((10 ** 2 + 30 ** 2) / 2))
+	assert summary["mean_relative_error"] == pytest.approx(0.2)
+	assert summary["max_absolute_error"] == 30
+
+
+@pytest.mark.parametrize("traffic_model", ["packet", "fluid"])
+def test_kpi_summary(create_random_internet, traffic_model):
+	"""
+	The indicators of a simulation match its recordings, and can be saved as
+	JSON.
+	"""
+	net = run_internet(create_random_internet(traffic_model=traffic_model), 400)
+
+	kpis = json.loads(json.dumps(net.kpi_summary()))
+	received = net.victim.received_attacks.array()
+	assert kpis["victim"]["received"] == pytest.approx(received["value"].sum())
+	assert kpis["victim"]["steps"] == len(np.unique(received["time"]))
+	assert [ally["asn"] for ally in kpis["allies"]] == [ally.asn for ally in net.allies]
+	assert kpis["help_time"] is not None
+
+	# every approximation is compared with the volume sent one path delay
+	# before it was made
+	hops = len(net.source.as_path_to_victim) - 1
+	sent = net.source.attack_traffic_recording.array()
+	expected = EstimationKPIs()
+	for time, approximation in net.plot_values["victim_attack_approximations"]:
+		indx = np.searchsorted(sent["time"], time - hops * 3, side="right")
+		if indx:
+			expected.record(approximation, sent["value"][indx - 1])
+	assert net.victim.estimation_kpis == expected
+	assert kpis["estimation_error"]["samples"] == expected.nr_samples > 0
+	assert kpis["rat_messages"]["total"] == sum(net.rat_statistics()["forwarded"].values())
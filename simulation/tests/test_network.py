@@ -0,0 +1,169 @@
+"""
+A PyTest file that contains tests for validating the "Internet" class from "network.py" and the interplay of the
+autonomous systems within it.
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.packet import Packet
+from conftest import VICTIM, SOURCE, ALLY
+
+
+def help_pkt(identifier):
+	return Packet(
+		identifier,
+		"RAT",
+		VICTIM,
+		None,
+		VICTIM,
+		{
+			"attacker_asn": SOURCE,
+			"scrubbing_capability": 200,
+			"relay_type": "broadcast",
+			"protocol": "help",
+			"ally_percentage": 1.0,
+			"initial_call": True
+		},
+		attack_volume=1000
+	)
+
+
+def test_broadcast_duplicates_are_suppressed(meshed_internet):
+	"""
+	Every AS broadcasts a help RAT only once, further copies arriving over
+	other paths are suppressed.
+	"""
+	victim = meshed_internet.victim
+	victim.send_packet(help_pkt("help_0_0"), victim.ebgp_AS_peers)
+	meshed_internet.env.run(until=50)
+
+	statistics = meshed_internet.rat_statistics()
+	assert statistics["suppressed"]["help"] > 0
+	# the victim sends to its peers, every other AS to its peers except the
+	# one it received the RAT from first
+	assert statistics["forwarded"]["help"] == sum(len(AS.ebgp_AS_peers) - 1 for AS in meshed_internet.ASes) + 1
+	assert all(AS.helping_nodes == [VICTIM] for AS in meshed_internet.ASes if AS is not victim)
+
+
+def test_seen_rats_are_evicted(meshed_internet):
+	"""
+	Seen RAT identifiers are forgotten after "rat_ttl" steps.
+	"""
+	meshed_internet.rat_ttl = 20
+	victim = meshed_internet.victim
+	victim.send_packet(help_pkt("help_0_0"), victim.ebgp_AS_peers)
+	meshed_internet.env.run(until=30)
+	assert all("help_0_0" in AS.seen_rats for AS in meshed_internet.ASes if AS is not victim)
+
+	# identifiers are evicted lazily, when the next RAT arrives
+
+	victim.send_packet(help_pkt("help_1_0"), victim.ebgp_AS_peers)
+	meshed_internet.env.run(until=50)
+	assert all(AS.seen_rats == {"help_1_0"} for AS in meshed_internet.ASes if AS is not victim)
+
+
+def test_same_time_deliveries_are_coalesced(meshed_internet):
+	"""
+	Attack fragments arriving at an AS at the same time are delivered as one
+	packet, after the RATs arriving at the same time.
+	"""
+	for last_hop, attack_volume in [(3, 300), (4, 400)]:
+		pkt = Packet("Attack_Packet_1_0", "STD", SOURCE, VICTIM, last_hop, {"relay_type": "next_hop"}, attack_volume=attack_volume)
+		meshed_internet.relay_std_packet(pkt, [(VICTIM, 1.0)])
+	meshed_internet.relay_rat(help_pkt("help_0_0"), [VICTIM])
+
+	assert list(meshed_internet.pending_deliveries) == [(3, VICTIM)]
+	assert [pkt.type for pkt in meshed_internet.pending_deliveries[(3, VICTIM)]] == ["STD", "STD", "RAT"]
+
+	meshed_internet.env.run(until=4)
+	assert meshed_internet.victim.seen_rats == {"help_0_0"}
+	assert meshed_internet.victim.received_attacks == [(3, 700)]
+	assert (3, VICTIM) not in meshed_internet.pending_deliveries
+
+
+def test_lazy_ASes(meshed_internet):
+	"""
+	Only the special ASes are created right away, all others once a packet
+	reaches them, with the routes their rows describe.
+	"""
+	ASes = meshed_internet.ASes
+	assert [AS.asn for AS in ASes.materialized()] == [VICTIM, SOURCE, ALLY]
+	lazy_next_hops = {asn: ASes.next_hops(asn) for asn in [3, 4, 5]}
+
+	pkt = Packet("Attack_Packet_1_0", "STD", SOURCE, VICTIM, SOURCE, {"relay_type": "next_hop"}, attack_volume=100)
+	meshed_internet.relay_std_packet(pkt, [(3, 1.0)])
+	meshed_internet.env.run(until=10)
+	assert ASes.is_materialized(3) and not ASes.is_materialized(5)
+	assert ASes[3].ebgp_AS_peers == [1, 5, 0, 4]
+
+	assert len(ASes) == 6 and len(list(ASes)) == 6
+	assert {asn: ASes[asn].router_table.determine_next_hops(VICTIM) for asn in [3, 4, 5]} == lazy_next_hops
+	with pytest.raises(IndexError):
+		ASes[6]
+
+
+def test_topology_diff(meshed_internet, tmp_path):
+	"""
+	The topology diff compares the forwarding edges with the initial graph,
+	and contains the subgraph the attack traffic of the source can take.
+	"""
+	forwarding = meshed_internet.forwarding_edges()
+	initial = set(meshed_internet.init_graph.edges)
+	diff = meshed_internet.topology_diff()
+	assert diff["added"] == [] and diff["reversed"] == []
+	assert {(u, v) for u, v, _ in diff["removed"]} == initial - set(forwarding)
+	assert diff["attack"][0][0] == SOURCE
+	assert all(forwarding[(u, v)] == percentage for u, v, percentage in diff["attack"])
+	assert VICTIM in {v for _, v, _ in diff["attack"]}
+
+	# an edge in the direction opposite to the initial one is reversed
+	(u, v), percentage = next(iter(forwarding.items()))
+	meshed_internet.init_graph.remove_edge(u, v)
+	meshed_internet.init_graph.add_edge(v, u)
+	assert meshed_internet.topology_diff()["reversed"] == [[u, v, percentage]]
+
+	meshed_internet.export_topology_diff(str(tmp_path / "diff.txt"), "edgelist")
+	lines = (tmp_path / "diff.txt").read_text().splitlines()
+	assert f"{u} {v} reversed {percentage}" in lines
+	assert len(lines) == sum(len(meshed_internet.topology_diff()[kind]) for kind in ["added", "reversed", "removed", "attack"])
+
+
+def test_reset(meshed_internet):
+	"""
+	A reset network, simulated with the same random numbers, repeats the
+	simulation exactly, on the same AS objects.
+	"""
+	def routing_tables():
+		return [
+			(AS.router_table.size, {key: column[:AS.router_table.size].tolist() for key, column in AS.router_table.columns.items()})
+			for AS in meshed_internet.ASes
+		]
+
+	initial_tables = routing_tables()
+	ASes = list(meshed_internet.ASes)
+	random_state = random.getstate()
+
+	runs = []
+	for _ in range(2):
+		random.setstate(random_state)
+		meshed_internet.source.attack_cycle()
+		meshed_internet.env.run(until=200)
+		runs.append((meshed_internet.env.nr_events, meshed_internet.recorders(), meshed_internet.kpi_summary(), routing_tables()))
+
+		meshed_internet.reset()
+		assert meshed_internet.env.now == 0 and meshed_internet.pending_deliveries == {}
+		assert routing_tables() == initial_tables
+		assert len(meshed_internet.victim.received_attacks) == 0
+		assert meshed_internet.ASes == ASes and meshed_internet.ASes[0].env is meshed_internet.env
+
+	assert runs[0][2]["help_time"] is not None and runs[0][3] != initial_tables
+	assert runs[0] == runs[1]
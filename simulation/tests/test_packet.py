@@ -0,0 +1,76 @@
+"""
+A PyTest file that contains tests for validating the "Packet" class from "packet.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import pickle
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.packet import Packet
+
+
+@pytest.fixture
+def support_pkt():
+	"""
+	Generates a support RAT, as sent out by an ally.
+
+	:return: the packet
+	:rtype: Packet
+	"""
+	return Packet(
+		"support_from_3",
+		"RAT",
+		3,
+		None,
+		3,
+		{"protocol": "support", "as_path_to_victim": (3, 2, 1, 0)}
+	)
+
+
+def test_copy_shares_content(support_pkt):
+	"""
+	Copies share the content, but not the per-hop fields.
+	"""
+	copied = support_pkt.copy(last_hop=2, hc=1)
+
+	assert copied.content is support_pkt.content
+	assert (copied.last_hop, copied.hc) == (2, 1)
+	assert (support_pkt.last_hop, support_pkt.hc) == (3, 0)
+
+
+def test_content_is_read_only(support_pkt):
+	"""
+	The shared content can not be changed in place.
+	"""
+	with pytest.raises(TypeError):
+		support_pkt.content["protocol"] = "help"
+
+
+def test_copy_with_content(support_pkt):
+	"""
+	Changing the content of a copy leaves the content of the original intact.
+	"""
+	copied = support_pkt.copy_with_content(splitting_node_time=12)
+
+	assert copied.content["splitting_node_time"] == 12
+	assert copied.content["as_path_to_victim"] == (3, 2, 1, 0)
+	assert "splitting_node_time" not in support_pkt.content
+
+
+def test_pickle(support_pkt):
+	"""
+	Packets can be pickled, e.g., to be sent to another process, and keep
+	their read-only content.
+	"""
+	copied = pickle.loads(pickle.dumps(support_pkt.copy(next_hop=2)))
+
+	assert repr(copied) == repr(support_pkt.copy(next_hop=2))
+	with pytest.raises(TypeError):
+		copied.content["protocol"] = "help"
@@ -0,0 +1,124 @@
+"""
+A PyTest file that contains tests for validating the partitioned simulation from "pdes.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.kpis import EstimationKPIs
+from src.graph_generation import generate_directed_AS_graph
+from src.pdes import partition_graph, run_partitioned, export_state
+from src.auxiliary_functions import extract_log
+from simulation_main import create_config, run_experiment
+from conftest import run_internet
+
+
+def same(a, b):
+	"""
+	Compares two attributes, which might contain numpy arrays.
+
+	:return: whether both are equal
+	:rtype: bool
+	"""
+	if isinstance(a, dict):
+		return a.keys() == b.keys() and all(same(a[key], b[key]) for key in a)
+	if isinstance(a, np.ndarray):
+		return np.array_equal(a, b)
+	return a == b
+
+
+def simulate(create_random_internet, nr_partitions):
+	"""
+	Runs a simulation on a random graph, with the given number of
+	partitions.
+
+	:return: the Internet instance after the run
+	:rtype: Internet
+	"""
+	net = create_random_internet(seed=1, nr_ASes=80)
+	if nr_partitions > 1:
+		run_partitioned(net, nr_partitions, 400)
+		return net
+	return run_internet(net, 400)
+
+
+def test_partition_graph():
+	"""
+	Every AS belongs to exactly one of the requested number of partitions.
+	"""
+	random.seed(0)
+	np.random.seed(0)
+	graph = generate_directed_AS_graph(60, 2, 1000)[0]
+
+	partition_of = partition_graph(graph, 3)
+	assert sorted(set(partition_of)) == [0, 1, 2]
+	assert len(partition_of) == 60
+	assert partition_of == partition_graph(graph, 3)
+
+	with pytest.raises(Exception):
+		partition_graph(graph, 61)
+
+
+@pytest.mark.parametrize("nr_partitions", [2, 3])
+def test_partitioned_equals_sequential(create_random_internet, nr_partitions):
+	"""
+	A partitioned simulation ends in exactly the state of a sequential one.
+	"""
+	sequential = simulate(create_random_internet, 1)
+	partitioned = simulate(create_random_internet, nr_partitions)
+
+	assert sequential.victim.received_attacks
+	assert partitioned.env.nr_events == sequential.env.nr_events
+	assert partitioned.env.now == sequential.env.now
+	assert same(partitioned.plot_values, sequential.plot_values)
+
+	# the approximations can only be compared to what the source sent, if
+	# it is simulated by the same process as the victim
+	assert partitioned.victim.estimation_kpis in [sequential.victim.estimation_kpis, EstimationKPIs()]
+	partitioned.victim.estimation_kpis = sequential.victim.estimation_kpis
+
+	states = export_state(sequential, range(sequential.nr_ASes))
+	partitioned_states = export_state(partitioned, range(partitioned.nr_ASes))
+	for asn in range(sequential.nr_ASes):
+		for state, partitioned_state in zip(states[asn], partitioned_states[asn]):
+			assert same(state, partitioned_state), asn
+
+
+@pytest.mark.parametrize("options, message", [
+	({"traffic_model": "fluid"}, "packet traffic model"),
+	({"propagation_delay": 0}, "propagation delay")
+])
+def test_partitioned_requirements(create_random_internet, options, message):
+	"""
+	Only the packet traffic model can be partitioned, and only with a
+	propagation delay to advance by.
+	"""
+	net = create_random_internet(seed=0, nr_ASes=30, **options)
+	with pytest.raises(Exception, match=message):
+		run_partitioned(net, 2, 100)
+
+
+def test_partitioned_logs(tmp_path):
+	"""
+	The messages of ASes created by the forked processes of a partitioned
+	simulation can be extracted by their tag, just like sequential ones.
+	"""
+	logs = []
+	for nr_partitions in [1, 2]:
+		output_path = tmp_path / str(nr_partitions)
+		config = create_config(seed=3, nr_ASes=60, simulation_length=200, partitions=nr_partitions, log_files=2, verbosity="debug")
+		net = run_experiment(config, output_path=str(output_path))["network"]
+		logs.append({asn: extract_log(str(output_path), f"log_node_{asn}") for asn in range(net.nr_ASes)})
+
+	special = {net.victim.asn, net.source.asn} | {ally.asn for ally in net.allies}
+	assert any(lines for asn, lines in logs[0].items() if asn not in special)
+	assert logs[1] == logs[0]
@@ -0,0 +1,56 @@
+"""
+A PyTest file that contains tests for validating the figure rendering from
+"plotting.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.plotting import decimate, FigureRenderer
+from conftest import run_internet
+
+
+def test_decimate():
+	"""
+	Long series are reduced to the minima and maxima of their sections, in
+	the order of time; short ones are kept.
+	"""
+	times = np.arange(10001, dtype=np.float64)
+	values = np.sin(times / 50)
+	values[1234] = 5
+	values[8765] = -5
+
+	decimated_times, decimated_values = decimate(times, values, 1000)
+	assert len(decimated_times) <= 1000
+	assert np.all(np.diff(decimated_times) > 0)
+	assert decimated_values.max() == 5 and decimated_values.min() == -5
+	assert np.array_equal(values[decimated_times.astype(int)], decimated_values)
+
+	short_times, short_values = decimate(times[:10], values[:10], 1000)
+	assert np.array_equal(short_times, times[:10]) and np.array_equal(short_values, values[:10])
+	assert decimate(times, values, None)[0].size == times.size
+
+
+def test_background_rendering(create_random_internet, tmp_path):
+	"""
+	The figure of a simulation is rendered in the background, in all
+	requested formats, and can not be shown from there.
+	"""
+	net = run_internet(create_random_internet(nr_ASes=40), 150)
+
+	with FigureRenderer() as renderer:
+		with pytest.raises(Exception):
+			net.plot(renderer=renderer)
+		net.plot(show=False, formats=["png", "pdf"], dpi=50, max_points=100, renderer=renderer)
+
+	assert (tmp_path / "recorded_attack_traffic.png").stat().st_size > 0
+	assert (tmp_path / "recorded_attack_traffic.pdf").stat().st_size > 0
+	assert not (tmp_path / "recorded_attack_traffic.svg").exists()
@@ -0,0 +1,158 @@
+"""
+A PyTest file that contains tests for validating the "Recorder" class
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import pickle
+from pathlib import Path
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.recorder import Recorder
+from conftest import run_internet
+
+
+def test_list_semantics():
+	"""
+	A recorder is used like the list of tuples it replaces.
+	"""
+	recorder = Recorder()
+	assert not recorder
+	records = [(float(t), t * 1.5) for t in range(200)]
+	for record in records:
+		recorder.append(record)
+
+	assert len(recorder) == 200
+	assert recorder[-1] == (199.0, 298.5)
+	assert recorder[3] == (3.0, 4.5)
+	assert recorder == records
+	assert list(recorder[:-5]["value"]) == [value for _, value in records[:-5]]
+
+	approximations = Recorder(np.float64)
+	approximations.append(700)
+	assert approximations[-1] == 700.0 and isinstance(approximations[-1], float)
+
+
+def test_spill(tmp_path):
+	"""
+	Only one chunk is kept in memory, the remaining records are written to a
+	.npy file, which can be memory-mapped at any time.
+	"""
+	path = str(tmp_path / "recordings" / "test.npy")
+	recorder = Recorder(path=path, chunk_size=4)
+	records = [(float(t), float(t * t)) for t in range(10)]
+	for record in records:
+		recorder.append(record)
+
+	assert (recorder.nr_spilled, recorder.nr_buffered) == (8, 2)
+	assert len(recorder.buffer) == 4
+	assert np.load(path, mmap_mode="r")["value"].tolist() == [value for _, value in records[:8]]
+	assert recorder[1] == records[1] and recorder[-1] == records[-1]
+	assert recorder == records
+
+	# slices are read from the file and the buffer, without writing to it
+	for key in [slice(None), slice(2, 9), slice(1, 7, 2), slice(None, None, -1), slice(9, 1, -3), slice(8, 10), slice(-3, -9, -1), slice(5, 5)]:
+		assert recorder[key].tolist() == records[key], key
+	assert (recorder.nr_spilled, recorder.nr_buffered) == (8, 2)
+
+	array = recorder.array()
+	assert isinstance(array, np.memmap)
+	assert array["time"].tolist() == [time for time, _ in records]
+
+
+def test_close(tmp_path):
+	"""
+	Closing a recorder writes its buffered records and closes its file; the
+	recording can be continued afterwards.
+	"""
+	path = str(tmp_path / "test.npy")
+	recorder = Recorder(path=path, chunk_size=4)
+	records = [(float(t), float(t * t)) for t in range(10)]
+	for record in records[:6]:
+		recorder.append(record)
+	file = recorder.file
+	recorder.close()
+	assert file.closed and recorder.file is None
+	assert np.load(path)["value"].tolist() == [value for _, value in records[:6]]
+
+	for record in records[6:]:
+		recorder.append(record)
+	recorder.close()
+	recorder.close()
+	recorder.close()
+	assert np.load(path)["time"].tolist() == [time for time, _ in records]
+	assert recorder == records
+
+	# recorders without a file have nothing to close
+	Recorder().close()
+
+
+def test_pickle(tmp_path):
+	"""
+	A pickled recorder only contains its buffered records, refers to its
+	file for the others, and continues in a file of its own.
+	"""
+	recorder = Recorder(path=str(tmp_path / "first.npy"), chunk_size=4)
+	for t in range(10):
+		recorder.append((t, t))
+
+	dumped = pickle.dumps(recorder)
+	assert len(pickle.loads(dumped).buffer) == 2
+
+	# the file is written further by the original recorder
+	for t in range(10, 20):
+		recorder.append((-t, -t))
+
+	restored = pickle.loads(dumped)
+	assert restored == [(t, t) for t in range(10)]
+	restored.relocate(str(tmp_path / "second.npy"))
+	for t in range(10, 20):
+		restored.append((t, t))
+
+	assert restored == [(t, t) for t in range(20)]
+	assert len(np.load(str(tmp_path / "second.npy"), mmap_mode="r")) == restored.nr_spilled
+	assert len(np.load(str(tmp_path / "first.npy"), mmap_mode="r")) == 16
+
+
+def test_pickle_same_file(tmp_path):
+	"""
+	An unpickled recorder that continues in the file of the pickled one
+	replaces the records the pickled one appended since, like after a reset
+	of the network.
+	"""
+	path = str(tmp_path / "test.npy")
+	recorder = Recorder(path=path, chunk_size=4)
+	for t in range(6):
+		recorder.append((t, t))
+	dumped = pickle.dumps(recorder)
+	for t in range(6, 20):
+		recorder.append((-t, -t))
+	recorder.close()
+
+	restored = pickle.loads(dumped)
+	for t in range(6, 11):
+		restored.append((t, t))
+	restored.close()
+
+	assert restored == [(t, t) for t in range(11)]
+	assert np.load(path)["time"].tolist() == list(range(11))
+
+
+@pytest.mark.parametrize("chunk_size", [4, 100])
+def test_spilled_simulation(create_random_internet, tmp_path, chunk_size):
+	"""
+	Writing the recordings of a simulation to files does not change them.
+	"""
+	nets = [run_internet(create_random_internet(recording_chunk_size=size), 400) for size in [None, chunk_size]]
+
+	assert nets[0].env.nr_events == nets[1].env.nr_events
+	assert nets[0].recorders() == nets[1].recorders()
+	victim = nets[1].victim
+	assert victim.received_attacks.nr_spilled > 0
+	assert (tmp_path / "recordings" / f"AS{victim.asn}_received_attacks.npy").exists()
@@ -0,0 +1,206 @@
+"""
+A PyTest file that contains tests for validating the "RoutingTable" class from "router_table.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+import logging
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.router_table import RoutingTable
+from src.classes.scheduler import SimpyScheduler
+
+
+ASN = 5
+VICTIM = 0
+ALLY = 7
+
+
+def original_entry(next_hop, priority):
+	return {
+		"identifier": f"original_{next_hop}",
+		"next_hop": next_hop,
+		"destination": VICTIM,
+		"priority": priority,
+		"split_percentage": 0,
+		"scrubbing_capabilities": 0,
+		"as_path": [],
+		"origin": "original",
+		"recvd_from": ASN,
+		"time_added": 0
+	}
+
+
+def ally_entry(ally, next_hop, recvd_from, priority=3, scrubbing_capabilities=300):
+	return {
+		"identifier": f"support_{ally}",
+		"next_hop": next_hop,
+		"destination": VICTIM,
+		"priority": priority,
+		"split_percentage": 0,
+		"scrubbing_capabilities": scrubbing_capabilities,
+		"as_path": [next_hop, ally],
+		"origin": f"ally_{ally}",
+		"recvd_from": recvd_from,
+		"activation": 1.0,
+		"time_added": 0
+	}
+
+
+@pytest.fixture
+def routing_table():
+	"""
+	Generates a routing table with two original entries, of which the one
+	towards node 1 is the used one, and the victim info already set.
+
+	:return: the routing table
+	:rtype: RoutingTable
+	"""
+	env = SimpyScheduler()
+	network = SimpleNamespace(ASes={ASN: SimpleNamespace(attack_path_predecessors=[9])})
+	table = RoutingTable(env, network, [original_entry(1, 2), original_entry(2, 1)], ASN, logging.getLogger("test"))
+	table.update_victim_info(200, 1000)
+	return table
+
+
+def test_initial_split(routing_table):
+	"""
+	Only the original entry with the highest priority receives traffic.
+	"""
+	assert routing_table.determine_next_hops(VICTIM) == [(1, 1.0), (2, 0.0)]
+	assert routing_table.determine_highest_original() == [1]
+
+
+def test_add_entry_and_split(routing_table):
+	"""
+	Once the original priority is increased, an ally with the same priority
+	receives its scrubbing capability relative to the attack volume.
+	"""
+	routing_table.increase_original_priority()
+	routing_table.add_entry(ally_entry(ALLY, 2, recvd_from=3))
+
+	assert len(routing_table) == 3
+	assert routing_table.is_splitting_towards(ALLY)
+	assert routing_table.determine_next_hops(VICTIM) == [(1, pytest.approx(0.7)), (2, pytest.approx(0.3))]
+	assert routing_table.table["origin"].to_list() == ["original", "original", f"ally_{ALLY}"]
+
+
+def test_only_allies_split_proportionally(routing_table):
+	"""
+	If only allies have the highest priority, traffic is split proportional
+	to their scrubbing capabilities.
+	"""
+	routing_table.add_entry(ally_entry(ALLY, 1, recvd_from=3, scrubbing_capabilities=100))
+	routing_table.add_entry(ally_entry(ALLY + 1, 2, recvd_from=3, scrubbing_capabilities=300))
+
+	assert routing_table.determine_next_hops(VICTIM) == [(1, pytest.approx(0.25)), (2, pytest.approx(0.75))]
+
+
+def test_reduce_allies_based_on_asn(routing_table):
+	"""
+	Ally entries received from the given AS fall back to the lowest priority.
+	"""
+	routing_table.increase_original_priority()
+	routing_table.add_entry(ally_entry(ALLY, 2, recvd_from=3))
+	routing_table.reduce_allies_based_on_asn(3)
+
+	assert routing_table.column("priority").tolist() == [3, 1, 1]
+	assert not routing_table.is_splitting_towards(ALLY)
+	assert routing_table.determine_next_hops(VICTIM) == [(1, 1.0), (2, 0.0)]
+
+
+def test_reset(routing_table):
+	"""
+	A reset removes all ally entries and restores the original priorities.
+	"""
+	routing_table.increase_original_priority()
+	for ally in range(10, 20):
+		routing_table.add_entry(ally_entry(ally, 2, recvd_from=3, scrubbing_capabilities=10))
+	routing_table.reset()
+
+	assert len(routing_table) == 2
+	assert routing_table.column("priority").tolist() == [2, 1]
+	assert routing_table.attack_vol_on_victim is None
+	assert routing_table.nr_extra_entries_max == 10
+
+
+def test_set_activation_with_delay(routing_table):
+	"""
+	The activation of an ally is changed only after the given delay.
+	"""
+	routing_table.increase_original_priority()
+	routing_table.add_entry(ally_entry(ALLY, 2, recvd_from=3))
+	routing_table.set_activation_with_delay(ALLY, 0.5, 4)
+
+	routing_table.env.run(until=3)
+	assert routing_table.column("activation").tolist() == [1.0, 1.0, 1.0]
+	routing_table.env.run(until=5)
+	assert routing_table.column("activation").tolist() == [1.0, 1.0, 0.5]
+	assert routing_table.determine_next_hops(VICTIM) == [(1, pytest.approx(0.85)), (2, pytest.approx(0.15))]
+
+
+def test_memoized_forwarding(routing_table):
+	"""
+	Forwarding decisions are only recomputed after the table changed.
+	"""
+	next_hops = routing_table.determine_next_hops(VICTIM)
+	assert routing_table.determine_next_hops(VICTIM) is next_hops
+	routing_table.determine_highest_original()
+	routing_table.determine_highest_original()
+	assert (routing_table.cache_hits, routing_table.cache_misses) == (2, 2)
+
+	version = routing_table.version
+	routing_table.increase_original_priority()
+	routing_table.add_entry(ally_entry(ALLY, 2, recvd_from=3))
+	assert routing_table.version == version + 2
+	assert routing_table.determine_next_hops(VICTIM) == [(1, pytest.approx(0.7)), (2, pytest.approx(0.3))]
+	assert routing_table.cache_misses == 3
+	assert routing_table.determine_next_hops(VICTIM + 1) == []
+
+
+def test_incremental_split_matches_full_recomputation(routing_table):
+	"""
+	After a random sequence of changes, the incrementally maintained split
+	percentages equal the ones of a recomputation from scratch.
+	"""
+	rng = random.Random(0)
+	routing_table.increase_original_priority()
+	for ally in range(10, 14):
+		routing_table.add_entry(ally_entry(ally, rng.choice([1, 2]), recvd_from=rng.choice([3, 4]), scrubbing_capabilities=rng.randint(50, 250)))
+
+	for _ in range(200):
+		action = rng.random()
+		if action < 0.5:
+			routing_table.set_activation_with_delay(rng.randint(10, 13), rng.random(), 0)
+			routing_table.env.run()
+		elif action < 0.7:
+			routing_table.update_victim_info(200, rng.randint(500, 1500))
+		elif action < 0.8:
+			routing_table.reduce_allies_based_on_asn(rng.choice([3, 4]))
+		elif action < 0.9:
+			routing_table.decrease_original_priority()
+		else:
+			routing_table.increase_original_priority()
+
+		incremental = routing_table.column("split_percentage").copy()
+		routing_table._split_all(*routing_table.split_state)
+		assert routing_table.column("split_percentage").tolist() == pytest.approx(incremental.tolist())
+		assert routing_table.column("split_percentage").sum() == pytest.approx(1.0)
+
+
+def test_unaffected_update_keeps_version(routing_table):
+	"""
+	A new attack volume does not change the split percentages without
+	allies, so the memoized forwarding decisions stay valid.
+	"""
+	version = routing_table.version
+	routing_table.update_victim_info(200, 1500)
+	assert routing_table.version == version
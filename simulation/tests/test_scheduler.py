@@ -0,0 +1,97 @@
+"""
+A PyTest file that contains tests for validating the schedulers from "scheduler.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import pickle
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.classes.scheduler import SimpyScheduler, HeapScheduler
+from conftest import run_internet
+
+
+@pytest.mark.parametrize("scheduler", [SimpyScheduler, HeapScheduler])
+def test_order_and_cancellation(scheduler):
+	"""
+	Timers are called by time, and in the order they were scheduled for the
+	same time; cancelled timers are not called, and "run" stops before the
+	given time.
+	"""
+	env = scheduler()
+	calls = []
+	env.call_later(2, calls.append, "b")
+	env.call_later(1, calls.append, "a")
+	env.call_later(2, calls.append, "c")
+	env.call_later(2, calls.append, "cancelled").cancel()
+	env.call_later(3, calls.append, "d")
+	env.call_later(1, lambda: env.call_later(0, calls.append, "a2"))
+
+	env.run(until=3)
+	assert (calls, env.now, env.nr_events) == (["a", "a2", "b", "c"], 3, 5)
+	env.run()
+	assert calls[-1] == "d"
+
+	with pytest.raises(ValueError):
+		env.call_later(-1, calls.append, "e")
+
+
+@pytest.mark.parametrize("scheduler", [SimpyScheduler, HeapScheduler])
+def test_urgent_timers(scheduler):
+	"""
+	Urgent timers are called before all other timers of the same time, even
+	if those were scheduled earlier.
+	"""
+	env = scheduler()
+	calls = []
+	env.call_later(2, calls.append, "normal")
+	env.call_later(1, lambda: env.call_later(1, calls.append, "urgent", urgent=True))
+	env.call_later(1, lambda: env.call_later(0, calls.append, "urgent now", urgent=True))
+	env.call_later(1, calls.append, "normal now")
+
+	env.run(until=2)
+	assert calls == ["urgent now", "normal now"]
+	env.run()
+	assert calls == ["urgent now", "normal now", "urgent", "normal"]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_engines_produce_the_same_simulation(create_random_internet, seed):
+	"""
+	The same simulation, run on both schedulers, processes the same events
+	and records the same attack traffic.
+	"""
+	results = []
+	for scheduler in [SimpyScheduler, HeapScheduler]:
+		net = run_internet(create_random_internet(seed=seed, scheduler=scheduler), 400)
+		results.append((net.env.nr_events, net.victim.received_attacks, [ally.received_attacks for ally in net.allies]))
+
+	assert results[0] == results[1]
+	assert results[0][1]
+
+
+def test_pickled_simpy_scheduler():
+	"""
+	A pickled simpy scheduler continues with the pending timers, in the same
+	order, and without the cancelled ones.
+	"""
+	calls = []
+	env = SimpyScheduler()
+	env.call_later(2, calls.append, "b")
+	env.call_later(1, calls.append, "a")
+	env.call_later(2, calls.append, "urgent", urgent=True)
+	env.call_later(3, calls.append, "cancelled").cancel()
+	env.run(until=1.5)
+
+	# the timers are pickled with their callbacks, i.e., a copy of the list
+	restored = pickle.loads(pickle.dumps(env))
+	restored_calls = restored.timers[2][0][2].callback.__self__
+	restored.run()
+	assert (restored_calls, restored.now, restored.nr_events) == (["a", "urgent", "b"], 2, 3)
+	assert calls == ["a"]
@@ -0,0 +1,68 @@
+"""
+A PyTest file that contains tests for validating the parameter sweep from "sweep.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import json
+import random
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sweep import METRICS, read_grid, read_finished_cells, run_cell
+
+
+def write_grid(tmp_path, grid):
+	path = tmp_path / "grid.json"
+	path.write_text(json.dumps(grid))
+	return str(path)
+
+
+def test_read_grid(tmp_path):
+	"""
+	A grid expands into all combinations, each one with its own seed.
+	"""
+	cells = read_grid(write_grid(tmp_path, {"nr_ASes": [40, 50], "propagation_delay": [2, 3, 4], "engine": "fast"}))
+
+	assert len(cells) == 6
+	assert {(params["nr_ASes"], params["propagation_delay"]) for params in cells.values()} == {(40, 2), (40, 3), (40, 4), (50, 2), (50, 3), (50, 4)}
+	assert len({params["seed"] for params in cells.values()}) == 6
+	assert read_grid(write_grid(tmp_path, {"propagation_delay": [2, 3, 4], "engine": "fast", "nr_ASes": [40, 50]})) == cells
+
+	with pytest.raises(Exception):
+		read_grid(write_grid(tmp_path, {"nr_nodes": [40]}))
+	with pytest.raises(Exception):
+		read_grid(write_grid(tmp_path, {"log_path": "/tmp"}))
+
+
+def test_run_cell_is_reproducible(tmp_path):
+	"""
+	A cell yields the same results, independent of the state of the random
+	number generators before it runs.
+	"""
+	params = {"nr_ASes": 40, "simulation_length": 150, "engine": "fast", "seed": 3}
+	rows = []
+	for state in [0, 1]:
+		random.seed(state)
+		rows.append(run_cell("cell", params, str(tmp_path)))
+		del rows[-1]["runtime"]
+
+	assert rows[0] == rows[1]
+	assert rows[0]["sent"] > 0
+	assert (tmp_path / "cells" / "cell" / "topology_diff.json").exists()
+	assert set(rows[0]) == {"cell"} | set(params) | set(METRICS) - {"runtime"}
+
+
+def test_read_finished_cells(tmp_path):
+	path = tmp_path / "results.csv"
+	assert read_finished_cells(path, ["cell", "seed"]) == set()
+
+	path.write_text("cell,seed\na,1\nb,2\n")
+	assert read_finished_cells(path, ["cell", "seed"]) == {"a", "b"}
+	with pytest.raises(Exception):
+		read_finished_cells(path, ["cell", "nr_ASes", "seed"])
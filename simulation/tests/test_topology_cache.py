@@ -0,0 +1,64 @@
+"""
+A PyTest file that contains tests for validating the cache of generated
+topologies from "topology_cache.py"
+
+Author:
+	Devrim Celik - 08.06.2022
+"""
+
+
+import sys
+import random
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.graph_generation import generate_directed_AS_graph
+from src.topology_cache import generate_cached_AS_graph, topology_key
+from simulation_main import create_config, run_experiment
+
+
+def describe(graph):
+	"""
+	:returns: the attributes of all nodes and edges, and the order of the
+		successors and predecessors of every node
+	:rtype: list
+	"""
+	return [
+		(node, graph.nodes[node], list(graph.successors(node)), list(graph.predecessors(node)))
+		for node in graph.nodes
+	] + [(u, v, graph.edges[u, v]) for u, v in graph.edges]
+
+
+def test_cached_topology(tmp_path):
+	"""
+	A cached topology is the generated one, in the same order, and the random
+	number generators continue as if it was generated.
+	"""
+	random.seed(5)
+	np.random.seed(5)
+	graph, *roles = generate_directed_AS_graph(150, 2, 1000)
+	next_numbers = (random.random(), np.random.random())
+
+	for _ in range(2):
+		random.seed(5)
+		np.random.seed(5)
+		cached_graph, *cached_roles = generate_cached_AS_graph(str(tmp_path), 5, 150, 2, 1000)
+		assert describe(cached_graph) == describe(graph) and cached_roles == roles
+		assert (random.random(), np.random.random()) == next_numbers
+
+	assert [path.name for path in tmp_path.iterdir()] == [topology_key(150, 2, 1000, 5)]
+	assert topology_key(150, 2, 1000, 6) != topology_key(150, 2, 1000, 5)
+
+
+def test_cached_simulation(tmp_path):
+	"""
+	Simulations on a cached topology have the same results.
+	"""
+	config = create_config(seed=4, nr_ASes=60, simulation_length=200, engine="fast")
+	expected = run_experiment(config)["kpis"]
+
+	config.topology_cache = str(tmp_path)
+	assert run_experiment(config)["kpis"] == expected
+	assert run_experiment(config)["kpis"] == expected
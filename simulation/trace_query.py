@@ -0,0 +1,60 @@
+"""
+A script to filter and aggregate the binary event trace of a simulation run
+(see the "--event_trace" option of "simulation_main.py").
+
+Example:
+	$ python3 trace_query.py logs/simulation_<...>/event_trace.npy --event receive --protocol help --group_by asn
+
+Author:
+	Devrim Celik 08.06.2022
+"""
+
+import argparse
+
+from src.event_trace import EVENT_DTYPE, EVENT_TYPES, PROTOCOLS, query_trace
+
+
+def parse_range(value):
+	"""
+	Parses a "minimum:maximum" range, where either limit may be left empty.
+
+	:param value: the range
+	:type value: str
+
+	:returns: the minimum and maximum, None for a missing limit
+	:rtype: tuple[float, float]
+	"""
+	minimum, maximum = value.split(":")
+	return (float(minimum) if minimum else None, float(maximum) if maximum else None)
+
+
+def main():
+	"""
+	Parses the command line arguments, queries the trace and prints one line
+	per group.
+	"""
+	parser = argparse.ArgumentParser()
+	parser.add_argument("trace", type=str, help="path to the event_trace.npy file")
+	parser.add_argument("--event", type=str, choices=EVENT_TYPES, help="only consider this event type")
+	parser.add_argument("--protocol", type=str, choices=PROTOCOLS, help="only consider this RAT protocol (\"none\" for attack packets)")
+	parser.add_argument("--asn", type=int, help="only consider events at this AS")
+	parser.add_argument("--src", type=int, help="only consider packets from this AS")
+	parser.add_argument("--time", type=parse_range, help="only consider events in this time range, as \"minimum:maximum\"")
+	parser.add_argument("--hc", type=parse_range, help="only consider packets with a hop count in this range, as \"minimum:maximum\"")
+	parser.add_argument("--group_by", type=str, choices=EVENT_DTYPE.names, help="field to group the events by")
+	args = parser.parse_args()
+
+	filters = {
+		field: getattr(args, field)
+		for field in ["event", "protocol", "asn", "src", "time", "hc"]
+		if getattr(args, field) is not None
+	}
+	groups = query_trace(args.trace, filters, args.group_by)
+
+	print(f"{args.group_by or 'all':>16} {'count':>12} {'attack_volume':>16}")
+	for key in sorted(groups):
+		print(f"{str(key):>16} {groups[key]['count']:>12} {groups[key]['attack_volume']:>16.2f}")
+
+
+if __name__ == "__main__":
+	main()